@@ -0,0 +1,516 @@
+"""Latency benchmarks for the Context Engineering MCP server.
+
+Measures p50/p95/p99 latency and calls per second for tools and resources
+over three paths:
+
+- ``direct``: the Python functions, no MCP machinery.
+- ``stdio``: full JSON-RPC through a server subprocess over stdio.
+- ``http``: full JSON-RPC through a server subprocess over streamable HTTP.
+
+Size-sensitive tools are run with inputs from a short prompt up to a
+100 KB reasoning trace. Results are written as JSON and can be compared
+against a stored baseline; any metric worse than the baseline by more
+than the threshold is a regression and the run exits non-zero.
+
+Usage:
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --update-baseline
+    python benchmarks/bench.py --compare benchmarks/baseline.json
+
+Baselines are machine-specific, so none is committed: record one with
+``--update-baseline`` (e.g. on the main branch) on the machine that runs
+the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+from mcp import ClientSession
+
+from context_engineering_mcp import server
+from context_engineering_mcp.cognitive import thinking_models
+from context_engineering_mcp.core import (
+    episodic,
+    examples,
+    execution,
+    key_value,
+    molecular,
+    windowed,
+)
+from context_engineering_mcp.core.storage import DATA_DIR_ENV
+from context_engineering_mcp.loadgen import http_server, open_session
+from context_engineering_mcp.systems import distiller, pipeline, registry
+from context_engineering_mcp.systems.registry import REGISTRY_PATH_ENV
+
+MODES = ("direct", "stdio", "http")
+BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_ITERATIONS = {"direct": 200, "stdio": 50, "http": 50}
+# Latencies gated against the baseline; p99 is reported but too noisy at
+# these sample counts to gate on. Throughput is gated too.
+GATED_LATENCIES = ("p50_ms", "p95_ms")
+# Allowed slowdown per mode as a fraction; transports add scheduler noise.
+DEFAULT_THRESHOLDS = {"direct": 0.3, "stdio": 0.5, "http": 0.5}
+# Latency and per-call time differences below this are noise, never regressions.
+MIN_DELTA_MS = 0.05
+
+SIZES = {"short": 120, "1kb": 1024, "10kb": 10 * 1024, "100kb": 100 * 1024}
+_TRACE_STEPS = (
+    "Step {n}: Restate the sub-goal and list the facts established so far.",
+    "Step {n}: Check the assumption that the cache is warm before measuring.",
+    "Step {n}: Derive the intermediate result and compare it with the spec.",
+    "Step {n}: The previous step contradicts the constraint; backtrack once.",
+    "Step {n}: Summarize evidence, open questions and the next action.",
+)
+
+
+def reasoning_trace(size: int) -> str:
+    """Return a deterministic reasoning trace of exactly `size` characters."""
+    lines: list[str] = []
+    length = 0
+    n = 0
+    while length < size:
+        line = _TRACE_STEPS[n % len(_TRACE_STEPS)].format(n=n + 1)
+        lines.append(line)
+        length += len(line) + 1
+        n += 1
+    return "\n".join(lines)[:size]
+
+
+@dataclass(frozen=True)
+class Case:
+    """One benchmarked operation: a tool call or a resource read.
+
+    Size-sensitive cases `build` their arguments from a reasoning trace of
+    each size; the others are called once per round with fixed `params`.
+    """
+
+    target: str
+    build: Callable[[str], dict[str, Any]] | None = None
+    resource: bool = False
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def sizes(self) -> tuple[str, ...]:
+        return tuple(SIZES) if self.build is not None else ("-",)
+
+    def arguments(self, size: str) -> dict[str, Any]:
+        if self.build is None:
+            return dict(self.params)
+        return self.build(reasoning_trace(SIZES[size]))
+
+
+_EXAMPLES = [
+    {"input": "The cache hit rate doubled.", "output": "positive"},
+    {"input": "Every request now times out.", "output": "negative"},
+    {"input": "The release ships on Friday.", "output": "neutral"},
+]
+
+CASES = (
+    Case("analyze_task_complexity", lambda text: {"task_description": text}),
+    Case(
+        "design_context_architecture",
+        lambda text: {"goal": text, "constraints": "Low latency."},
+    ),
+    Case("understand_question", lambda text: {"question": text}),
+    Case(
+        "verify_logic",
+        lambda text: {"claim": "The cache is warm.", "reasoning_trace": text},
+    ),
+    Case(
+        "backtracking",
+        lambda text: {
+            "objective": "Fix the run",
+            "failed_step": "Step 3",
+            "trace": text,
+        },
+    ),
+    Case("symbolic_abstract", lambda text: {"expression": text}),
+    # Template tools.
+    Case("get_technique_guide", params={"query": "debug failing tests", "limit": 5}),
+    Case("get_protocol_shell", params={"name": "reasoning.systematic"}),
+    Case("get_prompt_program", params={"program_type": "debate"}),
+    Case("get_cell_protocol", params={"name": "cell.protocol.episodic"}),
+    Case("get_organ", params={"name": "research_synthesis"}),
+    Case("get_molecular_template"),
+    Case(
+        "batch_render",
+        params={
+            "requests": [
+                {"tool": "get_protocol_shell", "arguments": {"name": "code.analyze"}},
+                {"tool": "get_organ", "arguments": {"name": "tool_master"}},
+                {"tool": "get_prompt_program", "arguments": {"program_type": "math"}},
+            ]
+        },
+    ),
+    # Engine tools. Stateful ones write under a temporary data directory.
+    Case("cell_kv_set", lambda text: {"key": "notes", "value": text}),
+    Case("cell_kv_get", params={"key": "notes"}),
+    Case("cell_kv_cas", params={"key": "counter", "expected": 1, "value": 1}),
+    Case("cell_kv_delete", params={"key": "scratch"}),
+    Case(
+        "cell_window_ingest",
+        lambda text: {"window": "bench", "event": text, "max_items": 32},
+    ),
+    Case("cell_window_read", params={"window": "bench"}),
+    Case(
+        "cell_episodic_record",
+        params={"log": "bench", "event": "Fixed the flaky cache test."},
+    ),
+    Case(
+        "cell_episodic_recall",
+        params={"log": "bench", "query": "flaky cache test", "limit": 5},
+    ),
+    Case("cell_episodic_checkpoint", params={"log": "bench"}),
+    Case(
+        "build_molecular_context",
+        lambda text: {
+            "instruction": "Classify the sentiment.",
+            "examples": _EXAMPLES,
+            "new_input": text,
+        },
+    ),
+    Case("add_examples", params={"store": "bench", "examples": _EXAMPLES}),
+    Case("distill_output", lambda text: {"raw": text}),
+    Case(
+        "registry_record",
+        params={"intent": "summarize open pull requests", "tools": ["gh_pr_list"]},
+    ),
+    Case(
+        "run_prompt_program",
+        params={"program_type": "math", "arguments": {"problem": "What is 12 * 7?"}},
+    ),
+    Case("run_research_synthesis", params={"topic": "Vector databases"}),
+    Case("context://molecules/cot", resource=True),
+    Case("context://reference/layers", resource=True),
+    Case("context://fields/resonance", resource=True),
+    Case("context://runtime/executor", resource=True),
+    Case("context://metrics", resource=True),
+)
+
+_RESOURCE_FUNCTIONS: dict[str, Callable[[], str]] = {
+    "context://molecules/cot": server.get_cot_molecules,
+    "context://reference/layers": server.get_reference_layers,
+    "context://fields/resonance": server.get_neural_fields,
+    "context://runtime/executor": server.get_executor_stats,
+    "context://metrics": server.get_metrics,
+}
+# Modules defining the tools called directly, searched in order.
+_TOOL_MODULES = (
+    server,
+    thinking_models,
+    key_value,
+    windowed,
+    episodic,
+    examples,
+    molecular,
+    execution,
+    distiller,
+    registry,
+    pipeline,
+)
+# Tools that run their own event loop; direct calls leave the benchmark's.
+_OWN_LOOP = frozenset({"run_prompt_program", "run_research_synthesis"})
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    """Return percentile latencies (ms) and throughput of a run."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "iterations": len(latencies),
+        "p50_ms": round(cuts[49] * 1000, 4),
+        "p95_ms": round(cuts[94] * 1000, 4),
+        "p99_ms": round(cuts[98] * 1000, 4),
+        "calls_per_sec": round(len(latencies) / elapsed, 2),
+    }
+
+
+# --- Drivers ---
+
+Call = Callable[[], Awaitable[None]]
+
+
+def _direct_call(case: Case, size: str) -> Call:
+    if case.resource:
+        read = _RESOURCE_FUNCTIONS[case.target]
+
+        async def call_resource() -> None:
+            read()
+
+        return call_resource
+
+    fn = next(
+        getattr(module, case.target)
+        for module in _TOOL_MODULES
+        if hasattr(module, case.target)
+    )
+    arguments = case.arguments(size)
+
+    async def call_tool() -> None:
+        if case.target in _OWN_LOOP:
+            result = await asyncio.to_thread(fn, **arguments)
+        else:
+            result = fn(**arguments)
+        if isinstance(result, dict) and "error" in result:
+            raise RuntimeError(f"{case.target}: {result['error']}")
+        if isinstance(result, str) and result.startswith(_ERROR_PREFIXES):
+            raise RuntimeError(f"{case.target}: {result[:200]}")
+
+    return call_tool
+
+
+_ERROR_PREFIXES = ("Input Validation Error", "Error")
+
+
+def _session_call(session: ClientSession, case: Case, size: str) -> Call:
+    if case.resource:
+
+        async def read_resource() -> None:
+            await session.read_resource(case.target)  # type: ignore[arg-type]
+
+        return read_resource
+
+    arguments = case.arguments(size)
+
+    async def call_tool() -> None:
+        result = await session.call_tool(case.target, arguments)
+        text = "".join(getattr(block, "text", "") for block in result.content)
+        if result.isError or text.startswith(_ERROR_PREFIXES):
+            raise RuntimeError(f"{case.target}: {text[:200]}")
+
+    return call_tool
+
+
+# --- Runner ---
+
+
+async def measure(call: Call, iterations: int, warmup: int) -> dict[str, float]:
+    """Time `iterations` sequential calls after `warmup` untimed ones."""
+    for _ in range(warmup):
+        await call()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run_mode(
+    mode: str,
+    cases: tuple[Case, ...],
+    iterations: int,
+    rounds: int = 1,
+    url: str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Benchmark every case and size over one path.
+
+    The suite is repeated `rounds` times and each case keeps its fastest
+    round (by p50), which filters out transient scheduler noise.
+    """
+    results: dict[str, dict[str, Any]] = {}
+    warmup = max(2, iterations // 10)
+
+    async def run_cases(make: Callable[[Case, str], Call]) -> None:
+        for _ in range(rounds):
+            for case in cases:
+                for size in case.sizes():
+                    key = f"{mode}:{case.target}:{size}"
+                    stats = await measure(make(case, size), iterations, warmup)
+                    best = results.get(key)
+                    if best is None or stats["p50_ms"] < best["p50_ms"]:
+                        results[key] = {
+                            "mode": mode,
+                            "target": case.target,
+                            "size": size,
+                            **stats,
+                        }
+        for key, stats in results.items():
+            print(
+                f"{key:<55} p50 {stats['p50_ms']:>9.3f} ms  "
+                f"p95 {stats['p95_ms']:>9.3f} ms  "
+                f"{stats['calls_per_sec']:>9.1f}/s",
+                file=sys.stderr,
+            )
+
+    if mode == "direct":
+        await run_cases(_direct_call)
+    else:
+        async with open_session(url) as session:
+            await run_cases(lambda case, size: _session_call(session, case, size))
+    return results
+
+
+@contextmanager
+def _scratch_data_dir() -> Iterator[None]:
+    """Point the stores of this process and its servers at a temporary directory."""
+    names = (DATA_DIR_ENV, REGISTRY_PATH_ENV)
+    saved = {name: os.environ.get(name) for name in names}
+    with tempfile.TemporaryDirectory(prefix="sutra-bench-") as scratch:
+        os.environ[DATA_DIR_ENV] = scratch
+        os.environ[REGISTRY_PATH_ENV] = os.path.join(scratch, "registry.json")
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def run(
+    modes: tuple[str, ...],
+    cases: tuple[Case, ...] = CASES,
+    iterations: int | None = None,
+    rounds: int = 1,
+) -> dict[str, Any]:
+    """Run the benchmark suite and return the results document."""
+    results: dict[str, dict[str, Any]] = {}
+    with _scratch_data_dir():
+        for mode in modes:
+            count = iterations or DEFAULT_ITERATIONS[mode]
+            if mode == "http":
+                with http_server() as url:
+                    results.update(
+                        asyncio.run(run_mode(mode, cases, count, rounds, url))
+                    )
+            else:
+                results.update(asyncio.run(run_mode(mode, cases, count, rounds)))
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mcp": version("mcp"),
+            "package": version("context-engineering-mcp"),
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float | None = None,
+) -> list[str]:
+    """Return a description of every metric that regressed past its threshold.
+
+    Thresholds are fractions (0.5 = 50% worse). When `threshold` is not
+    given, the baseline's per-mode ``thresholds`` apply, falling back to
+    `DEFAULT_THRESHOLDS`. Cases missing from either side are ignored.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    regressions = []
+    for key, base in baseline.get("results", {}).items():
+        now = current["results"].get(key)
+        if now is None:
+            continue
+        allowed = threshold if threshold is not None else thresholds[base["mode"]]
+        for metric in GATED_LATENCIES:
+            limit = base[metric] * (1 + allowed)
+            if now[metric] > limit and now[metric] - base[metric] > MIN_DELTA_MS:
+                regressions.append(
+                    f"{key} {metric}: {now[metric]:.3f} > {limit:.3f} "
+                    f"(baseline {base[metric]:.3f})"
+                )
+        floor = base["calls_per_sec"] / (1 + allowed)
+        slower_ms = 1000 / now["calls_per_sec"] - 1000 / base["calls_per_sec"]
+        if now["calls_per_sec"] < floor and slower_ms > MIN_DELTA_MS:
+            regressions.append(
+                f"{key} calls_per_sec: {now['calls_per_sec']:.1f} < {floor:.1f} "
+                f"(baseline {base['calls_per_sec']:.1f})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--modes",
+        default=",".join(MODES),
+        help=f"Comma-separated paths to measure ({', '.join(MODES)}).",
+    )
+    parser.add_argument(
+        "--targets", help="Comma-separated tool names or resource URIs."
+    )
+    parser.add_argument(
+        "--iterations", type=int, help="Timed calls per case (default per mode)."
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Repeat the suite and keep each case's fastest round (default 3).",
+    )
+    parser.add_argument("--output", type=Path, help="Write results JSON here.")
+    parser.add_argument(
+        "--compare", type=Path, help="Baseline JSON to check for regressions."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="Allowed slowdown as a fraction for every mode "
+        "(default: the baseline's per-mode thresholds).",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help=f"Overwrite {BASELINE.name} with these results.",
+    )
+    args = parser.parse_args(argv)
+    # Importing the server configures INFO logging; keep per-request lines out.
+    for name in ("httpx", "mcp.client"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    modes = tuple(m.strip() for m in args.modes.split(",") if m.strip())
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    cases: tuple[Case, ...] = CASES
+    if args.targets:
+        wanted = {t.strip() for t in args.targets.split(",")}
+        cases = tuple(case for case in CASES if case.target in wanted)
+
+    if args.compare and not args.compare.exists():
+        parser.error(
+            f"no baseline at {args.compare}; record one on this machine "
+            "with --update-baseline"
+        )
+
+    current = run(modes, cases, args.iterations, args.rounds)
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline:
+        current["thresholds"] = {
+            mode: args.threshold or DEFAULT_THRESHOLDS[mode] for mode in MODES
+        }
+        BASELINE.write_text(json.dumps(current, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(
+            current, json.loads(args.compare.read_text()), args.threshold
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
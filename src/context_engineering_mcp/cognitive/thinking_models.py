@@ -4,87 +4,62 @@ These tools generate structured prompts that enforce intent clarification,
 logic verification, and correction via diverse thinking patterns.
 """
 
-from typing import Optional
+from typing import Any, Final
 
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import Field
 
+from context_engineering_mcp.core.templating import (
+    CompiledTemplate,
+    RenderModeInput,
+    compile_template,
+    render_template,
+)
+from context_engineering_mcp.dispatch import ModelTool, model_tool
 
-class UnderstandQuestionInput(BaseModel):
+
+class UnderstandQuestionInput(RenderModeInput):
     question: str = Field(..., min_length=3, description="The raw user ask to unpack.")
-    context: Optional[str] = Field(None, description="Optional background knowledge.")
-    constraints: Optional[str] = Field(
+    context: str | None = Field(None, description="Optional background knowledge.")
+    constraints: str | None = Field(
         None, description="Explicit limits or success criteria."
     )
 
 
-class VerifyLogicInput(BaseModel):
+class VerifyLogicInput(RenderModeInput):
     claim: str = Field(
         ..., min_length=3, description="The headline answer or assertion to validate."
     )
     reasoning_trace: str = Field(
         ..., min_length=10, description="The supporting chain-of-thought."
     )
-    constraints: Optional[str] = Field(None, description="Optional guardrails.")
+    constraints: str | None = Field(None, description="Optional guardrails.")
 
 
-class BacktrackingInput(BaseModel):
+class BacktrackingInput(RenderModeInput):
     objective: str = Field(..., min_length=3, description="Overall goal to satisfy.")
     failed_step: str = Field(
         ..., min_length=3, description="The step or subgoal that failed."
     )
-    trace: Optional[str] = Field(
+    trace: str | None = Field(
         None, description="Optional reasoning trace leading to the failure."
     )
-    constraints: Optional[str] = Field(None, description="Guardrails or requirements.")
+    constraints: str | None = Field(None, description="Guardrails or requirements.")
 
 
-class SymbolicAbstractInput(BaseModel):
+class SymbolicAbstractInput(RenderModeInput):
     expression: str = Field(
         ..., min_length=1, description="The raw text or equation to abstract."
     )
-    mapping_hint: Optional[str] = Field(
+    mapping_hint: str | None = Field(
         None, description="Optional guidance for token-to-symbol mapping."
     )
-    goal: Optional[str] = Field(None, description="Optional downstream task.")
-
+    goal: str | None = Field(None, description="Optional downstream task.")
 
-def register_thinking_models(mcp: FastMCP) -> None:
-    """Register cognitive thinking-model tools on the provided MCP instance.
 
-    Args:
-        mcp: Active FastMCP instance to attach tools to.
+UNDERSTAND_QUESTION_TEMPLATE: Final[CompiledTemplate] = compile_template(
+    "reasoning.understand_question",
     """
-
-    @mcp.tool()
-    def understand_question(
-        question: str,
-        context: Optional[str] = None,
-        constraints: Optional[str] = None,
-    ) -> str:
-        """Produce a protocol shell to decompose a user question.
-
-        Args:
-            question: The raw user ask to unpack.
-            context: Optional background knowledge or situational frame.
-            constraints: Explicit limits or success criteria.
-
-        Returns:
-            A structured prompt guiding the model to restate intent, surface
-            constraints, and prepare clarifying questions before acting.
-        """
-        # Validate input using Pydantic
-        try:
-            model = UnderstandQuestionInput(
-                question=question, context=context, constraints=constraints
-            )
-        except ValidationError as e:
-            return f"Input Validation Error: {e}"
-
-        normalized_context = model.context or "<none>"
-        normalized_constraints = model.constraints or "<none>"
-
-        template = """
 /reasoning.understand_question{{
     intent="Clarify the ask before solving by isolating intent, constraints, and required outputs",
     input={{
@@ -105,40 +80,13 @@ def register_thinking_models(mcp: FastMCP) -> None:
         proposed_plan="Initial steps or protocol to proceed"
     }}
 }}
-"""
-        return template.format(
-            question=model.question,
-            context=normalized_context,
-            constraints=normalized_constraints,
-        )
-
-    @mcp.tool()
-    def verify_logic(
-        claim: str,
-        reasoning_trace: str,
-        constraints: Optional[str] = None,
-    ) -> str:
-        """Generate a verification protocol for a reasoning trace.
-
-        Args:
-            claim: The headline answer or assertion to validate.
-            reasoning_trace: The supporting chain-of-thought or proof steps.
-            constraints: Optional guardrails (requirements, risk limits).
-
-        Returns:
-            Structured prompt that audits assumptions, inference steps, and
-            evidence, then proposes patches for any defects.
-        """
-        try:
-            model = VerifyLogicInput(
-                claim=claim, reasoning_trace=reasoning_trace, constraints=constraints
-            )
-        except ValidationError as e:
-            return f"Input Validation Error: {e}"
-
-        normalized_constraints = model.constraints or "<none>"
-
-        template = """
+""",
+)
+
+
+VERIFY_LOGIC_TEMPLATE: Final[CompiledTemplate] = compile_template(
+    "reasoning.verify_logic",
+    """
 /reasoning.verify_logic{{
     intent="Audit a reasoning trace for validity, completeness, and constraint alignment",
     input={{
@@ -160,46 +108,13 @@ def register_thinking_models(mcp: FastMCP) -> None:
         confidence="0-1 score grounded in evidence coverage and consistency"
     }}
 }}
-"""
-        return template.format(
-            claim=model.claim,
-            reasoning_trace=model.reasoning_trace,
-            constraints=normalized_constraints,
-        )
-
-    @mcp.tool()
-    def backtracking(
-        objective: str,
-        failed_step: str,
-        trace: Optional[str] = None,
-        constraints: Optional[str] = None,
-    ) -> str:
-        """Produce a recursive backtracking scaffold for error correction.
-
-        Args:
-            objective: Overall goal to satisfy.
-            failed_step: The step or subgoal that failed.
-            trace: Optional reasoning trace leading to the failure.
-            constraints: Guardrails or requirements to respect.
-
-        Returns:
-            Structured prompt that rewinds to last stable state, explores
-            alternatives, and proposes a patched plan.
-        """
-        try:
-            model = BacktrackingInput(
-                objective=objective,
-                failed_step=failed_step,
-                trace=trace,
-                constraints=constraints,
-            )
-        except ValidationError as e:
-            return f"Input Validation Error: {e}"
-
-        normalized_trace = model.trace or "<none>"
-        normalized_constraints = model.constraints or "<none>"
-
-        template = """
+""",
+)
+
+
+BACKTRACKING_TEMPLATE: Final[CompiledTemplate] = compile_template(
+    "reasoning.backtracking",
+    """
 /reasoning.backtracking{{
     intent="Recover from failure by stepping back, exploring alternatives, and re-planning",
     input={{
@@ -222,42 +137,13 @@ def register_thinking_models(mcp: FastMCP) -> None:
         checkpoints="Where to re-verify along the way"
     }}
 }}
-"""
-        return template.format(
-            objective=model.objective,
-            failed_step=model.failed_step,
-            trace=normalized_trace,
-            constraints=normalized_constraints,
-        )
-
-    @mcp.tool()
-    def symbolic_abstract(
-        expression: str,
-        mapping_hint: Optional[str] = None,
-        goal: Optional[str] = None,
-    ) -> str:
-        """Convert a concrete expression into abstract variables for reasoning.
-
-        Args:
-            expression: The raw text or equation to abstract.
-            mapping_hint: Optional guidance for token-to-symbol mapping.
-            goal: Optional downstream task (e.g., simplify, prove, generalize).
-
-        Returns:
-            Structured prompt that maps tokens to symbols, restates the problem
-            abstractly, and provides a reversible mapping table.
-        """
-        try:
-            model = SymbolicAbstractInput(
-                expression=expression, mapping_hint=mapping_hint, goal=goal
-            )
-        except ValidationError as e:
-            return f"Input Validation Error: {e}"
-
-        normalized_hint = model.mapping_hint or "<none>"
-        normalized_goal = model.goal or "<general>"
-
-        template = """
+""",
+)
+
+
+SYMBOLIC_ABSTRACT_TEMPLATE: Final[CompiledTemplate] = compile_template(
+    "symbolic.abstract",
+    """
 /symbolic.abstract{{
     intent="Abstract concrete tokens into symbolic variables to enable general reasoning",
     input={{
@@ -278,12 +164,151 @@ def register_thinking_models(mcp: FastMCP) -> None:
         next_steps="How to use the abstraction for the stated goal"
     }}
 }}
-"""
-        return template.format(
-            expression=model.expression,
-            mapping_hint=normalized_hint,
-            goal=normalized_goal,
-        )
+""",
+)
+
+
+@model_tool(UnderstandQuestionInput)
+def understand_question(model: UnderstandQuestionInput) -> str:
+    """Produce a protocol shell to decompose a user question.
+
+    Args:
+        question: The raw user ask to unpack.
+        context: Optional background knowledge or situational frame.
+        constraints: Explicit limits or success criteria.
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
+
+    Returns:
+        A structured prompt guiding the model to restate intent, surface
+        constraints, and prepare clarifying questions before acting.
+    """
+    normalized_context = model.context or "<none>"
+    normalized_constraints = model.constraints or "<none>"
+
+    return render_template(
+        UNDERSTAND_QUESTION_TEMPLATE,
+        model.render_mode,
+        question=model.question,
+        context=normalized_context,
+        constraints=normalized_constraints,
+    )
+
 
+@model_tool(VerifyLogicInput)
+def verify_logic(model: VerifyLogicInput) -> str:
+    """Generate a verification protocol for a reasoning trace.
 
-__all__ = ["register_thinking_models"]
+    Args:
+        claim: The headline answer or assertion to validate.
+        reasoning_trace: The supporting chain-of-thought or proof steps.
+        constraints: Optional guardrails (requirements, risk limits).
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
+
+    Returns:
+        Structured prompt that audits assumptions, inference steps, and
+        evidence, then proposes patches for any defects.
+    """
+    normalized_constraints = model.constraints or "<none>"
+
+    return render_template(
+        VERIFY_LOGIC_TEMPLATE,
+        model.render_mode,
+        claim=model.claim,
+        reasoning_trace=model.reasoning_trace,
+        constraints=normalized_constraints,
+    )
+
+
+@model_tool(BacktrackingInput)
+def backtracking(model: BacktrackingInput) -> str:
+    """Produce a recursive backtracking scaffold for error correction.
+
+    Args:
+        objective: Overall goal to satisfy.
+        failed_step: The step or subgoal that failed.
+        trace: Optional reasoning trace leading to the failure.
+        constraints: Guardrails or requirements to respect.
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
+
+    Returns:
+        Structured prompt that rewinds to last stable state, explores
+        alternatives, and proposes a patched plan.
+    """
+    normalized_trace = model.trace or "<none>"
+    normalized_constraints = model.constraints or "<none>"
+
+    return render_template(
+        BACKTRACKING_TEMPLATE,
+        model.render_mode,
+        objective=model.objective,
+        failed_step=model.failed_step,
+        trace=normalized_trace,
+        constraints=normalized_constraints,
+    )
+
+
+@model_tool(SymbolicAbstractInput)
+def symbolic_abstract(model: SymbolicAbstractInput) -> str:
+    """Convert a concrete expression into abstract variables for reasoning.
+
+    Args:
+        expression: The raw text or equation to abstract.
+        mapping_hint: Optional guidance for token-to-symbol mapping.
+        goal: Optional downstream task (e.g., simplify, prove, generalize).
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
+
+    Returns:
+        Structured prompt that maps tokens to symbols, restates the problem
+        abstractly, and provides a reversible mapping table.
+    """
+    normalized_hint = model.mapping_hint or "<none>"
+    normalized_goal = model.goal or "<general>"
+
+    return render_template(
+        SYMBOLIC_ABSTRACT_TEMPLATE,
+        model.render_mode,
+        expression=model.expression,
+        mapping_hint=normalized_hint,
+        goal=normalized_goal,
+    )
+
+
+THINKING_MODEL_TOOLS: Final[dict[str, ModelTool[Any, str]]] = {
+    "understand_question": understand_question,
+    "verify_logic": verify_logic,
+    "backtracking": backtracking,
+    "symbolic_abstract": symbolic_abstract,
+}
+
+# Template rendered by each thinking-model tool, for catalog search.
+THINKING_MODEL_TEMPLATES: Final[dict[str, CompiledTemplate]] = {
+    "understand_question": UNDERSTAND_QUESTION_TEMPLATE,
+    "verify_logic": VERIFY_LOGIC_TEMPLATE,
+    "backtracking": BACKTRACKING_TEMPLATE,
+    "symbolic_abstract": SYMBOLIC_ABSTRACT_TEMPLATE,
+}
+
+
+def register_thinking_models(mcp: FastMCP) -> None:
+    """Register cognitive thinking-model tools on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    for tool in THINKING_MODEL_TOOLS.values():
+        mcp.tool()(tool)
+
+
+__all__ = [
+    "BACKTRACKING_TEMPLATE",
+    "SYMBOLIC_ABSTRACT_TEMPLATE",
+    "THINKING_MODEL_TEMPLATES",
+    "THINKING_MODEL_TOOLS",
+    "UNDERSTAND_QUESTION_TEMPLATE",
+    "VERIFY_LOGIC_TEMPLATE",
+    "backtracking",
+    "register_thinking_models",
+    "symbolic_abstract",
+    "understand_question",
+    "verify_logic",
+]
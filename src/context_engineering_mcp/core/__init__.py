@@ -4,27 +4,90 @@ from context_engineering_mcp.core.atoms import (
     PROTOCOL_SHELL_STRUCTURE,
     format_protocol_shell,
 )
+from context_engineering_mcp.core import cells, programs
+from context_engineering_mcp.core.catalog import (
+    TemplateCatalog,
+    TemplateEntry,
+    get_catalog,
+)
 from context_engineering_mcp.core.cells import (
-    CELL_PROTOCOL_EPISODIC,
-    CELL_PROTOCOL_KEY_VALUE,
     CELL_PROTOCOL_REGISTRY,
-    CELL_PROTOCOL_WINDOWED,
     get_cell_protocol_template,
 )
+from context_engineering_mcp.core.episodic import (
+    EpisodicCellEngine,
+    EpisodicLog,
+    register_episodic_cell,
+)
+from context_engineering_mcp.core.examples import (
+    ExampleStore,
+    register_example_store,
+)
+from context_engineering_mcp.core.execution import (
+    ProgramRunner,
+    StepCache,
+    get_program_runner,
+    register_program_runtime,
+)
+from context_engineering_mcp.core.key_value import (
+    KeyValueCellEngine,
+    get_key_value_engine,
+    register_key_value_cell,
+)
+from context_engineering_mcp.core.molecular import (
+    MolecularContext,
+    build_context,
+    register_molecular_builder,
+)
 from context_engineering_mcp.core.molecules import (
     MOLECULAR_CONTEXT_FUNC,
     PROTOCOL_REGISTRY,
     get_protocol_template,
 )
-from context_engineering_mcp.core.programs import (
-    PROMPT_PROGRAM_MATH_TEMPLATE,
-    get_program_template,
+from context_engineering_mcp.core.names import NameIndex, Resolution
+from context_engineering_mcp.core.programs import get_program_template
+from context_engineering_mcp.core.search import SearchIndex, TechniqueSearch
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.core.windowed import (
+    WindowedCell,
+    WindowedCellEngine,
+    register_windowed_cell,
 )
+from context_engineering_mcp.core.templating import (
+    RENDER_CACHE,
+    CompiledTemplate,
+    RenderCache,
+    RenderMode,
+    RenderModeInput,
+    compact_text,
+    compile_template,
+    render_template,
+)
+
+# Template constants resolve lazily so importing the package loads no bodies.
+_LAZY_TEMPLATES = {
+    "CELL_PROTOCOL_KEY_VALUE": cells,
+    "CELL_PROTOCOL_WINDOWED": cells,
+    "CELL_PROTOCOL_EPISODIC": cells,
+    "PROMPT_PROGRAM_MATH_TEMPLATE": programs,
+}
+
+
+def __getattr__(name: str) -> str:
+    if name in _LAZY_TEMPLATES:
+        return getattr(_LAZY_TEMPLATES[name], name)  # type: ignore[no-any-return]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "PROTOCOL_SHELL_STRUCTURE",
     "format_protocol_shell",
     "MOLECULAR_CONTEXT_FUNC",
+    "MolecularContext",
+    "ExampleStore",
+    "register_example_store",
+    "build_context",
+    "register_molecular_builder",
     "PROTOCOL_REGISTRY",
     "get_protocol_template",
     "PROMPT_PROGRAM_MATH_TEMPLATE",
@@ -34,4 +97,33 @@ __all__ = [
     "CELL_PROTOCOL_EPISODIC",
     "CELL_PROTOCOL_REGISTRY",
     "get_cell_protocol_template",
+    "TemplateCatalog",
+    "TemplateEntry",
+    "get_catalog",
+    "NameIndex",
+    "Resolution",
+    "ProgramRunner",
+    "StepCache",
+    "get_program_runner",
+    "register_program_runtime",
+    "SearchIndex",
+    "TechniqueSearch",
+    "KeyValueCellEngine",
+    "get_key_value_engine",
+    "register_key_value_cell",
+    "WindowedCell",
+    "WindowedCellEngine",
+    "register_windowed_cell",
+    "estimate_tokens",
+    "EpisodicCellEngine",
+    "EpisodicLog",
+    "register_episodic_cell",
+    "CompiledTemplate",
+    "RenderCache",
+    "RENDER_CACHE",
+    "RenderMode",
+    "RenderModeInput",
+    "compact_text",
+    "compile_template",
+    "render_template",
 ]
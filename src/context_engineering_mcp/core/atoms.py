@@ -5,6 +5,13 @@ This module contains base prompt shells used to scaffold higher-level protocols.
 
 from typing import Final
 
+from context_engineering_mcp.core.templating import (
+    CompiledTemplate,
+    RenderMode,
+    compile_template,
+    render_template,
+)
+
 PROTOCOL_SHELL_STRUCTURE: Final[str] = """
 /protocol.{name}{{
     intent="{intent}",
@@ -23,18 +30,31 @@ PROTOCOL_SHELL_STRUCTURE: Final[str] = """
 }}
 """
 
+PROTOCOL_SHELL_TEMPLATE: Final[CompiledTemplate] = compile_template(
+    "protocol.shell", PROTOCOL_SHELL_STRUCTURE
+)
+
 
-def format_protocol_shell(name: str, intent: str) -> str:
+def format_protocol_shell(
+    name: str, intent: str, render_mode: RenderMode = "full"
+) -> str:
     """Render a protocol shell with the provided name and intent.
 
     Args:
         name: Protocol identifier to append to `/protocol`.
         intent: Purpose statement describing the protocol's goal.
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
 
     Returns:
         Formatted protocol shell with placeholder input/output sections.
     """
-    return PROTOCOL_SHELL_STRUCTURE.format(name=name, intent=intent)
+    return render_template(
+        PROTOCOL_SHELL_TEMPLATE, render_mode, name=name, intent=intent
+    )
 
 
-__all__ = ["PROTOCOL_SHELL_STRUCTURE", "format_protocol_shell"]
+__all__ = [
+    "PROTOCOL_SHELL_STRUCTURE",
+    "PROTOCOL_SHELL_TEMPLATE",
+    "format_protocol_shell",
+]
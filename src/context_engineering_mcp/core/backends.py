@@ -0,0 +1,181 @@
+"""Completion backends for server-side prompt programs.
+
+A backend turns a prompt into a completion. Programs only depend on the
+`CompletionBackend` protocol, so the same program runs against:
+
+- `OpenAICompatibleBackend`: any ``/chat/completions`` endpoint speaking
+  the OpenAI API (vLLM, llama.cpp, Ollama, LM Studio, a hosted API).
+  Requests go through the standard library in a worker thread; no client
+  package is needed.
+- `StubBackend`: deterministic completions derived from the prompt, for
+  tests and dry runs. It can also replay canned responses and simulate
+  latency.
+
+`backend_from_env` picks the OpenAI-compatible backend when
+`$SUTRA_LLM_URL` is set and the stub otherwise.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import urllib.error
+import urllib.request
+from collections.abc import Callable, Mapping
+from typing import Any, Final, Protocol
+
+LLM_URL_ENV: Final[str] = "SUTRA_LLM_URL"
+LLM_MODEL_ENV: Final[str] = "SUTRA_LLM_MODEL"
+LLM_API_KEY_ENV: Final[str] = "SUTRA_LLM_API_KEY"
+DEFAULT_MAX_TOKENS: Final[int] = 1024
+
+
+class BackendError(RuntimeError):
+    """A completion request that failed or returned no text."""
+
+
+class CompletionBackend(Protocol):
+    """Something that completes prompts; `name` identifies it in memo keys."""
+
+    @property
+    def name(self) -> str: ...
+
+    async def complete(self, prompt: str, max_tokens: int | None = None) -> str: ...
+
+
+class StubBackend:
+    """Deterministic backend: the same prompt always yields the same text.
+
+    Args:
+        responses: Optional canned completions. A mapping is matched by
+            substring against the prompt (first match wins); a callable
+            receives the prompt.
+        delay: Seconds to wait per call, to simulate model latency, or a
+            callable returning the delay for a prompt.
+    """
+
+    def __init__(
+        self,
+        responses: Mapping[str, str] | Callable[[str], str] | None = None,
+        delay: float | Callable[[str], float] = 0.0,
+    ) -> None:
+        self.responses = responses
+        self.delay = delay
+        self.calls = 0
+        self.prompts: list[str] = []
+
+    @property
+    def name(self) -> str:
+        return "stub"
+
+    def _respond(self, prompt: str) -> str:
+        if callable(self.responses):
+            return self.responses(prompt)
+        for needle, response in (self.responses or {}).items():
+            if needle in prompt:
+                return response
+        task = next(
+            (
+                line.strip()
+                for line in prompt.splitlines()
+                if line.strip().startswith("Task:")
+            ),
+            prompt.strip().splitlines()[0] if prompt.strip() else "",
+        )
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        return f"[stub {digest}] {task}"
+
+    async def complete(self, prompt: str, max_tokens: int | None = None) -> str:
+        self.calls += 1
+        self.prompts.append(prompt)
+        delay = self.delay(prompt) if callable(self.delay) else self.delay
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(prompt)
+
+
+class OpenAICompatibleBackend:
+    """Chat-completions client for OpenAI-compatible servers.
+
+    Args:
+        base_url: API root, e.g. ``http://localhost:8000/v1``.
+        model: Model name sent with each request.
+        api_key: Bearer token, if the server requires one.
+        timeout: Seconds per request.
+        temperature: Sampling temperature (0 keeps memoized steps stable).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str | None = None,
+        timeout: float = 120.0,
+        temperature: float = 0.0,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.temperature = temperature
+
+    @property
+    def name(self) -> str:
+        return f"openai:{self.base_url}#{self.model}"
+
+    def _post(self, prompt: str, max_tokens: int) -> str:
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+        }
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions",
+            data=json.dumps(body).encode(),
+            headers=headers,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload: dict[str, Any] = json.load(response)
+        except (OSError, ValueError) as e:
+            raise BackendError(f"{self.name}: {e}") from e
+        try:
+            content = payload["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise BackendError(f"{self.name}: malformed response") from e
+        if not isinstance(content, str):
+            raise BackendError(f"{self.name}: response has no text")
+        return content
+
+    async def complete(self, prompt: str, max_tokens: int | None = None) -> str:
+        return await asyncio.to_thread(
+            self._post, prompt, max_tokens or DEFAULT_MAX_TOKENS
+        )
+
+
+def backend_from_env() -> CompletionBackend:
+    """Return the backend configured by ``$SUTRA_LLM_*`` (the stub if unset)."""
+    url = os.getenv(LLM_URL_ENV)
+    if not url:
+        return StubBackend()
+    return OpenAICompatibleBackend(
+        url,
+        model=os.getenv(LLM_MODEL_ENV, "default"),
+        api_key=os.getenv(LLM_API_KEY_ENV) or None,
+    )
+
+
+__all__ = [
+    "LLM_API_KEY_ENV",
+    "LLM_MODEL_ENV",
+    "LLM_URL_ENV",
+    "BackendError",
+    "CompletionBackend",
+    "OpenAICompatibleBackend",
+    "StubBackend",
+    "backend_from_env",
+]
@@ -0,0 +1,553 @@
+"""Template catalog loaded from data files.
+
+Protocol, cell, organ and program templates live as text files under a
+catalog root (the packaged `data/templates` directory plus any roots in
+`$SUTRA_TEMPLATES_DIR`). Each file starts with a small header:
+
+    ---
+    name: reasoning.systematic
+    kind: protocol
+    category: reasoning
+    aliases: ["systematic"]
+    ---
+    <template body, returned verbatim>
+
+Header values are JSON when they parse as JSON and plain strings
+otherwise. `intent`, `parameters`, `use_cases` and `process` default to
+what the body declares, and `tokens` is always measured.
+
+A root's `index.json` (written by `build_index`, or
+``python -m context_engineering_mcp.core.catalog build``) holds all of
+that metadata. At startup the catalog reads only the index. A template
+body is read the first time it is requested, so unused templates cost
+neither startup time nor memory. Roots without an index are scanned
+instead. With `$SUTRA_TEMPLATES_RELOAD` set, the catalog watches for
+changes (checking at most once a second, when accessed) and reloads
+edited, added or removed files without a restart.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Final
+
+from context_engineering_mcp.core.names import NameIndex, Resolution, normalize_name
+from context_engineering_mcp.core.tokens import estimate_tokens
+
+TEMPLATES_DIR_ENV: Final[str] = "SUTRA_TEMPLATES_DIR"
+TEMPLATES_RELOAD_ENV: Final[str] = "SUTRA_TEMPLATES_RELOAD"
+PACKAGED_TEMPLATES: Final[Path] = (
+    Path(__file__).resolve().parent.parent / "data" / "templates"
+)
+INDEX_FILE: Final[str] = "index.json"
+INDEX_VERSION: Final[int] = 1
+TEMPLATE_SUFFIX: Final[str] = ".txt"
+
+_FENCE: Final[str] = "---\n"
+_INTENT = re.compile(r'intent="([^"]*)"')
+_INPUT_BLOCK = re.compile(r"\binput=\{+(.*?)\n\s*\}+,?\n", re.DOTALL)
+_PARAMETER = re.compile(r"^\s*(\w+)=", re.MULTILINE)
+_USE_CASES = re.compile(r"use_cases=\[(.*?)\]", re.DOTALL)
+_QUOTED = re.compile(r'"([^"]*)"')
+_PROCESS_START = re.compile(r"\bprocess=\[")
+_STEP = re.compile(r"/([\w.]+)\{")
+_FUNCTION = re.compile(r"^function (\w+)\(", re.MULTILINE)
+
+
+class CatalogError(ValueError):
+    """A template file or index that cannot be read."""
+
+
+@dataclass(frozen=True)
+class TemplateEntry:
+    """Metadata of one catalog template; the body is loaded separately."""
+
+    kind: str
+    name: str
+    category: str
+    path: str
+    aliases: tuple[str, ...] = ()
+    parameters: tuple[str, ...] = ()
+    use_cases: tuple[str, ...] = ()
+    process: tuple[str, ...] = ()
+    intent: str = ""
+    tokens: int = 0
+    status: str = "stable"
+
+    @property
+    def listed(self) -> bool:
+        """Whether lookups and listings include this template (not a draft)."""
+        return self.status != "draft"
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "TemplateEntry":
+        return cls(
+            kind=data["kind"],
+            name=data["name"],
+            category=data.get("category", ""),
+            path=data["path"],
+            aliases=tuple(data.get("aliases", ())),
+            parameters=tuple(data.get("parameters", ())),
+            use_cases=tuple(data.get("use_cases", ())),
+            process=tuple(data.get("process", ())),
+            intent=data.get("intent", ""),
+            tokens=int(data.get("tokens", 0)),
+            status=data.get("status", "stable"),
+        )
+
+
+def parse_template(text: str) -> tuple[dict[str, Any], str]:
+    """Split a template file into its header fields and verbatim body."""
+    if not text.startswith(_FENCE):
+        raise CatalogError("template file must start with a '---' header")
+    end = text.find("\n" + _FENCE, len(_FENCE) - 1)
+    if end < 0:
+        raise CatalogError("template header is not closed with '---'")
+    meta: dict[str, Any] = {}
+    for line in text[len(_FENCE) : end].splitlines():
+        if not line.strip():
+            continue
+        key, sep, raw = line.partition(":")
+        if not sep:
+            raise CatalogError(f"malformed header line: {line!r}")
+        raw = raw.strip()
+        try:
+            meta[key.strip()] = json.loads(raw)
+        except json.JSONDecodeError:
+            meta[key.strip()] = raw
+    return meta, text[end + 1 + len(_FENCE) :]
+
+
+def _declared_parameters(body: str) -> list[str]:
+    match = _INPUT_BLOCK.search(body)
+    return _PARAMETER.findall(match.group(1)) if match else []
+
+
+def _declared_use_cases(body: str) -> list[str]:
+    match = _USE_CASES.search(body)
+    return _QUOTED.findall(match.group(1)) if match else []
+
+
+def _process_section(body: str) -> str:
+    start = _PROCESS_START.search(body)
+    if start is None:
+        return ""
+    depth = 1
+    quoted = False
+    for position in range(start.end(), len(body)):
+        char = body[position]
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return body[start.end() : position]
+    return body[start.end() :]
+
+
+def _declared_process(body: str) -> list[str]:
+    """Return the body's process steps as ``"step: text; text"`` lines.
+
+    Protocol shells declare ``process=[/step{...}, ...]``; prompt programs
+    declare one JavaScript function per step.
+    """
+    section = _process_section(body)
+    if not section:
+        return [name.replace("_", " ") for name in _FUNCTION.findall(body)]
+    starts = list(_STEP.finditer(section))
+    steps = []
+    for current, following in zip(starts, [*starts[1:], None]):
+        chunk = section[current.end() : following.start() if following else None]
+        texts = _QUOTED.findall(chunk)
+        name = current.group(1)
+        steps.append(f"{name}: {'; '.join(texts)}" if texts else name)
+    return steps
+
+
+def template_metadata(body: str) -> dict[str, Any]:
+    """Return the intent, parameters, use cases and process a body declares."""
+    intent = _INTENT.search(body)
+    return {
+        "intent": intent.group(1) if intent else "",
+        "parameters": _declared_parameters(body),
+        "use_cases": _declared_use_cases(body),
+        "process": _declared_process(body),
+    }
+
+
+def describe(path: Path, root: Path) -> TemplateEntry:
+    """Read a template file and return its catalog entry."""
+    meta, body = parse_template(path.read_text(encoding="utf-8"))
+    for required in ("name", "kind"):
+        if not meta.get(required):
+            raise CatalogError(f"{path}: header is missing '{required}'")
+    return TemplateEntry.from_dict(
+        {
+            **template_metadata(body),
+            **meta,
+            "path": path.relative_to(root).as_posix(),
+            "tokens": estimate_tokens(body),
+        }
+    )
+
+
+def _template_files(root: Path) -> Iterator[Path]:
+    return (p for p in sorted(root.rglob(f"*{TEMPLATE_SUFFIX}")) if p.is_file())
+
+
+def scan(root: Path) -> list[TemplateEntry]:
+    """Describe every template file below `root`."""
+    return [describe(path, root) for path in _template_files(root)]
+
+
+def build_index(root: Path) -> Path:
+    """Write `root`'s index file from its template files and return its path."""
+    entries = scan(root)
+    seen: set[tuple[str, str]] = set()
+    for entry in entries:
+        if (entry.kind, entry.name) in seen:
+            raise CatalogError(f"duplicate template {entry.kind} {entry.name!r}")
+        seen.add((entry.kind, entry.name))
+    index = {
+        "version": INDEX_VERSION,
+        "templates": [entry.to_dict() for entry in entries],
+    }
+    path = root / INDEX_FILE
+    path.write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def load_index(root: Path) -> list[TemplateEntry]:
+    """Return `root`'s entries from its index file, scanning if it has none."""
+    path = root / INDEX_FILE
+    if not path.is_file():
+        return scan(root)
+    index = json.loads(path.read_text(encoding="utf-8"))
+    if index.get("version") != INDEX_VERSION:
+        raise CatalogError(f"{path}: unsupported index version {index.get('version')}")
+    return [TemplateEntry.from_dict(item) for item in index["templates"]]
+
+
+# Normalizes a template name or alias for lookup.
+lookup_key = normalize_name
+
+
+class TemplateCatalog:
+    """Templates from one or more catalog roots, with lazily loaded bodies.
+
+    Later roots override earlier ones for templates of the same kind and
+    name.
+
+    Args:
+        roots: Catalog directories, lowest precedence first.
+        reload: Watch the roots and reload changed files.
+        reload_interval: Minimum seconds between change checks.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[Path],
+        reload: bool = False,
+        reload_interval: float = 1.0,
+    ) -> None:
+        self.roots = [Path(root) for root in roots]
+        self.reload = reload
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._bodies: dict[tuple[str, str], str] = {}
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._next_check = 0.0
+        self._files: dict[Path, tuple[int, int]] = {}
+        self._index((root, entry) for root in self.roots for entry in load_index(root))
+        if reload:
+            self._files = self._fingerprint()
+            self._next_check = time.monotonic() + reload_interval
+
+    @classmethod
+    def from_env(cls) -> "TemplateCatalog":
+        """Build the catalog from the packaged templates and the environment."""
+        extra = os.getenv(TEMPLATES_DIR_ENV, "")
+        roots = [PACKAGED_TEMPLATES, *(Path(p) for p in extra.split(os.pathsep) if p)]
+        reload = os.getenv(TEMPLATES_RELOAD_ENV, "").lower() in ("1", "true", "yes")
+        return cls(roots, reload=reload)
+
+    @property
+    def generation(self) -> int:
+        """Count of reloads so far; changes whenever the templates do."""
+        return self._reloads
+
+    def _index(self, located: Iterable[tuple[Path, TemplateEntry]]) -> None:
+        entries: dict[tuple[str, str], TemplateEntry] = {}
+        files: dict[tuple[str, str], Path] = {}
+        for root, entry in located:
+            entries[(entry.kind, entry.name)] = entry
+            files[(entry.kind, entry.name)] = root / entry.path
+        listed = [entry for entry in entries.values() if entry.listed]
+        names: dict[str, NameIndex] = {}
+        declared: dict[str, NameIndex] = {}
+        for entry in listed:
+            index = names.setdefault(entry.kind, NameIndex())
+            exact = declared.setdefault(entry.kind, NameIndex())
+            for alias in (entry.name, *entry.aliases):
+                index.add(alias, entry.name)
+                exact.add(alias, entry.name)
+        # The last segment of a dotted name ("systematic" for
+        # "reasoning.systematic") is an alias unless another name claims it.
+        for entry in listed:
+            names[entry.kind].add(entry.name.rsplit(".", 1)[-1], entry.name)
+        self._entries = entries
+        self._paths = files
+        self._names = names
+        self._declared = declared
+
+    # --- Change detection ---
+
+    def _fingerprint(self) -> dict[Path, tuple[int, int]]:
+        fingerprint = {}
+        for root in self.roots:
+            for path in _template_files(root):
+                stat = path.stat()
+                fingerprint[path] = (stat.st_mtime_ns, stat.st_size)
+        return fingerprint
+
+    def _maybe_refresh(self) -> None:
+        if self.reload and time.monotonic() >= self._next_check:
+            self.refresh()
+
+    def refresh(self) -> bool:
+        """Reload templates whose files changed; return whether any did."""
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            current = self._fingerprint()
+            if current == self._files:
+                return False
+            changed = {p for p, stamp in current.items() if self._files.get(p) != stamp}
+            known = {path: key for key, path in self._paths.items()}
+            located: list[tuple[Path, TemplateEntry]] = []
+            for root in self.roots:
+                for path in _template_files(root):
+                    key = known.get(path)
+                    if path in changed or key is None:
+                        located.append((root, describe(path, root)))
+                    else:
+                        located.append((root, self._entries[key]))
+            self._files = current
+            self._index(located)
+            self._bodies = {
+                key: body
+                for key, body in self._bodies.items()
+                if key in self._paths and self._paths[key] not in changed
+            }
+            self._reloads += 1
+            return True
+
+    # --- Lookup ---
+
+    def entries(self, kind: str | None = None) -> list[TemplateEntry]:
+        """Return the listed (non-draft) templates, optionally of one kind."""
+        self._maybe_refresh()
+        return [
+            entry
+            for entry in self._entries.values()
+            if entry.listed and (kind is None or entry.kind == kind)
+        ]
+
+    def names(self, kind: str) -> list[str]:
+        """Return the sorted canonical names of listed templates of `kind`."""
+        return sorted(entry.name for entry in self.entries(kind))
+
+    def lookup(self, kind: str, name: str) -> Resolution:
+        """Resolve a name or alias of a listed template, allowing typos.
+
+        Case, '_' and '-' are ignored and a leading ``<kind>.`` qualifier
+        (e.g. ``organ.``) is optional. See `NameIndex.resolve`.
+        """
+        self._maybe_refresh()
+        index = self._names.get(kind)
+        if index is None:
+            return Resolution(name, None)
+        qualifier = f"{kind}."
+        if index.get(name) is None and lookup_key(name).startswith(qualifier):
+            resolution = index.resolve(name.strip()[len(qualifier) :])
+            return replace(resolution, query=name)
+        return index.resolve(name)
+
+    def resolve(self, kind: str, name: str) -> TemplateEntry | None:
+        """Return the listed template `name` resolves to, if any."""
+        found = self.lookup(kind, name).name
+        return None if found is None else self._entries[(kind, found)]
+
+    def exact(self, kind: str, name: str) -> TemplateEntry | None:
+        """Return the listed template named `name` or one of its declared aliases.
+
+        Unlike `resolve`, prefixes, typos and derived short names
+        ("systematic") do not match; the ``<kind>.`` qualifier stays optional.
+        """
+        self._maybe_refresh()
+        index = self._declared.get(kind)
+        if index is None:
+            return None
+        found = index.get(name)
+        qualifier = f"{kind}."
+        if found is None and lookup_key(name).startswith(qualifier):
+            found = index.get(name.strip()[len(qualifier) :])
+        return None if found is None else self._entries[(kind, found)]
+
+    def entry(self, kind: str, name: str) -> TemplateEntry | None:
+        """Return a template (drafts included) by its canonical name."""
+        self._maybe_refresh()
+        return self._entries.get((kind, name))
+
+    def body(self, entry: TemplateEntry) -> str:
+        """Return a template's text, reading its file on first use."""
+        key = (entry.kind, entry.name)
+        body = self._bodies.get(key)
+        if body is not None:
+            self._hits += 1
+            return body
+        self._misses += 1
+        path = self._paths[key]
+        _, body = parse_template(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._bodies[key] = body
+        return body
+
+    def template(self, kind: str, name: str) -> str | None:
+        """Return the body of the listed template `name` resolves to.
+
+        A prefix or fuzzy match is preceded by a comment line naming the
+        template it resolved to (see `Resolution.note`).
+        """
+        resolution = self.lookup(kind, name)
+        if resolution.name is None:
+            return None
+        body = self.body(self._entries[(kind, resolution.name)])
+        return resolution.note(kind) + body
+
+    def source(self, kind: str, name: str) -> str:
+        """Return the body of a template (drafts included) by canonical name."""
+        entry = self.entry(kind, name)
+        if entry is None:
+            raise KeyError(f"{kind} {name!r}")
+        return self.body(entry)
+
+    def stats(self) -> dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "templates": len(self._entries),
+            "loaded": len(self._bodies),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else 0.0,
+            "reloads": self._reloads,
+        }
+
+
+class CatalogView(Mapping[str, str]):
+    """Read-only mapping of canonical name to body for one template kind.
+
+    Bodies are loaded only when an item is read.
+    """
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+
+    def __getitem__(self, name: str) -> str:
+        entry = get_catalog().entry(self.kind, name)
+        if entry is None or not entry.listed:
+            raise KeyError(name)
+        return get_catalog().body(entry)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(get_catalog().names(self.kind))
+
+    def __len__(self) -> int:
+        return len(get_catalog().entries(self.kind))
+
+    def __repr__(self) -> str:
+        return f"CatalogView({self.kind!r}, {list(self)!r})"
+
+
+_catalog: TemplateCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> TemplateCatalog:
+    """Return the process-wide template catalog, loading its index on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = TemplateCatalog.from_env()
+    return _catalog
+
+
+def set_catalog(catalog: TemplateCatalog | None) -> None:
+    """Replace the process-wide catalog (None rebuilds it from the environment)."""
+    global _catalog
+    with _catalog_lock:
+        _catalog = catalog
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m context_engineering_mcp.core.catalog",
+        description="Build or inspect a template catalog index.",
+    )
+    parser.add_argument("command", choices=["build", "list"])
+    parser.add_argument(
+        "root",
+        nargs="?",
+        type=Path,
+        default=PACKAGED_TEMPLATES,
+        help="Catalog directory (default: the packaged templates).",
+    )
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        path = build_index(args.root)
+        print(f"Wrote {path} ({len(load_index(args.root))} templates)")
+        return
+    for entry in load_index(args.root):
+        print(
+            f"{entry.kind:<9} {entry.name:<28} {entry.tokens:>5} tokens  {entry.intent}"
+        )
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = [
+    "INDEX_FILE",
+    "PACKAGED_TEMPLATES",
+    "TEMPLATES_DIR_ENV",
+    "TEMPLATES_RELOAD_ENV",
+    "CatalogError",
+    "CatalogView",
+    "TemplateCatalog",
+    "TemplateEntry",
+    "build_index",
+    "describe",
+    "get_catalog",
+    "load_index",
+    "lookup_key",
+    "parse_template",
+    "scan",
+    "set_catalog",
+    "template_metadata",
+]
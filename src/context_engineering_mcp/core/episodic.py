@@ -0,0 +1,682 @@
+"""Layer 2: Episodic cell engine.
+
+Server-side implementation of `cell.protocol.episodic`. Events are appended
+as JSON lines to size-bounded segment files with batched fsync. An in-memory
+inverted index maps keywords, tags, importance levels and episode IDs to
+entry offsets, so recall intersects posting lists and reads only the
+matching lines instead of scanning the log. `checkpoint_ref` values are
+`<segment>:<byte offset>` positions of durable (fsynced) log boundaries.
+
+When NumPy is installed, each event is also embedded with offline hashed
+n-gram vectors (see `core.vectors`) so `recall(query=...)` can rank entries
+by similarity rather than requiring exact keyword overlap.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, BinaryIO, Final, Literal
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.core.matching import tokenize, word_forms
+from context_engineering_mcp.core.storage import data_dir
+from context_engineering_mcp.core.vectors import (
+    DEFAULT_DIM,
+    HashedNgramEmbedder,
+    VectorMatrix,
+    numpy_available,
+)
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel
+
+Importance = Literal["low", "medium", "high"]
+
+IMPORTANCE_LEVELS: Final[dict[str, int]] = {"low": 0, "medium": 1, "high": 2}
+DEFAULT_SEGMENT_BYTES: Final[int] = 8 * 1024 * 1024
+DEFAULT_FSYNC_EVERY: Final[int] = 64
+DEFAULT_FSYNC_INTERVAL: Final[float] = 1.0
+EMBEDDINGS_ENV: Final[str] = "SUTRA_EPISODIC_EMBEDDINGS"
+MMAP_ENV: Final[str] = "SUTRA_EPISODIC_MMAP"
+# Similarity candidates fetched per requested result before filtering.
+_OVERSAMPLE: Final[int] = 8
+_SEGMENT_SUFFIX: Final[str] = ".seg"
+_MIN_KEYWORD_LENGTH: Final[int] = 3
+_STOPWORDS: Final[frozenset[str]] = frozenset(
+    {
+        "the",
+        "and",
+        "for",
+        "are",
+        "but",
+        "not",
+        "you",
+        "all",
+        "any",
+        "can",
+        "had",
+        "her",
+        "was",
+        "one",
+        "our",
+        "out",
+        "has",
+        "his",
+        "how",
+        "its",
+        "may",
+        "new",
+        "now",
+        "see",
+        "two",
+        "who",
+        "did",
+        "get",
+        "let",
+        "put",
+        "say",
+        "she",
+        "too",
+        "use",
+        "with",
+        "this",
+        "that",
+        "from",
+        "they",
+        "have",
+        "were",
+        "will",
+        "what",
+        "when",
+        "your",
+        "which",
+        "their",
+        "there",
+        "then",
+        "them",
+        "been",
+        "than",
+        "into",
+        "more",
+        "some",
+        "such",
+        "only",
+        "also",
+        "just",
+        "over",
+        "very",
+    }
+)
+
+
+def extract_keywords(text: str) -> list[str]:
+    """Return the distinct retrieval keywords of a text, in order of appearance."""
+    keywords: dict[str, None] = {}
+    for token in tokenize(text):
+        if len(token) >= _MIN_KEYWORD_LENGTH and token not in _STOPWORDS:
+            keywords[token] = None
+    return list(keywords)
+
+
+def _index_terms(keywords: Iterable[str]) -> set[str]:
+    # Index each keyword with its de-inflected stems so "tests" and "test" meet.
+    return {form for keyword in keywords for form in word_forms(keyword)}
+
+
+def _descending(postings: list[list[int]]) -> Iterator[int]:
+    """Yield the union of ascending posting lists, newest entry first."""
+    if len(postings) == 1:
+        yield from reversed(postings[0])
+        return
+    previous = None
+    for entry in heapq.merge(*map(reversed, postings), reverse=True):
+        if entry != previous:
+            yield entry
+            previous = entry
+
+
+def _contains(postings: list[list[int]], entry: int) -> bool:
+    for posting in postings:
+        index = bisect.bisect_left(posting, entry)
+        if index < len(posting) and posting[index] == entry:
+            return True
+    return False
+
+
+def format_ref(segment: int, offset: int) -> str:
+    return f"{segment:06d}:{offset}"
+
+
+def parse_ref(ref: str) -> tuple[int, int]:
+    """Parse a `<segment>:<offset>` checkpoint reference."""
+    segment, _, offset = ref.partition(":")
+    try:
+        return int(segment), int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid checkpoint_ref '{ref}'.") from None
+
+
+class EpisodicLog:
+    """Append-only segmented log with an inverted keyword/tag index.
+
+    Args:
+        directory: Directory holding the segment files.
+        segment_bytes: Size at which the active segment is sealed.
+        fsync_every: Number of appends between fsyncs.
+        fsync_interval: Maximum seconds between fsyncs while appending.
+        embedding_dim: Dimensionality of similarity vectors, or None to
+            disable similarity recall. Requires NumPy.
+        mmap_vectors: Keep the vectors in a memory-mapped file inside the log
+            directory instead of re-embedding every event on open.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        fsync_every: int = DEFAULT_FSYNC_EVERY,
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+        embedding_dim: int | None = None,
+        mmap_vectors: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.RLock()
+        # Entry number -> (segment, offset, importance level).
+        self._entries: list[tuple[int, int, int]] = []
+        # Index term -> ascending entry numbers.
+        self._postings: dict[str, list[int]] = {}
+        self._readers: dict[int, BinaryIO] = {}
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        # Damaged lines found on open (moved aside to `<segment>.corrupt`).
+        self.skipped_lines = 0
+        self._embedder: HashedNgramEmbedder | None = None
+        self._vectors: VectorMatrix | None = None
+        if embedding_dim is not None:
+            self._embedder = HashedNgramEmbedder(embedding_dim)
+            self._vectors = VectorMatrix(
+                embedding_dim,
+                self.directory / f"vectors-{embedding_dim}.f32"
+                if mmap_vectors
+                else None,
+            )
+
+        segments = sorted(
+            int(path.stem)
+            for path in self.directory.glob(f"*{_SEGMENT_SUFFIX}")
+            if path.stem.isdigit()
+        )
+        valid_bytes = 0
+        for segment in segments:
+            valid_bytes = self._load_segment(segment)
+        self._segment = segments[-1] if segments else 1
+        if segments:
+            # Drop a torn final record so new appends start on a line boundary.
+            os.truncate(self._segment_path(self._segment), valid_bytes)
+        if self._vectors is not None:
+            # Drop mapped vectors whose events did not survive.
+            self._vectors.truncate(len(self._entries))
+        self._writer = open(self._segment_path(self._segment), "ab")  # noqa: SIM115
+        self._offset = self._writer.tell()
+
+    # --- Internal helpers ---
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"{segment:06d}{_SEGMENT_SUFFIX}"
+
+    def _index(self, record: dict[str, Any], segment: int, offset: int) -> None:
+        entry = len(self._entries)
+        importance = IMPORTANCE_LEVELS.get(record.get("importance", "medium"), 1)
+        self._entries.append((segment, offset, importance))
+        terms = {f"kw:{term}" for term in _index_terms(record.get("keywords", ()))}
+        terms.update(f"tag:{tag.lower()}" for tag in record.get("tags", ()))
+        terms.add(f"episode:{record.get('episode_id', '')}")
+        for term in terms:
+            self._postings.setdefault(term, []).append(entry)
+        # Mapped vectors persisted by an earlier run are reused as-is.
+        if (
+            self._embedder is not None
+            and self._vectors is not None
+            and entry >= len(self._vectors)
+        ):
+            self._vectors.append(self._embedder.embed(record.get("event", "")))
+
+    def _load_segment(self, segment: int) -> int:
+        """Index a segment and return the length of its valid prefix."""
+        offset = 0
+        damaged: list[tuple[int, bytes]] = []
+        with open(self._segment_path(segment), "rb") as handle:
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break  # torn final write; ignore the partial record
+                if line.strip():  # blanked-out damaged lines are skipped
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = None
+                    if isinstance(record, dict):
+                        self._index(record, segment, offset)
+                    else:
+                        damaged.append((offset, line))
+                        if self._vectors is not None:
+                            # Later rows may belong to other events; re-embed.
+                            self._vectors.truncate(len(self._entries))
+                offset += len(line)
+        if damaged:
+            self._quarantine(segment, damaged)
+        return offset
+
+    def _quarantine(self, segment: int, damaged: list[tuple[int, bytes]]) -> None:
+        """Move damaged lines aside, blanking them in place to keep offsets."""
+        path = self._segment_path(segment)
+        with open(path.with_suffix(".corrupt"), "ab") as aside:
+            aside.write(b"".join(line for _, line in damaged))
+        with open(path, "r+b") as handle:
+            for offset, line in damaged:
+                handle.seek(offset)
+                handle.write(b" " * (len(line) - 1) + b"\n")
+        self.skipped_lines += len(damaged)
+
+    def _sync(self) -> None:
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def _rotate(self) -> None:
+        self._sync()
+        self._writer.close()
+        self._segment += 1
+        self._writer = open(self._segment_path(self._segment), "ab")  # noqa: SIM115
+        self._offset = 0
+
+    def _read(self, entry: int) -> dict[str, Any]:
+        segment, offset, _ = self._entries[entry]
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = open(self._segment_path(segment), "rb")  # noqa: SIM115
+            self._readers[segment] = reader
+        reader.seek(offset)
+        record: dict[str, Any] = json.loads(reader.readline())
+        record["ref"] = format_ref(segment, offset)
+        return record
+
+    # --- Operations ---
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        event: str,
+        episode_id: str = "default",
+        tags: Iterable[str] = (),
+        importance: Importance = "medium",
+    ) -> dict[str, Any]:
+        """Append an event and index it.
+
+        Returns:
+            The stored entry with its `ref` and `keywords` (retrieval cues).
+        """
+        record = {
+            "episode_id": episode_id,
+            "event": event,
+            "tags": list(dict.fromkeys(tags)),
+            "importance": importance,
+            "keywords": extract_keywords(event),
+            "ts": time.time(),
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with self._lock:
+            if self._offset and self._offset + len(line) > self.segment_bytes:
+                self._rotate()
+            segment, offset = self._segment, self._offset
+            self._writer.write(line)
+            self._offset += len(line)
+            self._index(record, segment, offset)
+            self._pending += 1
+            if (
+                self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+        record["ref"] = format_ref(segment, offset)
+        return record
+
+    def checkpoint(self) -> str:
+        """Make every appended event durable and return the boundary reference."""
+        with self._lock:
+            self._sync()
+            return format_ref(self._segment, self._offset)
+
+    @property
+    def similarity_enabled(self) -> bool:
+        return self._vectors is not None
+
+    def _groups(
+        self, tags: Iterable[str], keywords: Iterable[str], episode_id: str | None
+    ) -> list[list[list[int]]]:
+        # Each group is a union of ascending posting lists; all groups must match.
+        groups: list[list[list[int]]] = []
+        for tag in tags:
+            groups.append([self._postings.get(f"tag:{tag.lower()}", [])])
+        for keyword in extract_keywords(" ".join(keywords)):
+            groups.append(
+                [
+                    self._postings[f"kw:{form}"]
+                    for form in word_forms(keyword)
+                    if f"kw:{form}" in self._postings
+                ]
+            )
+        if episode_id is not None:
+            groups.append([self._postings.get(f"episode:{episode_id}", [])])
+        groups.sort(key=lambda group: sum(map(len, group)))
+        return groups
+
+    def _similar(
+        self,
+        query: str,
+        groups: list[list[list[int]]],
+        floor: int,
+        boundary: tuple[int, int] | None,
+        limit: int,
+    ) -> list[tuple[int, float]]:
+        """Rank entries by cosine similarity, keeping those passing the filters."""
+        assert self._embedder is not None and self._vectors is not None
+        scores = self._vectors.scores(self._embedder.embed(query))
+        total = len(scores)
+        fetch = max(limit * _OVERSAMPLE, 64)
+        while True:
+            fetch = min(fetch, total)
+            if fetch == total:
+                ranked = scores.argsort()[::-1]
+            else:
+                candidates = scores.argpartition(-fetch)[-fetch:]
+                ranked = candidates[scores[candidates].argsort()[::-1]]
+            hits: list[tuple[int, float]] = []
+            for index in ranked:
+                entry = int(index)
+                segment, offset, importance = self._entries[entry]
+                if importance < floor:
+                    continue
+                if boundary is not None and (segment, offset) < boundary:
+                    continue
+                if not all(_contains(group, entry) for group in groups):
+                    continue
+                hits.append((entry, float(scores[entry])))
+                if len(hits) >= limit:
+                    return hits
+            if fetch == total:
+                return hits
+            fetch *= 4  # filters rejected too many candidates; widen the pool
+
+    def recall(
+        self,
+        tags: Iterable[str] = (),
+        keywords: Iterable[str] = (),
+        min_importance: Importance = "low",
+        episode_id: str | None = None,
+        after: str | None = None,
+        limit: int = 20,
+        query: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return matching entries, newest first (or most similar first).
+
+        All given tags must match; each query keyword matches any of its
+        inflections, and all keywords must match. Without tags, keywords or
+        an episode, the most recent entries are returned. With a `query`,
+        entries passing those filters are ranked by embedding similarity and
+        carry a `score`.
+
+        Args:
+            tags: Tags every result must carry.
+            keywords: Free-text keywords every result must contain.
+            min_importance: Lowest importance level to include.
+            episode_id: Restrict to one episode.
+            after: Only entries appended after this checkpoint_ref.
+            limit: Maximum number of entries to return.
+            query: Free text to rank entries by similarity.
+
+        Raises:
+            RuntimeError: If `query` is given but similarity is disabled.
+        """
+        if query is not None and self._vectors is None:
+            raise RuntimeError("Similarity recall is not enabled for this log.")
+        floor = IMPORTANCE_LEVELS[min_importance]
+        boundary = parse_ref(after) if after else None
+        with self._lock:
+            groups = self._groups(tags, keywords, episode_id)
+            self._writer.flush()
+            if query is not None:
+                results = []
+                for entry, score in self._similar(
+                    query, groups, floor, boundary, limit
+                ):
+                    record = self._read(entry)
+                    record["score"] = round(score, 4)
+                    results.append(record)
+                return results
+
+            ordered: Iterable[int]
+            if groups:
+                ordered = (
+                    entry
+                    for entry in _descending(groups[0])
+                    if all(_contains(group, entry) for group in groups[1:])
+                )
+            else:
+                ordered = range(len(self._entries) - 1, -1, -1)
+
+            results = []
+            for entry in ordered:
+                segment, offset, importance = self._entries[entry]
+                if boundary is not None and (segment, offset) < boundary:
+                    break  # entries are ordered; the rest are older
+                if importance < floor:
+                    continue
+                results.append(self._read(entry))
+                if len(results) >= limit:
+                    break
+            return results
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._writer.closed:
+                self._sync()
+                self._writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+
+
+class EpisodicCellEngine:
+    """Named episodic logs stored under the Sutra data directory.
+
+    Args:
+        root: Directory holding the logs; defaults to the data directory.
+        embedding_dim: Similarity vector size, or None to disable similarity
+            recall. Defaults to enabled when NumPy is installed, unless
+            `$SUTRA_EPISODIC_EMBEDDINGS` is "0".
+        mmap_vectors: Persist vectors in memory-mapped files. Defaults to
+            `$SUTRA_EPISODIC_MMAP` being "1".
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str] | None = None,
+        embedding_dim: int | None | Literal["auto"] = "auto",
+        mmap_vectors: bool | None = None,
+    ) -> None:
+        self._root = Path(root) if root is not None else None
+        if embedding_dim == "auto":
+            enabled = numpy_available() and os.getenv(EMBEDDINGS_ENV) != "0"
+            embedding_dim = DEFAULT_DIM if enabled else None
+        self._embedding_dim = embedding_dim
+        if mmap_vectors is None:
+            mmap_vectors = os.getenv(MMAP_ENV) == "1"
+        self._mmap_vectors = mmap_vectors
+        self._logs: dict[str, EpisodicLog] = {}
+        self._lock = threading.Lock()
+
+    def log(self, name: str) -> EpisodicLog:
+        with self._lock:
+            log = self._logs.get(name)
+            if log is None:
+                root = self._root or data_dir("episodic")
+                log = EpisodicLog(
+                    root / name,
+                    embedding_dim=self._embedding_dim,
+                    mmap_vectors=self._mmap_vectors,
+                )
+                self._logs[name] = log
+            return log
+
+    def close(self) -> None:
+        with self._lock:
+            for log in self._logs.values():
+                log.close()
+            self._logs.clear()
+
+
+EPISODIC_CELL_ENGINE: Final[EpisodicCellEngine] = EpisodicCellEngine()
+
+
+# --- Input Models ---
+
+_LOG_NAME_PATTERN: Final[str] = r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$"
+
+
+class EpisodicTarget(TracedModel):
+    log: str = Field(
+        "default", pattern=_LOG_NAME_PATTERN, max_length=64, description="Log name."
+    )
+
+
+class EpisodicRecordInput(EpisodicTarget):
+    event: str = Field(..., min_length=1, description="Event or message to log.")
+    episode_id: str = Field("default", min_length=1, description="Episode ID.")
+    tags: list[str] = Field(default_factory=list, description="Retrieval tags.")
+    importance: Importance = Field("medium", description="low|medium|high.")
+
+
+class EpisodicRecallInput(EpisodicTarget):
+    tags: list[str] = Field(default_factory=list, description="Required tags.")
+    keywords: str | None = Field(None, description="Keywords to match.")
+    query: str | None = Field(
+        None, min_length=1, description="Free text to rank entries by similarity."
+    )
+    min_importance: Importance = Field("low", description="Lowest importance.")
+    episode_id: str | None = Field(None, description="Restrict to an episode.")
+    after: str | None = Field(
+        None, pattern=r"^\d+:\d+$", description="Only entries after this checkpoint."
+    )
+    limit: int = Field(20, ge=1, le=500, description="Maximum results.")
+
+
+# --- Tools ---
+
+
+@model_tool(EpisodicRecordInput)
+def cell_episodic_record(model: EpisodicRecordInput) -> dict:
+    """Append an event to an episodic log and index it for recall.
+
+    Args:
+        event: The event or message to record.
+        episode_id: Episode the event belongs to.
+        tags: Optional retrieval tags.
+        importance: 'low', 'medium' or 'high'.
+        log: Name of the episodic log.
+    """
+    entry = EPISODIC_CELL_ENGINE.log(model.log).record(
+        model.event, model.episode_id, model.tags, model.importance
+    )
+    return {"ref": entry["ref"], "retrieval_keys": entry["keywords"]}
+
+
+@model_tool(EpisodicRecallInput)
+def cell_episodic_recall(model: EpisodicRecallInput) -> dict:
+    """Recall episodic entries by tags, keywords, importance, episode or similarity.
+
+    Args:
+        tags: Tags every entry must carry.
+        keywords: Space-separated keywords every entry must contain.
+        min_importance: Lowest importance to include ('low', 'medium', 'high').
+        episode_id: Restrict to a single episode.
+        after: A checkpoint_ref; only entries recorded after it are returned.
+        limit: Maximum number of entries (newest first).
+        log: Name of the episodic log.
+        query: Free text; entries are ranked by similarity to it (most similar
+            first, with a `score`) instead of by recency.
+    """
+    episodic_log = EPISODIC_CELL_ENGINE.log(model.log)
+    if model.query is not None and not episodic_log.similarity_enabled:
+        return {
+            "error": {
+                "type": "unavailable",
+                "message": "Similarity recall is unavailable. "
+                "Install it with: pip install 'context-engineering-mcp[vector]'",
+            }
+        }
+    entries = episodic_log.recall(
+        tags=model.tags,
+        keywords=[model.keywords] if model.keywords else [],
+        min_importance=model.min_importance,
+        episode_id=model.episode_id,
+        after=model.after,
+        limit=model.limit,
+        query=model.query,
+    )
+    return {"entries": entries, "count": len(entries)}
+
+
+@model_tool(EpisodicTarget)
+def cell_episodic_checkpoint(model: EpisodicTarget) -> dict:
+    """Flush an episodic log to disk and return a durable checkpoint_ref.
+
+    Args:
+        log: Name of the episodic log.
+    """
+    episodic_log = EPISODIC_CELL_ENGINE.log(model.log)
+    return {
+        "checkpoint_ref": episodic_log.checkpoint(),
+        "entries": len(episodic_log),
+        "skipped_lines": episodic_log.skipped_lines,
+    }
+
+
+def register_episodic_cell(mcp: FastMCP) -> None:
+    """Register the episodic cell engine tools on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    for tool in (cell_episodic_record, cell_episodic_recall, cell_episodic_checkpoint):
+        mcp.tool()(tool)
+
+
+__all__ = [
+    "EMBEDDINGS_ENV",
+    "EPISODIC_CELL_ENGINE",
+    "IMPORTANCE_LEVELS",
+    "MMAP_ENV",
+    "EpisodicCellEngine",
+    "EpisodicLog",
+    "cell_episodic_checkpoint",
+    "cell_episodic_recall",
+    "cell_episodic_record",
+    "extract_keywords",
+    "register_episodic_cell",
+]
@@ -0,0 +1,783 @@
+"""Server-side execution of prompt programs (Module 07).
+
+Prompt programs in the template catalog are JavaScript-like pseudo-code:
+prompt-builder functions returning template strings, and a main function
+chaining ``LLM(builder(...))`` calls. Handed to a client, every ``LLM``
+call costs the client a turn. `run_prompt_program` runs the program here
+instead, against a `CompletionBackend`, and returns its final output.
+
+A program is compiled once from its catalog body into a `ProgramSource`:
+the prompt builders, the main function's parameters (with defaults) and
+its return object. Straight-line mains (``x = LLM(f(a, b));``) become a
+plan directly; mains with loops use a planner registered in `PLANNERS`
+that unrolls them for the given arguments (e.g. one step per debate
+perspective).
+
+A plan is a DAG of `Step`s (one completion each) and `Collect` nodes
+(assembling earlier results into a list or object). `ProgramRunner`
+starts each node as soon as its inputs are ready, with at most
+`max_concurrency` completions in flight, and memoizes completions by
+backend and prompt, so repeated runs and shared sub-steps cost nothing.
+
+Steps belong to phases (a debate's perspectives, each of its rounds).
+With a `phase_timeout`, a phase's steps must finish within that many
+seconds of the phase starting; a step that times out or fails is
+recorded in the run's `failures`, steps needing its result are skipped,
+and `Collect` nodes assemble whatever arrived, so a slow perspective
+costs its own contribution rather than the whole run.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.core.backends import (
+    BackendError,
+    CompletionBackend,
+    backend_from_env,
+)
+from context_engineering_mcp.core.catalog import get_catalog
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel, span
+
+DEFAULT_CACHE_SIZE: Final[int] = 1024
+DEFAULT_CONCURRENCY: Final[int] = 4
+
+_BUILDER = re.compile(
+    r"function (\w+)\(([^)]*)\)\s*\{\s*return\s*`(.*?)`;\s*\}", re.DOTALL
+)
+_FUNCTION = re.compile(r"^function (\w+)\(((?:[^()]|\([^()]*\))*)\)\s*\{", re.MULTILINE)
+_CALL = re.compile(r"^\s*(\w+) = LLM\((\w+)\(([^)]*)\)\);", re.MULTILINE)
+_RETURN = re.compile(r"\breturn\s*\{(.*?)\};", re.DOTALL)
+_OUTPUT = re.compile(r"^\s*(\w+):\s*([\w.]+)\s*,?\s*$", re.MULTILINE)
+_PLACEHOLDER = re.compile(r"\$\{([^}]*)\}")
+_JOIN = re.compile(r"""^(\w+)\.join\((['"])(.*)\2\)$""")
+
+_REQUIRED: Final = object()
+
+
+class ProgramError(ValueError):
+    """A program that cannot be compiled, planned or bound to its arguments."""
+
+
+def _split_arguments(text: str) -> list[str]:
+    """Split a parameter list on top-level commas."""
+    parts: list[str] = []
+    current: list[str] = []
+    depth, quote = 0, ""
+    for char in text:
+        if quote:
+            quote = "" if char == quote else quote
+        elif char in "\"'":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def format_value(value: Any) -> str:
+    """Render a value for interpolation into a prompt."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return ", ".join(value)
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+@dataclass(frozen=True)
+class PromptBuilder:
+    """A prompt-builder function: parameters and a ``${...}`` template."""
+
+    name: str
+    params: tuple[str, ...]
+    text: str
+
+    def render(self, args: Sequence[Any]) -> str:
+        if len(args) != len(self.params):
+            raise ProgramError(
+                f"{self.name}() takes {len(self.params)} arguments, got {len(args)}"
+            )
+        values = dict(zip(self.params, args))
+
+        def substitute(match: re.Match[str]) -> str:
+            expression = match.group(1).strip()
+            if expression in values:
+                return format_value(values[expression])
+            join = _JOIN.match(expression)
+            if join and join.group(1) in values:
+                return join.group(3).join(map(format_value, values[join.group(1)]))
+            raise ProgramError(f"{self.name}(): cannot evaluate ${{{expression}}}")
+
+        return _PLACEHOLDER.sub(substitute, self.text)
+
+
+@dataclass(frozen=True)
+class Step:
+    """One completion: `builder` applied to `args` (names of values).
+
+    `constants` binds names local to this step, such as the perspective a
+    debate step argues for.
+    """
+
+    name: str
+    builder: str
+    args: tuple[str, ...]
+    constants: Mapping[str, Any] = field(default_factory=dict)
+    phase: str = ""
+
+    @property
+    def inputs(self) -> tuple[str, ...]:
+        return tuple(arg for arg in self.args if arg not in self.constants)
+
+
+@dataclass(frozen=True)
+class Collect:
+    """Assemble earlier values into a list (`keys` None) or an object.
+
+    Inputs that failed are left out; with fewer than `min_items` left the
+    collection itself fails.
+    """
+
+    name: str
+    refs: tuple[str, ...]
+    keys: tuple[str, ...] | None = None
+    min_items: int = 0
+
+    @property
+    def inputs(self) -> tuple[str, ...]:
+        return self.refs
+
+
+Node = Step | Collect
+
+
+@dataclass(frozen=True)
+class Program:
+    """A planned program: bound arguments, a node DAG and output references."""
+
+    name: str
+    arguments: Mapping[str, Any]
+    builders: Mapping[str, PromptBuilder]
+    nodes: tuple[Node, ...]
+    outputs: Mapping[str, str]
+
+    def __post_init__(self) -> None:
+        known = set(self.arguments)
+        for node in self.nodes:
+            if node.name in known:
+                raise ProgramError(f"{self.name}: '{node.name}' is defined twice")
+            missing = [ref for ref in node.inputs if ref not in known]
+            if missing:
+                # Nodes are listed in dependency order, so this is either an
+                # unknown name or a cycle.
+                raise ProgramError(
+                    f"{self.name}: '{node.name}' needs undefined {', '.join(missing)}"
+                )
+            if isinstance(node, Step) and node.builder not in self.builders:
+                raise ProgramError(f"{self.name}: unknown prompt '{node.builder}'")
+            known.add(node.name)
+        for key, ref in self.outputs.items():
+            if ref.split(".")[0] not in known:
+                raise ProgramError(f"{self.name}: output '{key}' refers to '{ref}'")
+
+    @property
+    def steps(self) -> int:
+        return sum(isinstance(node, Step) for node in self.nodes)
+
+
+@dataclass(frozen=True)
+class ProgramSource:
+    """A compiled program body, planned anew for each set of arguments."""
+
+    name: str
+    main: str
+    parameters: Mapping[str, Any]
+    builders: Mapping[str, PromptBuilder]
+    calls: tuple[Step, ...]
+    outputs: Mapping[str, str]
+    loops: bool
+
+    def bind(self, arguments: Mapping[str, Any]) -> dict[str, Any]:
+        """Merge `arguments` over the parameter defaults."""
+        unknown = set(arguments) - set(self.parameters)
+        if unknown:
+            raise ProgramError(
+                f"{self.name}: unknown arguments {', '.join(sorted(unknown))}; "
+                f"parameters are {', '.join(self.parameters)}"
+            )
+        bound = {**self.parameters, **arguments}
+        missing = [name for name, value in bound.items() if value is _REQUIRED]
+        if missing:
+            raise ProgramError(f"{self.name}: missing arguments {', '.join(missing)}")
+        return bound
+
+    def plan(self, arguments: Mapping[str, Any]) -> Program:
+        """Return the program's DAG for `arguments`."""
+        bound = self.bind(arguments)
+        planner = PLANNERS.get(self.name)
+        if planner is not None:
+            return planner(self, bound)
+        if self.loops:
+            raise ProgramError(f"{self.name}: loops need a planner in PLANNERS")
+        return Program(self.name, bound, self.builders, self.calls, self.outputs)
+
+
+def compile_program(name: str, body: str) -> ProgramSource:
+    """Compile a catalog program body into a `ProgramSource`."""
+    if "{{" in body:  # bodies kept in str.format escaping
+        body = body.replace("{{", "{").replace("}}", "}")
+    builders = {
+        match.group(1): PromptBuilder(
+            match.group(1),
+            tuple(_split_arguments(match.group(2))),
+            match.group(3),
+        )
+        for match in _BUILDER.finditer(body)
+    }
+    headers = list(_FUNCTION.finditer(body))
+    functions = [
+        (header, body[header.end() : following.start() if following else None])
+        for header, following in zip(headers, [*headers[1:], None])
+    ]
+    main, code = next(
+        (
+            (header, code)
+            for header, code in reversed(functions)
+            if header.group(1) not in builders and "LLM(" in code
+        ),
+        (None, ""),
+    )
+    if main is None:
+        raise ProgramError(f"{name}: no main function calling LLM()")
+    parameters: dict[str, Any] = {}
+    for declaration in _split_arguments(main.group(2)):
+        param, _, default = (part.strip() for part in declaration.partition("="))
+        try:
+            parameters[param] = json.loads(default) if default else _REQUIRED
+        except json.JSONDecodeError as e:
+            raise ProgramError(f"{name}: cannot parse default of {param}") from e
+    calls = tuple(
+        Step(target, builder, tuple(_split_arguments(args)))
+        for target, builder, args in _CALL.findall(code)
+    )
+    returned = _RETURN.search(code)
+    outputs = dict(_OUTPUT.findall(returned.group(1))) if returned else {}
+    return ProgramSource(
+        name=name,
+        main=main.group(1),
+        parameters=parameters,
+        builders=builders,
+        calls=calls,
+        outputs=outputs,
+        loops=re.search(r"\bfor\s*\(", code) is not None,
+    )
+
+
+# Per-perspective turn of a debate round, adapted from the program's
+# whole-round `conduct_debate_round` prompt so perspectives argue in parallel.
+REBUTTAL_PROMPT: Final[PromptBuilder] = PromptBuilder(
+    "rebut_in_round",
+    ("question", "perspective_name", "perspectives_data", "round_number"),
+    """
+    Task: Argue round ${round_number} of the debate as the ${perspective_name} perspective.
+    Question: ${question}
+    Debate So Far: ${perspectives_data}
+
+    As the ${perspective_name} perspective, please:
+    1. Respond to the strongest counterargument from other perspectives
+    2. Refine or strengthen your position based on the discussion
+    3. Find areas of agreement or common ground where applicable
+    4. Raise new considerations not yet addressed
+  """,
+)
+
+
+def plan_debate(source: ProgramSource, arguments: Mapping[str, Any]) -> Program:
+    """Unroll the debate program into parallel perspective and rebuttal steps.
+
+    The framing comes first; then every perspective is generated at once;
+    in each round every perspective rebuts the debate so far at once; the
+    synthesis comes last. Four perspectives and two rounds take five
+    waves of completions instead of a serial chain.
+    """
+    perspectives = arguments["perspectives"]
+    rounds = arguments["rounds"]
+    if not isinstance(perspectives, list) or not perspectives:
+        raise ProgramError("debate: perspectives must be a non-empty list")
+    if not isinstance(rounds, int) or not 0 <= rounds <= 10:
+        raise ProgramError("debate: rounds must be an integer from 0 to 10")
+    names = tuple(dict.fromkeys(str(p) for p in perspectives))
+    nodes: list[Node] = [
+        Step(
+            "framing",
+            "frame_debate_question",
+            ("question", "perspectives"),
+            phase="framing",
+        )
+    ]
+    nodes += [
+        Step(
+            f"perspective.{p}",
+            "generate_perspective",
+            ("question", "perspective", "framing"),
+            {"perspective": p},
+            phase="perspectives",
+        )
+        for p in names
+    ]
+    nodes.append(
+        Collect(
+            "initial_perspectives",
+            tuple(f"perspective.{p}" for p in names),
+            names,
+            min_items=1,
+        )
+    )
+    history = ["initial_perspectives"]
+    for number in range(1, rounds + 1):
+        so_far = f"debate_history.{number - 1}"
+        nodes.append(Collect(so_far, tuple(history), min_items=1))
+        nodes += [
+            Step(
+                f"round.{number}.{p}",
+                REBUTTAL_PROMPT.name,
+                ("question", "perspective", so_far, "round"),
+                {"perspective": p, "round": number},
+                phase=f"round.{number}",
+            )
+            for p in names
+        ]
+        nodes.append(
+            Collect(
+                f"round.{number}",
+                tuple(f"round.{number}.{p}" for p in names),
+                names,
+                min_items=1,
+            )
+        )
+        history.append(f"round.{number}")
+    nodes.append(Collect("debate_history", tuple(history), min_items=1))
+    nodes.append(
+        Step(
+            "synthesis",
+            "synthesize_debate",
+            ("question", "initial_perspectives", "debate_history"),
+            phase="synthesis",
+        )
+    )
+    builders = {**source.builders, REBUTTAL_PROMPT.name: REBUTTAL_PROMPT}
+    return Program(source.name, arguments, builders, tuple(nodes), source.outputs)
+
+
+# Planners for programs whose main function loops, keyed by program name.
+PLANNERS: dict[str, Callable[[ProgramSource, Mapping[str, Any]], Program]] = {
+    "debate": plan_debate,
+}
+
+
+class StepCache:
+    """LRU memo of completions keyed by backend and prompt.
+
+    Concurrent requests for the same prompt share one completion.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._pending: dict[str, asyncio.Future[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(backend: CompletionBackend, prompt: str) -> str:
+        return hashlib.sha256(f"{backend.name}\0{prompt}".encode()).hexdigest()
+
+    async def complete(
+        self,
+        backend: CompletionBackend,
+        prompt: str,
+        max_tokens: int | None = None,
+    ) -> tuple[str, bool]:
+        """Return ``(completion, cached)`` for `prompt`."""
+        key = self.key(backend, prompt)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+            pending = self._pending.get(key)
+            if pending is None or pending.get_loop() is not asyncio.get_running_loop():
+                pending = None
+                self.misses += 1
+                future = asyncio.get_running_loop().create_future()
+                self._pending[key] = future
+            else:
+                self.hits += 1
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending), True
+            except asyncio.CancelledError:
+                if pending.cancelled():  # the owner timed out, not this waiter
+                    raise BackendError("shared completion was cancelled") from None
+                raise
+        try:
+            text = await backend.complete(prompt, max_tokens=max_tokens)
+        except BaseException as e:
+            with self._lock:
+                if self._pending.get(key) is future:
+                    del self._pending[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # retrieved: waiters re-raise it themselves
+            raise
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if self.maxsize:
+                self._entries[key] = text
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        future.set_result(text)
+        return text, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+@dataclass
+class ProgramRun:
+    """The outcome of running a program."""
+
+    program: str
+    backend: str
+    output: dict[str, Any]
+    steps: list[dict[str, Any]]
+    elapsed_ms: float
+    failures: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failures)
+
+    @property
+    def llm_calls(self) -> int:
+        return sum(1 for step in self.steps if not step["cached"])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "program": self.program,
+            "backend": self.backend,
+            "output": self.output,
+            "steps": self.steps,
+            "llm_calls": self.llm_calls,
+            "cached_steps": len(self.steps) - self.llm_calls,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "partial": self.partial,
+            "failures": self.failures,
+        }
+
+
+class ProgramRunner:
+    """Runs planned programs against a backend, memoizing completions.
+
+    Args:
+        backend: Completion backend.
+        cache: Step memo (shared between runs); a new one by default.
+        max_concurrency: Completions in flight at once per run.
+        max_tokens: Completion limit passed to the backend.
+        phase_timeout: Default seconds each phase may take (None: no limit).
+    """
+
+    def __init__(
+        self,
+        backend: CompletionBackend,
+        cache: StepCache | None = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        max_tokens: int | None = None,
+        phase_timeout: float | None = None,
+    ) -> None:
+        self.backend = backend
+        self.cache = cache if cache is not None else StepCache()
+        self.max_concurrency = max_concurrency
+        self.max_tokens = max_tokens
+        self.phase_timeout = phase_timeout
+
+    async def _complete(
+        self, limit: asyncio.Semaphore, prompt: str
+    ) -> tuple[str, bool]:
+        async with limit:
+            return await self.cache.complete(self.backend, prompt, self.max_tokens)
+
+    async def run(
+        self,
+        program: Program,
+        max_concurrency: int | None = None,
+        phase_timeout: float | None = None,
+    ) -> ProgramRun:
+        """Run every node of `program` as soon as its inputs are ready.
+
+        Args:
+            program: Planned program.
+            max_concurrency: Overrides the runner's concurrency bound.
+            phase_timeout: Overrides the runner's per-phase time limit.
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        timeout = phase_timeout if phase_timeout is not None else self.phase_timeout
+        deadlines: dict[str, float] = {}
+        values: dict[str, Any] = dict(program.arguments)
+        tasks: dict[str, asyncio.Task[None]] = {}
+        trace: list[dict[str, Any]] = []
+        failures: list[dict[str, Any]] = []
+
+        def fail(node: Node, phase: str, error: str) -> None:
+            failures.append({"step": node.name, "phase": phase, "error": error})
+
+        async def run_node(node: Node) -> None:
+            await asyncio.gather(*(tasks[ref] for ref in node.inputs if ref in tasks))
+            if isinstance(node, Collect):
+                keys = node.keys if node.keys is not None else node.refs
+                present = [(k, ref) for k, ref in zip(keys, node.refs) if ref in values]
+                if len(present) < node.min_items:
+                    fail(node, "", f"{len(present)} of {len(node.refs)} inputs")
+                elif node.keys is None:
+                    values[node.name] = [values[ref] for _, ref in present]
+                else:
+                    values[node.name] = {k: values[ref] for k, ref in present}
+                return
+            phase = node.phase or node.name
+            missing = [ref for ref in node.inputs if ref not in values]
+            if missing:
+                fail(node, phase, f"skipped: missing {', '.join(missing)}")
+                return
+            scope = {**values, **node.constants}
+            prompt = program.builders[node.builder].render(
+                [scope[arg] for arg in node.args]
+            )
+            remaining = None
+            if timeout is not None:
+                # A phase's clock starts when its first step is ready to run.
+                deadline = deadlines.setdefault(phase, loop.time() + timeout)
+                remaining = max(0.0, deadline - loop.time())
+            step_started = time.perf_counter()
+            with span("program.step", program=program.name, step=node.name) as s:
+                try:
+                    text, cached = await asyncio.wait_for(
+                        self._complete(limit, prompt), remaining
+                    )
+                except asyncio.TimeoutError:
+                    s.set("outcome", "timeout")
+                    fail(node, phase, f"timed out after {timeout:g}s phase limit")
+                    return
+                except Exception as e:  # noqa: BLE001 - one step, not the run
+                    s.set("outcome", "error")
+                    fail(node, phase, f"{type(e).__name__}: {e}")
+                    return
+                s.set("cached", cached)
+            trace.append(
+                {
+                    "step": node.name,
+                    "phase": phase,
+                    "cached": cached,
+                    "ms": round((time.perf_counter() - step_started) * 1000, 2),
+                    "prompt_tokens": estimate_tokens(prompt),
+                    "output_tokens": estimate_tokens(text),
+                }
+            )
+            values[node.name] = text
+
+        with span("program.run", program=program.name, steps=program.steps):
+            for node in program.nodes:
+                tasks[node.name] = asyncio.ensure_future(run_node(node))
+            try:
+                await asyncio.gather(*tasks.values())
+            except BaseException:
+                for task in tasks.values():
+                    task.cancel()
+                raise
+        output = {
+            key: _output_value(values, ref) for key, ref in program.outputs.items()
+        }
+        return ProgramRun(
+            program=program.name,
+            backend=self.backend.name,
+            output=output,
+            steps=trace,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            failures=failures,
+        )
+
+
+def _output_value(values: Mapping[str, Any], ref: str) -> Any:
+    name, _, attribute = ref.partition(".")
+    if name not in values:
+        return None  # its step failed; see the run's failures
+    value = values[name]
+    if attribute == "length":
+        return len(value)
+    if attribute:
+        raise ProgramError(f"unsupported output expression '{ref}'")
+    return value
+
+
+_sources: dict[tuple[str, int], ProgramSource] = {}
+_runner: ProgramRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def load_program(name: str) -> ProgramSource:
+    """Compile the catalog program `name` resolves to (cached per catalog reload)."""
+    catalog = get_catalog()
+    resolution = catalog.lookup("program", name)
+    if resolution.name is None:
+        hint = (
+            f" Did you mean: {', '.join(resolution.suggestions)}?"
+            if resolution.suggestions
+            else ""
+        )
+        available = ", ".join(catalog.names("program"))
+        raise ProgramError(f"Unknown program '{name}'.{hint} Available: {available}")
+    key = (resolution.name, catalog.generation)
+    source = _sources.get(key)
+    if source is None:
+        body = catalog.source("program", resolution.name)
+        source = _sources[key] = compile_program(resolution.name, body)
+    return source
+
+
+def get_program_runner() -> ProgramRunner:
+    """Return the process-wide runner, using the backend from the environment."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = ProgramRunner(backend_from_env())
+    return _runner
+
+
+def set_program_runner(runner: ProgramRunner | None) -> None:
+    """Replace the process-wide runner (None rebuilds it from the environment)."""
+    global _runner
+    with _runner_lock:
+        _runner = runner
+
+
+# --- Input Models ---
+
+
+class RunProgramInput(TracedModel):
+    program_type: str = Field(
+        "math", min_length=1, description="Program to run (e.g. 'math', 'debate')."
+    )
+    arguments: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Arguments of the program's main function (e.g. {'problem': ...}).",
+    )
+    max_concurrency: int = Field(
+        DEFAULT_CONCURRENCY, ge=1, le=16, description="Completions in flight at once."
+    )
+    phase_timeout: float | None = Field(
+        None,
+        gt=0,
+        le=600,
+        description="Seconds each phase may take; late steps are dropped.",
+    )
+
+
+# --- Tools ---
+
+
+@model_tool(RunProgramInput)
+def run_prompt_program(model: RunProgramInput) -> dict:
+    """Run a prompt program server-side and return its final output.
+
+    Every LLM step of the program runs against the configured completion
+    backend (`SUTRA_LLM_URL`, or a deterministic stub when unset), with
+    independent steps in parallel and completions memoized. One call
+    replaces a client turn per step. Debate perspectives, and each round's
+    rebuttals, are generated concurrently.
+
+    Args:
+        program_type: Program to run ('math', 'debate').
+        arguments: Main-function arguments, e.g. {"problem": "..."} for math or
+            {"question": "...", "perspectives": [...], "rounds": 2} for debate.
+        max_concurrency: Maximum completions in flight at once.
+        phase_timeout: Seconds each phase may take. Steps still running are
+            dropped, listed under "failures", and the run continues with
+            the results that arrived ("partial": true).
+    """
+    try:
+        program = load_program(model.program_type).plan(model.arguments)
+    except ProgramError as e:
+        return {"error": {"type": "program_error", "message": str(e)}}
+    run = asyncio.run(
+        get_program_runner().run(program, model.max_concurrency, model.phase_timeout)
+    )
+    return run.to_dict()
+
+
+def register_program_runtime(mcp: FastMCP) -> None:
+    """Register the prompt-program runtime tool on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    mcp.tool()(run_prompt_program)
+
+
+__all__ = [
+    "PLANNERS",
+    "REBUTTAL_PROMPT",
+    "Collect",
+    "Program",
+    "ProgramError",
+    "ProgramRun",
+    "ProgramRunner",
+    "ProgramSource",
+    "PromptBuilder",
+    "Step",
+    "StepCache",
+    "compile_program",
+    "format_value",
+    "get_program_runner",
+    "load_program",
+    "plan_debate",
+    "register_program_runtime",
+    "run_prompt_program",
+    "set_program_runner",
+]
@@ -0,0 +1,346 @@
+"""Layer 2: Key-value cell engine.
+
+Server-side implementation of `cell.protocol.key_value`. State lives in
+named per-session stores held in memory (optionally written through to
+SQLite), so callers exchange only the operation, its delta and a compact
+version number instead of echoing the whole state map through the model.
+At most `max_stores` stores stay in memory; the least recently used is
+dropped beyond that and, with SQLite, reloaded on its next use.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Final
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel
+
+KV_DB_ENV: Final[str] = "SUTRA_KV_DB"
+DEFAULT_MAX_STORES: Final[int] = 1024
+
+_MISSING: Final = object()
+
+
+class KeyValueStore:
+    """A single named store: a hash map plus a monotonically increasing version."""
+
+    __slots__ = ("data", "version")
+
+    def __init__(self, data: dict[str, Any] | None = None, version: int = 0) -> None:
+        self.data: dict[str, Any] = data or {}
+        self.version = version
+
+
+class KeyValueCellEngine:
+    """Named per-session key-value stores with optional SQLite persistence.
+
+    Args:
+        db_path: SQLite database file to write through to. When omitted the
+            engine is purely in-memory.
+        max_stores: Stores kept in memory. Without a database, evicting a
+            store discards its contents.
+    """
+
+    def __init__(
+        self, db_path: str | None = None, max_stores: int = DEFAULT_MAX_STORES
+    ) -> None:
+        if max_stores < 1:
+            raise ValueError("max_stores must be >= 1")
+        self.max_stores = max_stores
+        self._stores: OrderedDict[tuple[str, str], KeyValueStore] = OrderedDict()
+        self._lock = threading.RLock()
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS kv_entries (
+                    session TEXT NOT NULL,
+                    store TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (session, store, key)
+                );
+                CREATE TABLE IF NOT EXISTS kv_versions (
+                    session TEXT NOT NULL,
+                    store TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    PRIMARY KEY (session, store)
+                );
+                """
+            )
+
+    @classmethod
+    def from_env(cls) -> "KeyValueCellEngine":
+        """Create an engine persisting to `$SUTRA_KV_DB` when it is set."""
+        return cls(os.getenv(KV_DB_ENV) or None)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # --- Internal helpers ---
+
+    def _store(self, session: str, store: str) -> KeyValueStore:
+        ident = (session, store)
+        cached = self._stores.get(ident)
+        if cached is not None:
+            self._stores.move_to_end(ident)
+            return cached
+
+        loaded = KeyValueStore()
+        if self._db is not None:
+            rows = self._db.execute(
+                "SELECT key, value FROM kv_entries WHERE session = ? AND store = ?",
+                ident,
+            )
+            loaded.data = {key: json.loads(value) for key, value in rows}
+            row = self._db.execute(
+                "SELECT version FROM kv_versions WHERE session = ? AND store = ?",
+                ident,
+            ).fetchone()
+            loaded.version = row[0] if row else 0
+        self._stores[ident] = loaded
+        while len(self._stores) > self.max_stores:
+            self._stores.popitem(last=False)
+        return loaded
+
+    def _persist(
+        self, session: str, store: str, key: str, value: Any, version: int
+    ) -> None:
+        if self._db is None:
+            return
+        with self._db:
+            if value is _MISSING:
+                self._db.execute(
+                    "DELETE FROM kv_entries WHERE session = ? AND store = ? AND key = ?",
+                    (session, store, key),
+                )
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO kv_entries VALUES (?, ?, ?, ?)",
+                    (session, store, key, json.dumps(value)),
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO kv_versions VALUES (?, ?, ?)",
+                (session, store, version),
+            )
+
+    def _write(
+        self, session: str, store: str, state: KeyValueStore, key: str, value: Any
+    ) -> int:
+        if value is _MISSING:
+            state.data.pop(key, None)
+        else:
+            state.data[key] = value
+        state.version += 1
+        self._persist(session, store, key, value, state.version)
+        return state.version
+
+    # --- Operations ---
+
+    def get(self, session: str, store: str, key: str | None = None) -> dict[str, Any]:
+        """Read one key, or the whole store when `key` is omitted."""
+        with self._lock:
+            state = self._store(session, store)
+            if key is None:
+                return {"state": dict(state.data), "version": state.version}
+            value = state.data.get(key, _MISSING)
+            return {
+                "key": key,
+                "found": value is not _MISSING,
+                "value": None if value is _MISSING else value,
+                "version": state.version,
+            }
+
+    def set(self, session: str, store: str, key: str, value: Any) -> dict[str, Any]:
+        """Set `key` to `value` and return the delta."""
+        with self._lock:
+            state = self._store(session, store)
+            previous = state.data.get(key)
+            version = self._write(session, store, state, key, value)
+            return {
+                "delta": {
+                    "op": "set",
+                    "key": key,
+                    "value": value,
+                    "previous": previous,
+                },
+                "version": version,
+            }
+
+    def delete(self, session: str, store: str, key: str) -> dict[str, Any]:
+        """Delete `key`; the version only advances when the key existed."""
+        with self._lock:
+            state = self._store(session, store)
+            if key not in state.data:
+                return {"delta": None, "version": state.version}
+            previous = state.data[key]
+            version = self._write(session, store, state, key, _MISSING)
+            return {
+                "delta": {"op": "delete", "key": key, "previous": previous},
+                "version": version,
+            }
+
+    def cas(
+        self, session: str, store: str, key: str, expected: Any, value: Any
+    ) -> dict[str, Any]:
+        """Compare-and-swap: set `key` only if its current value equals `expected`.
+
+        An `expected` of None means the key must be absent.
+        """
+        with self._lock:
+            state = self._store(session, store)
+            current = state.data.get(key, _MISSING)
+            if expected is None:
+                matches = current is _MISSING
+            else:
+                matches = current is not _MISSING and current == expected
+            if not matches:
+                return {
+                    "swapped": False,
+                    "current": None if current is _MISSING else current,
+                    "delta": None,
+                    "version": state.version,
+                }
+            version = self._write(session, store, state, key, value)
+            return {
+                "swapped": True,
+                "delta": {
+                    "op": "cas",
+                    "key": key,
+                    "value": value,
+                    "previous": None if current is _MISSING else current,
+                },
+                "version": version,
+            }
+
+
+_engine: KeyValueCellEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_key_value_engine() -> KeyValueCellEngine:
+    """Return the process-wide key-value engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = KeyValueCellEngine.from_env()
+        return _engine
+
+
+# --- Input Models ---
+
+
+class KeyValueTarget(TracedModel):
+    session: str = Field("default", min_length=1, description="Session identifier.")
+    store: str = Field("default", min_length=1, description="Store name.")
+
+
+class KeyValueGetInput(KeyValueTarget):
+    key: str | None = Field(None, min_length=1, description="Key to read.")
+
+
+class KeyValueSetInput(KeyValueTarget):
+    key: str = Field(..., min_length=1, description="Key to write.")
+    value: Any = Field(..., description="JSON value to store.")
+
+
+class KeyValueDeleteInput(KeyValueTarget):
+    key: str = Field(..., min_length=1, description="Key to delete.")
+
+
+class KeyValueCasInput(KeyValueTarget):
+    key: str = Field(..., min_length=1, description="Key to swap.")
+    expected: Any = Field(None, description="Value the key must currently hold.")
+    value: Any = Field(..., description="Replacement JSON value.")
+
+
+# --- Tools ---
+
+
+@model_tool(KeyValueGetInput)
+def cell_kv_get(model: KeyValueGetInput) -> dict:
+    """Read a key (or the whole store if no key is given) from a key-value cell.
+
+    Args:
+        key: Key to read. Omit to fetch the full state map.
+        store: Store name within the session.
+        session: Session identifier.
+    """
+    return get_key_value_engine().get(model.session, model.store, model.key)
+
+
+@model_tool(KeyValueSetInput)
+def cell_kv_set(model: KeyValueSetInput) -> dict:
+    """Set a key in a key-value cell and return only the delta and new version.
+
+    Args:
+        key: Key to write.
+        value: JSON value to store.
+        store: Store name within the session.
+        session: Session identifier.
+    """
+    return get_key_value_engine().set(
+        model.session, model.store, model.key, model.value
+    )
+
+
+@model_tool(KeyValueDeleteInput)
+def cell_kv_delete(model: KeyValueDeleteInput) -> dict:
+    """Delete a key from a key-value cell and return the delta and new version.
+
+    Args:
+        key: Key to delete.
+        store: Store name within the session.
+        session: Session identifier.
+    """
+    return get_key_value_engine().delete(model.session, model.store, model.key)
+
+
+@model_tool(KeyValueCasInput)
+def cell_kv_cas(model: KeyValueCasInput) -> dict:
+    """Compare-and-swap a key in a key-value cell.
+
+    Args:
+        key: Key to swap.
+        value: Replacement JSON value.
+        expected: Value the key must currently hold (None means absent).
+        store: Store name within the session.
+        session: Session identifier.
+    """
+    return get_key_value_engine().cas(
+        model.session, model.store, model.key, model.expected, model.value
+    )
+
+
+def register_key_value_cell(mcp: FastMCP) -> None:
+    """Register the key-value cell engine tools on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    for tool in (cell_kv_get, cell_kv_set, cell_kv_delete, cell_kv_cas):
+        mcp.tool()(tool)
+
+
+__all__ = [
+    "DEFAULT_MAX_STORES",
+    "KV_DB_ENV",
+    "KeyValueCellEngine",
+    "KeyValueStore",
+    "cell_kv_cas",
+    "cell_kv_delete",
+    "cell_kv_get",
+    "cell_kv_set",
+    "get_key_value_engine",
+    "register_key_value_cell",
+]
@@ -0,0 +1,191 @@
+"""Multi-pattern keyword matching.
+
+`KeywordIndex` compiles a table of rules (rule id -> keywords or short
+phrases) into a single regular expression. Matching scans the text once,
+respects word boundaries ("bot" does not match "both"), folds common English
+inflections ("tests", "building", "verified"), and reports every matched rule
+with a score instead of stopping at the first hit.
+"""
+
+import re
+from collections.abc import Iterable, Iterator, Mapping
+from functools import lru_cache
+from typing import Final
+
+_TOKEN_RE: Final = re.compile(r"[a-z0-9]+")
+_TOKEN_CHARS: Final[frozenset[str]] = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+# (suffix, replacement) pairs tried when folding an inflected token.
+_SUFFIXES: Final[tuple[tuple[str, str], ...]] = (
+    ("ies", "y"),
+    ("ied", "y"),
+    ("ing", ""),
+    ("ing", "e"),
+    ("ers", ""),
+    ("er", ""),
+    ("es", ""),
+    ("ed", ""),
+    ("ed", "e"),
+    ("s", ""),
+    ("d", ""),
+)
+_MIN_STEM: Final[int] = 3
+
+
+@lru_cache(maxsize=8192)
+def word_forms(token: str) -> tuple[str, ...]:
+    """Return the token and its de-inflected candidate stems."""
+    forms = [token]
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            form = token[: -len(suffix)] + replacement
+            if form not in forms:
+                forms.append(form)
+    return tuple(forms)
+
+
+def _inflections(stem: str) -> set[str]:
+    """Return every token whose `word_forms` include the stem."""
+    forms = {stem}
+    for suffix, replacement in _SUFFIXES:
+        if stem.endswith(replacement):
+            base = stem[: len(stem) - len(replacement)]
+            if len(base) >= _MIN_STEM:
+                forms.add(base + suffix)
+    return forms
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Return a regex alternation of the words factored by common prefix.
+
+    A flat alternation is retried branch by branch at every position; the
+    factored form only descends into the branch of the character at hand.
+    """
+    trie: dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict[str, dict]) -> str:
+        branches = [
+            re.escape(char) + emit(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class KeywordMatch:
+    """A rule matched by `KeywordIndex.match`."""
+
+    __slots__ = ("keywords", "rule", "score")
+
+    def __init__(self, rule: str, score: int, keywords: tuple[str, ...]) -> None:
+        self.rule = rule
+        self.score = score
+        self.keywords = keywords
+
+    def to_dict(self) -> dict[str, object]:
+        return {"rule": self.rule, "score": self.score, "keywords": list(self.keywords)}
+
+    def __repr__(self) -> str:
+        return f"KeywordMatch(rule={self.rule!r}, score={self.score})"
+
+
+class KeywordIndex:
+    """Keyword rules compiled into one regular expression, matched in one pass.
+
+    Every inflected form of every keyword's head token is folded into a single
+    prefix-factored alternation bounded like `tokenize` tokens, so scanning a
+    text runs in the regex engine rather than a per-token Python loop. Only the
+    (few) hits are resolved in Python.
+
+    Args:
+        rules: Ordered mapping of rule id to its keywords. A keyword may be a
+            multi-word phrase such as "test driven".
+    """
+
+    def __init__(self, rules: Mapping[str, Iterable[str]]) -> None:
+        self.rules: tuple[str, ...] = tuple(rules)
+        # head token -> [(remaining phrase tokens, rule id, keyword)]
+        self._index: dict[str, list[tuple[tuple[str, ...], str, str]]] = {}
+        for rule, keywords in rules.items():
+            for keyword in keywords:
+                tokens = tuple(tokenize(keyword))
+                if not tokens:
+                    raise ValueError(f"Rule '{rule}' has an empty keyword.")
+                self._index.setdefault(tokens[0], []).append(
+                    (tokens[1:], rule, keyword)
+                )
+        # inflected form -> the head it folds to, resolved as `word_forms`
+        # orders candidates so a form that is itself a head keeps priority.
+        self._heads: dict[str, str] = {}
+        for head in self._index:
+            for form in _inflections(head):
+                self._heads[form] = next(
+                    f for f in word_forms(form) if f in self._index
+                )
+        # The start boundary is checked per hit: a leading lookbehind would stop
+        # the regex engine from skipping ahead to candidate first characters.
+        self._pattern: re.Pattern[str] | None = (
+            re.compile(rf"{_trie_pattern(self._heads)}(?![a-z0-9])")
+            if self._heads
+            else None
+        )
+
+    def _hits(self, text: str) -> Iterator[tuple[str, str]]:
+        if self._pattern is None:
+            return
+        for hit in self._pattern.finditer(text):
+            start = hit.start()
+            if start and text[start - 1] in _TOKEN_CHARS:
+                continue  # inside a longer word
+            for rest, rule, keyword in self._index[self._heads[hit.group()]]:
+                if rest and not self._phrase_at(text, hit.end(), rest):
+                    continue
+                yield rule, keyword
+
+    @staticmethod
+    def _phrase_at(text: str, start: int, rest: tuple[str, ...]) -> bool:
+        following = _TOKEN_RE.finditer(text, start)
+        for expected in rest:
+            token = next(following, None)
+            if token is None or expected not in word_forms(token.group()):
+                return False
+        return True
+
+    def match(self, text: str) -> list[KeywordMatch]:
+        """Return every rule with at least one keyword hit, in rule order.
+
+        Args:
+            text: Free text to scan.
+
+        Returns:
+            Matches carrying the number of keyword occurrences as the score and
+            the distinct keywords that fired.
+        """
+        scores: dict[str, int] = {}
+        matched: dict[str, dict[str, None]] = {}
+        for rule, keyword in self._hits(text.lower()):
+            scores[rule] = scores.get(rule, 0) + 1
+            matched.setdefault(rule, {})[keyword] = None
+        return [
+            KeywordMatch(rule, scores[rule], tuple(matched[rule]))
+            for rule in self.rules
+            if rule in scores
+        ]
+
+
+__all__ = ["KeywordIndex", "KeywordMatch", "tokenize", "word_forms"]
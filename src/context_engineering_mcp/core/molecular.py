@@ -0,0 +1,433 @@
+"""Server-side molecular context assembly (Layer 1).
+
+A molecule is ``[INSTRUCTION] + [EXAMPLES] + [NEW INPUT]``. Instead of
+sending every example of a bank, `build_molecular_context` picks the
+examples most similar to the new input that fit a token budget:
+
+- Similarity is IDF-weighted cosine over word forms (the router's
+  inflection folding, stopwords dropped), computed in one pass over the
+  bank. Each example's terms are cached, so a bank of thousands sent
+  again with the next call is scored in tens of milliseconds.
+- Examples are taken best first while their estimated tokens fit what is
+  left of the budget; a long example is skipped in favour of shorter ones.
+- The chosen examples are written least similar first, so the closest
+  example sits right before the new input.
+
+The prompt is assembled as a list of parts joined once, so its cost is
+linear in its length.
+"""
+
+import math
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Final, Literal
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field, model_validator
+
+from context_engineering_mcp.core.examples import (
+    DEFAULT_DIVERSITY,
+    EXAMPLE_STORES,
+    NUMPY_REQUIRED,
+    STORE_NAME_PATTERN,
+    ExampleStore,
+    MolecularExample,
+)
+from context_engineering_mcp.core.matching import tokenize, word_forms
+from context_engineering_mcp.core.search import STOPWORDS
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.core.vectors import numpy_available
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel, span
+
+MolecularFormat = Literal["input-output", "chain-of-thought"]
+
+FORMATS: Final[tuple[str, ...]] = ("input-output", "chain-of-thought")
+DEFAULT_TOKEN_BUDGET: Final[int] = 2000
+DEFAULT_MAX_EXAMPLES: Final[int] = 8
+MAX_BANK_SIZE: Final[int] = 20000
+FEATURE_CACHE_SIZE: Final[int] = 32768
+
+
+@lru_cache(maxsize=16384)
+def _forms(token: str) -> tuple[str, ...]:
+    return () if token in STOPWORDS else word_forms(token)
+
+
+# Banks are sent again with each call; their examples' terms are kept.
+@lru_cache(maxsize=FEATURE_CACHE_SIZE)
+def features(text: str) -> frozenset[str]:
+    """Return the terms of a text: every form of each non-stopword token."""
+    return frozenset(chain.from_iterable(map(_forms, tokenize(text))))
+
+
+def similarity_scores(texts: Sequence[str], query: str) -> list[float]:
+    """Score each text against `query` by IDF-weighted cosine similarity.
+
+    Terms are binary (present or not). Document frequencies are taken over
+    `texts` themselves, so terms that every example shares count for little.
+    """
+    bank = [features(text) for text in texts]
+    wanted = features(query)
+    if not bank or not wanted:
+        return [0.0] * len(bank)
+    frequency = Counter(chain.from_iterable(bank))
+    weight = {term: math.log(1 + len(bank) / n) ** 2 for term, n in frequency.items()}
+    query_norm = math.sqrt(sum(weight.get(term, 0.0) for term in wanted))
+    scores = [0.0] * len(bank)
+    for position, terms in enumerate(bank):
+        shared = wanted & terms
+        if shared:
+            dot = sum(weight[term] for term in shared)
+            norm = math.sqrt(sum(weight[term] for term in terms))
+            scores[position] = dot / (query_norm * norm)
+    return scores
+
+
+def format_example(example: Mapping[str, Any], format_type: str) -> str:
+    """Render one example in the molecule's format."""
+    if format_type == "chain-of-thought":
+        return (
+            f"Input: {example['input']}\n"
+            f"Thinking: {example['thinking']}\n"
+            f"Output: {example['output']}\n\n"
+        )
+    return f"Input: {example['input']}\nOutput: {example['output']}\n\n"
+
+
+def eligible(example: Mapping[str, Any], format_type: str) -> bool:
+    """Whether an example has every field the format needs."""
+    return format_type != "chain-of-thought" or bool(example.get("thinking"))
+
+
+@dataclass(frozen=True)
+class SelectedExample:
+    """An example placed in the molecule, with its bank position."""
+
+    index: int
+    score: float
+    tokens: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "index": self.index,
+            "score": round(self.score, 4),
+            "tokens": self.tokens,
+        }
+
+
+@dataclass
+class MolecularContext:
+    """An assembled molecule and how its examples were chosen."""
+
+    context: str
+    format_type: str
+    selected: list[SelectedExample]
+    tokens: int
+    token_budget: int
+    bank_size: int
+    skipped: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "context": self.context,
+            "format": self.format_type,
+            "examples": [example.to_dict() for example in self.selected],
+            "tokens": self.tokens,
+            "token_budget": self.token_budget,
+            "bank_size": self.bank_size,
+            "ineligible_examples": self.skipped,
+        }
+
+
+def assemble(
+    instruction: str,
+    examples: Iterable[Mapping[str, Any]],
+    new_input: str,
+    format_type: str = "input-output",
+) -> str:
+    """Join instruction, examples (in order) and the new input into a prompt."""
+    parts = [f"{instruction}\n\n"]
+    parts.extend(format_example(example, format_type) for example in examples)
+    parts.append(f"Input: {new_input}\nOutput:")
+    return "".join(parts)
+
+
+def select_within_budget(
+    examples: Sequence[Mapping[str, Any]],
+    ranked: Iterable[tuple[int, float]],
+    format_type: str,
+    budget: int,
+    max_examples: int,
+) -> list[SelectedExample]:
+    """Take ranked examples, best first, while they fit `budget` tokens.
+
+    Args:
+        examples: The bank (or candidates) the ranking indexes into.
+        ranked: ``(index, score)`` pairs, best first.
+        format_type: Molecule format, for eligibility and token cost.
+        budget: Tokens available for examples.
+        max_examples: Most examples to take.
+    """
+    chosen: list[SelectedExample] = []
+    remaining = budget
+    for index, score in ranked:
+        if len(chosen) >= max_examples or remaining <= 0:
+            break
+        example = examples[index]
+        if not eligible(example, format_type):
+            continue
+        cost = estimate_tokens(format_example(example, format_type))
+        if cost <= remaining:
+            chosen.append(SelectedExample(index, score, cost))
+            remaining -= cost
+    return chosen
+
+
+def compose(
+    instruction: str,
+    examples: Sequence[Mapping[str, Any]],
+    ranked: Iterable[tuple[int, float]],
+    new_input: str,
+    format_type: str,
+    token_budget: int,
+    max_examples: int,
+) -> tuple[str, list[SelectedExample]]:
+    """Assemble a molecule from ranked examples within the token budget.
+
+    Returns the prompt and the examples used, in prompt order: least
+    similar first, so the closest example ends up next to the input.
+    """
+    fixed = estimate_tokens(assemble(instruction, (), new_input, format_type))
+    selected = select_within_budget(
+        examples, ranked, format_type, token_budget - fixed, max_examples
+    )
+    selected.reverse()
+    context = assemble(
+        instruction, (examples[s.index] for s in selected), new_input, format_type
+    )
+    return context, selected
+
+
+def _check_format(format_type: str) -> None:
+    if format_type not in FORMATS:
+        raise ValueError(f"format_type must be one of {', '.join(FORMATS)}")
+
+
+def build_context(
+    instruction: str,
+    examples: Sequence[Mapping[str, Any]],
+    new_input: str,
+    format_type: str = "input-output",
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_examples: int = DEFAULT_MAX_EXAMPLES,
+) -> MolecularContext:
+    """Build a molecule from the examples most similar to `new_input`.
+
+    Args:
+        instruction: Task instruction placed first.
+        examples: Example bank: mappings with ``input`` and ``output`` (and
+            ``thinking`` for chain-of-thought).
+        new_input: The input to answer.
+        format_type: ``input-output`` or ``chain-of-thought``.
+        token_budget: Estimated tokens the whole prompt may use.
+        max_examples: Most examples to include.
+    """
+    _check_format(format_type)
+    with span("molecule.build", bank=len(examples), format=format_type):
+        skipped = sum(1 for example in examples if not eligible(example, format_type))
+        scores = similarity_scores([str(e["input"]) for e in examples], new_input)
+        ranked = sorted(enumerate(scores), key=lambda item: (-item[1], item[0]))
+        context, selected = compose(
+            instruction,
+            examples,
+            ranked,
+            new_input,
+            format_type,
+            token_budget,
+            max_examples,
+        )
+    return MolecularContext(
+        context=context,
+        format_type=format_type,
+        selected=selected,
+        tokens=estimate_tokens(context),
+        token_budget=token_budget,
+        bank_size=len(examples),
+        skipped=skipped,
+    )
+
+
+def build_from_store(
+    instruction: str,
+    store: ExampleStore,
+    new_input: str,
+    format_type: str = "input-output",
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_examples: int = DEFAULT_MAX_EXAMPLES,
+    diversity: float = DEFAULT_DIVERSITY,
+) -> MolecularContext:
+    """Build a molecule from a persistent example store.
+
+    Candidates come from the store's vectorized top-k with MMR re-ranking
+    (see `ExampleStore.select`); twice `max_examples` are fetched so the
+    budget can pass over long ones. Positions refer to the store.
+    """
+    _check_format(format_type)
+    cot = format_type == "chain-of-thought"
+    with span("molecule.build", bank=len(store), format=format_type):
+        ranked = store.select(new_input, 2 * max_examples, diversity, cot)
+        context, selected = compose(
+            instruction,
+            store.examples,
+            ranked,
+            new_input,
+            format_type,
+            token_budget,
+            max_examples,
+        )
+    return MolecularContext(
+        context=context,
+        format_type=format_type,
+        selected=selected,
+        tokens=estimate_tokens(context),
+        token_budget=token_budget,
+        bank_size=len(store),
+        skipped=store.count_without_thinking() if cot else 0,
+    )
+
+
+# --- Input Models ---
+
+
+class BuildMolecularContextInput(TracedModel):
+    instruction: str = Field(..., min_length=1, description="Task instruction.")
+    examples: list[MolecularExample] = Field(
+        default_factory=list,
+        max_length=MAX_BANK_SIZE,
+        description="Example bank to select from.",
+    )
+    store: str | None = Field(
+        None,
+        pattern=STORE_NAME_PATTERN,
+        max_length=64,
+        description="Example store to select from instead of `examples`.",
+    )
+    new_input: str = Field(..., description="The input the prompt should answer.")
+    format_type: MolecularFormat = Field(
+        "input-output", description="Example layout: input-output or chain-of-thought."
+    )
+    token_budget: int = Field(
+        DEFAULT_TOKEN_BUDGET,
+        ge=16,
+        le=200000,
+        description="Estimated tokens the whole prompt may use.",
+    )
+    max_examples: int = Field(
+        DEFAULT_MAX_EXAMPLES, ge=0, le=100, description="Most examples to include."
+    )
+    diversity: float = Field(
+        DEFAULT_DIVERSITY,
+        ge=0,
+        le=1,
+        description="With a store: weight of novelty against similarity (MMR).",
+    )
+
+    @model_validator(mode="after")
+    def _one_source(self) -> "BuildMolecularContextInput":
+        if self.store is not None and self.examples:
+            raise ValueError("pass either examples or store, not both")
+        return self
+
+
+# --- Tools ---
+
+
+@model_tool(BuildMolecularContextInput)
+def build_molecular_context(model: BuildMolecularContextInput) -> dict:
+    """Build a few-shot prompt from the examples most relevant to the input.
+
+    Ranks the example bank by similarity to `new_input` and includes the
+    best examples that fit `token_budget`, closest last. Returns the prompt
+    and which examples (bank positions and scores) were used.
+
+    With `store`, examples come from a persistent store filled by
+    add_examples instead of being sent with the call; they are ranked by
+    vector similarity with diversity re-ranking.
+
+    Args:
+        instruction: Task instruction.
+        examples: Example bank: [{"input", "output", "thinking"?}, ...].
+        store: Name of an example store (instead of examples).
+        new_input: The input to answer.
+        format_type: 'input-output' or 'chain-of-thought' (examples without
+            "thinking" are skipped).
+        token_budget: Estimated token budget for the whole prompt.
+        max_examples: Maximum number of examples included.
+        diversity: With a store, 0 ranks purely by similarity; higher values
+            avoid near-duplicate examples.
+    """
+    if model.store is not None:
+        if not numpy_available():
+            return {"error": {"type": "unavailable", "message": NUMPY_REQUIRED}}
+        store = EXAMPLE_STORES.get(model.store)
+        if store is None:
+            return {
+                "error": {
+                    "type": "not_found",
+                    "message": f"Example store '{model.store}' not found; "
+                    "fill it with add_examples first.",
+                    "available": EXAMPLE_STORES.names(),
+                }
+            }
+        molecule = build_from_store(
+            model.instruction,
+            store,
+            model.new_input,
+            model.format_type,
+            model.token_budget,
+            model.max_examples,
+            model.diversity,
+        )
+        return {"store": model.store, **molecule.to_dict()}
+    bank = [example.model_dump(exclude_none=True) for example in model.examples]
+    molecule = build_context(
+        model.instruction,
+        bank,
+        model.new_input,
+        model.format_type,
+        model.token_budget,
+        model.max_examples,
+    )
+    return molecule.to_dict()
+
+
+def register_molecular_builder(mcp: FastMCP) -> None:
+    """Register the molecular context builder on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    mcp.tool()(build_molecular_context)
+
+
+__all__ = [
+    "DEFAULT_TOKEN_BUDGET",
+    "FORMATS",
+    "MolecularContext",
+    "MolecularExample",
+    "SelectedExample",
+    "assemble",
+    "build_context",
+    "build_from_store",
+    "build_molecular_context",
+    "compose",
+    "eligible",
+    "format_example",
+    "register_molecular_builder",
+    "select_within_budget",
+    "similarity_scores",
+]
@@ -4,7 +4,11 @@ Contains structured protocol templates and molecular builders used across the
 Context Engineering stack.
 """
 
-from typing import Dict, Final, Optional
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Final
+
+from context_engineering_mcp.core.catalog import CatalogView, get_catalog
+from context_engineering_mcp.tracing import traced
 
 MOLECULAR_CONTEXT_FUNC: Final[str] = """
 def create_molecular_context(instruction, examples, new_input, format_type="input-output"):
@@ -20,201 +24,82 @@ def create_molecular_context(instruction, examples, new_input, format_type="inpu
     Returns:
         str: The complete molecular context
     \"\"\"
-    context = f"{instruction}\\n\\n"
+    # Collect the parts and join once: repeated `+=` copies the whole prompt
+    # for every line added (the `build_molecular_context` tool does this
+    # server-side, selecting examples under a token budget).
+    parts = [f"{instruction}\\n\\n"]
 
     # Add examples based on format type
     if format_type == "input-output":
         for example in examples:
-            context += f"Input: {example['input']}\\n"
-            context += f"Output: {example['output']}\\n\\n"
+            parts.append(f"Input: {example['input']}\\n")
+            parts.append(f"Output: {example['output']}\\n\\n")
     elif format_type == "chain-of-thought":
         for example in examples:
-            context += f"Input: {example['input']}\\n"
-            context += f"Thinking: {example['thinking']}\\n"
-            context += f"Output: {example['output']}\\n\\n"
+            parts.append(f"Input: {example['input']}\\n")
+            parts.append(f"Thinking: {example['thinking']}\\n")
+            parts.append(f"Output: {example['output']}\\n\\n")
 
     # Add the new input
-    context += f"Input: {new_input}\\nOutput:"
-
-    return context
-"""
+    parts.append(f"Input: {new_input}\\nOutput:")
 
-REASONING_SYSTEMATIC: Final[str] = """
-/reasoning.systematic{
-    intent="Break down complex problems into logical steps with traceable reasoning",
-    input={
-        problem="<problem_statement>",
-        constraints="<constraints>",
-        context="<context>"
-    },
-    process=[
-        /understand{action="Restate problem and clarify goals"},
-        /analyze{action="Break down into components"},
-        /plan{action="Design step-by-step approach"},
-        /execute{action="Implement solution methodically"},
-        /verify{action="Validate against requirements"},
-        /refine{action="Improve based on verification"}
-    ],
-    output={
-        solution="Implemented solution",
-        reasoning="Complete reasoning trace",
-        verification="Validation evidence"
-    }
-}
+    return "".join(parts)
 """
 
-THINKING_EXTENDED: Final[str] = """
-/thinking.extended{
-    intent="Engage deep, thorough reasoning for complex problems requiring careful consideration",
-    input={
-        problem="<problem_requiring_deep_thought>",
-        level="<basic|deep|deeper|ultra>" // Corresponds to think, think hard, think harder, ultrathink
-    },
-    process=[
-        /explore{action="Consider multiple perspectives and approaches"},
-        /evaluate{action="Assess trade-offs of each approach"},
-        /simulate{action="Test mental models against edge cases"},
-        /synthesize{action="Integrate insights into coherent solution"},
-        /articulate{action="Express reasoning clearly and thoroughly"}
-    ],
-    output={
-        conclusion="Well-reasoned solution",
-        rationale="Complete thinking process",
-        alternatives="Other considered approaches"
-    }
+# Protocol templates live in the template catalog (data/templates/protocols).
+_PROTOCOL_CONSTANTS: Final[dict[str, str]] = {
+    "REASONING_SYSTEMATIC": "reasoning.systematic",
+    "THINKING_EXTENDED": "thinking.extended",
+    "WORKFLOW_TDD": "workflow.test_driven",
+    "CODE_ANALYZE": "code.analyze",
+    "PROJECT_EXPLORE": "project.explore",
 }
-"""
-
-WORKFLOW_TDD: Final[str] = """
-/workflow.test_driven{
-    intent="Implement changes using test-first methodology",
-    input={
-        feature="<feature_to_implement>",
-        requirements="<detailed_requirements>"
-    },
-    process=[
-        /write_tests{
-            action="Create comprehensive tests based on requirements",
-            instruction="Don't implement functionality yet"
-        },
-        /verify_tests_fail{
-            action="Run tests to confirm they fail appropriately",
-            instruction="Validate test correctness"
-        },
-        /implement{
-            action="Write code to make tests pass",
-            instruction="Focus on passing tests, not implementation elegance initially"
-        },
-        /refactor{
-            action="Clean up implementation while maintaining passing tests",
-            instruction="Improve code quality without changing behavior"
-        },
-        /finalize{
-            action="Commit both tests and implementation",
-            instruction="Include test rationale in commit message"
-        }
-    ],
-    output={
-        tests="Comprehensive test suite",
-        implementation="Working code that passes tests",
-        commit="Commit message and PR details"
-    }
-}
-"""
-
-CODE_ANALYZE: Final[str] = """
-/code.analyze{
-    intent="Deeply understand code structure, patterns and quality",
-    input={
-        code="<code_to_analyze>",
-        focus="<specific_aspects_to_examine>"
-    },
-    process=[
-        /parse{
-            structure="Identify main components and organization",
-            patterns="Recognize design patterns and conventions",
-            flow="Trace execution and data flow paths"
-        },
-        /evaluate{
-            quality="Assess code quality and best practices",
-            performance="Identify potential performance issues",
-            security="Spot potential security concerns",
-            maintainability="Evaluate long-term maintainability"
-        },
-        /summarize{
-            purpose="Describe the code's primary functionality",
-            architecture="Outline architectural approach",
-            interfaces="Document key interfaces and contracts"
-        }
-    ],
-    output={
-        overview="High-level summary of the code",
-        details="Component-by-component breakdown",
-        recommendations="Suggested improvements"
-    }
-}
-"""
 
-PROJECT_EXPLORE: Final[str] = """
-/project.explore{
-    intent="Build comprehensive understanding of project structure",
-    input={
-        repo="<repository_path>",
-        focus="<exploration_objectives>"
-    },
-    process=[
-        /scan{
-            structure="Map directory hierarchy",
-            files="Identify key files",
-            patterns="Recognize organizational patterns"
-        },
-        /analyze{
-            architecture="Determine architectural approach",
-            components="Identify main components",
-            dependencies="Map component relationships"
-        },
-        /document{
-            overview="Create high-level summary",
-            components="Document key components",
-            patterns="Describe recurring patterns"
-        }
-    ],
-    output={
-        map="Structural representation of codebase",
-        key_areas="Identified important components",
-        entry_points="Recommended starting points"
-    }
-}
-"""
+if TYPE_CHECKING:
+    # Served by the module `__getattr__` below.
+    REASONING_SYSTEMATIC: str
+    THINKING_EXTENDED: str
+    WORKFLOW_TDD: str
+    CODE_ANALYZE: str
+    PROJECT_EXPLORE: str
 
-PROTOCOL_REGISTRY: Final[Dict[str, str]] = {
-    "reasoning.systematic": REASONING_SYSTEMATIC,
-    "thinking.extended": THINKING_EXTENDED,
-    "workflow.test_driven": WORKFLOW_TDD,
-    "code.analyze": CODE_ANALYZE,
-    "project.explore": PROJECT_EXPLORE,
-}
+PROTOCOL_REGISTRY: Final[Mapping[str, str]] = CatalogView("protocol")
 
 
-def get_protocol_template(name: str) -> Optional[str]:
+@traced("template.lookup")
+def get_protocol_template(name: str, exact: bool = False) -> str | None:
     """Return a protocol template by name.
 
     Args:
-        name: Key identifying the protocol in the registry.
+        name: Name or alias of the protocol in the template catalog.
+        exact: Match only the template's name or a declared alias, never a
+            prefix, typo or derived short name.
 
     Returns:
-        The matching protocol template, if present.
+        The matching protocol template, if present. A misspelled name that
+        still resolves is noted in a leading comment line.
     """
-    return PROTOCOL_REGISTRY.get(name)
+    catalog = get_catalog()
+    if exact:
+        entry = catalog.exact("protocol", name)
+        return None if entry is None else catalog.body(entry)
+    return catalog.template("protocol", name)
+
+
+def __getattr__(name: str) -> str:
+    # Former module constants, loaded from the catalog on first access.
+    if name in _PROTOCOL_CONSTANTS:
+        return get_catalog().source("protocol", _PROTOCOL_CONSTANTS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
+    "CODE_ANALYZE",
     "MOLECULAR_CONTEXT_FUNC",
+    "PROJECT_EXPLORE",
+    "PROTOCOL_REGISTRY",
     "REASONING_SYSTEMATIC",
     "THINKING_EXTENDED",
     "WORKFLOW_TDD",
-    "CODE_ANALYZE",
-    "PROJECT_EXPLORE",
-    "PROTOCOL_REGISTRY",
     "get_protocol_template",
 ]
@@ -0,0 +1,228 @@
+"""Fuzzy name resolution for template and tool registries.
+
+`NameIndex` holds a registry's canonical names and aliases in a trie of
+normalized keys (lowercase, ``_`` and ``-`` dropped). A lookup tries, in
+order:
+
+1. the exact key,
+2. a unique completion of the key as a prefix ("debat" -> "debate"),
+3. the closest keys within a bounded edit distance, found by walking the
+   trie with one Levenshtein row per node and pruning branches that can
+   no longer come within the bound.
+
+The result is a `Resolution`: the matched canonical name with a
+confidence score when one candidate is clearly best, otherwise a short
+list of suggestions, so a caller can answer "did you mean ...?" instead
+of guessing.
+"""
+
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import Final
+
+# Fuzzy and prefix matches below this confidence are only suggested.
+MIN_CONFIDENCE: Final[float] = 0.75
+MAX_SUGGESTIONS: Final[int] = 3
+_MIN_PREFIX: Final[int] = 3
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name or alias for lookup (case, '_' and '-' ignored)."""
+    return name.strip().lower().replace("_", "").replace("-", "")
+
+
+def max_distance(key: str) -> int:
+    """Return the edit-distance bound for a key of this length."""
+    return min(3, max(1, len(key) // 4))
+
+
+@dataclass(frozen=True)
+class Resolution:
+    """Outcome of resolving a name.
+
+    Attributes:
+        query: The name as given.
+        name: The canonical name matched, or None.
+        confidence: 1.0 for an exact match, lower for prefix and fuzzy ones.
+        match: ``"exact"``, ``"prefix"``, ``"fuzzy"`` or ``"none"``.
+        suggestions: Closest canonical names when there is no match.
+    """
+
+    query: str
+    name: str | None
+    confidence: float = 0.0
+    match: str = "none"
+    suggestions: tuple[str, ...] = ()
+
+    @property
+    def found(self) -> bool:
+        return self.name is not None
+
+    def note(self, label: str) -> str:
+        """Return a comment line naming an inexact match ('' when exact)."""
+        if self.name is None or self.match == "exact":
+            return ""
+        return (
+            f"// Resolved '{self.query}' to {label} '{self.name}' "
+            f"({self.match} match, confidence {self.confidence:.2f})\n"
+        )
+
+    def not_found(self, label: str, available: Iterable[str]) -> str:
+        """Return a short comment explaining a miss, with suggestions."""
+        lines = [f"// {label} '{self.query}' not found."]
+        if self.suggestions:
+            lines.append(f"// Did you mean: {', '.join(self.suggestions)}?")
+        lines.append(f"// Available: {', '.join(available)}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "query": self.query,
+            "name": self.name,
+            "confidence": round(self.confidence, 3),
+            "match": self.match,
+            "suggestions": list(self.suggestions),
+        }
+
+
+class _Node:
+    __slots__ = ("children", "key", "names")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.key: str | None = None
+        # canonical name -> length of its shortest key below this node
+        self.names: dict[str, int] = {}
+
+
+class NameIndex:
+    """Trie of normalized names and aliases, resolved exactly or fuzzily.
+
+    Args:
+        names: Mapping of canonical name to its aliases.
+    """
+
+    def __init__(self, names: Mapping[str, Iterable[str]] | None = None) -> None:
+        self._root = _Node()
+        self._keys: dict[str, str] = {}
+        for name, aliases in (names or {}).items():
+            for alias in (name, *aliases):
+                self.add(alias, name)
+
+    def add(self, alias: str, name: str) -> bool:
+        """Map `alias` to canonical `name`; the first mapping of a key wins."""
+        key = normalize_name(alias)
+        if not key or key in self._keys:
+            return False
+        self._keys[key] = name
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        node.key = key
+        self._collect(key, name)
+        return True
+
+    def _collect(self, key: str, name: str) -> None:
+        # Every node on the path knows which names lie below it, so a unique
+        # prefix completion is a single walk.
+        node = self._root
+        for char in key:
+            node = node.children[char]
+            node.names[name] = min(node.names.get(name, len(key)), len(key))
+
+    def __contains__(self, alias: object) -> bool:
+        return isinstance(alias, str) and normalize_name(alias) in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, alias: str) -> str | None:
+        """Return the canonical name of an exact (normalized) alias."""
+        return self._keys.get(normalize_name(alias))
+
+    def _prefix(self, key: str) -> dict[str, int]:
+        node = self._root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                return {}
+            node = child
+        return node.names
+
+    def _walk(
+        self,
+        node: _Node,
+        char: str,
+        key: str,
+        previous: list[int],
+        bound: int,
+    ) -> Iterator[tuple[int, str]]:
+        row = [previous[0] + 1]
+        for column in range(1, len(key) + 1):
+            row.append(
+                min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (key[column - 1] != char),
+                )
+            )
+        if node.key is not None and row[-1] <= bound:
+            yield row[-1], node.key
+        if min(row) <= bound:
+            for next_char, child in node.children.items():
+                yield from self._walk(child, next_char, key, row, bound)
+
+    def near(self, alias: str, bound: int | None = None) -> list[tuple[int, str]]:
+        """Return ``(distance, key)`` for keys within `bound` edits, closest first."""
+        key = normalize_name(alias)
+        bound = max_distance(key) if bound is None else bound
+        first = list(range(len(key) + 1))
+        found = [
+            hit
+            for char, child in self._root.children.items()
+            for hit in self._walk(child, char, key, first, bound)
+        ]
+        return sorted(found)
+
+    def resolve(self, alias: str) -> Resolution:
+        """Resolve `alias` to a canonical name, or suggest the closest ones."""
+        key = normalize_name(alias)
+        exact = self._keys.get(key)
+        if exact is not None:
+            return Resolution(alias, exact, 1.0, "exact")
+        if not key:
+            return Resolution(alias, None)
+
+        # Best confidence per canonical name across prefix and fuzzy matches.
+        scored: dict[str, tuple[float, str]] = {}
+        if len(key) >= _MIN_PREFIX:
+            completions = self._prefix(key)
+            for name, length in completions.items():
+                confidence = 0.5 + 0.5 * len(key) / length
+                # An ambiguous prefix is only a hint, never a match.
+                if len(completions) > 1:
+                    confidence = min(confidence, MIN_CONFIDENCE - 0.01)
+                scored[name] = (confidence, "prefix")
+        for distance, near_key in self.near(key):
+            confidence = 1 - distance / max(len(key), len(near_key))
+            name = self._keys[near_key]
+            if confidence > scored.get(name, (0.0, ""))[0]:
+                scored[name] = (confidence, "fuzzy")
+
+        ranked = sorted(scored.items(), key=lambda item: (-item[1][0], item[0]))
+        if ranked:
+            name, (confidence, match) = ranked[0]
+            runner_up = ranked[1][1][0] if len(ranked) > 1 else 0.0
+            if confidence >= MIN_CONFIDENCE and confidence > runner_up:
+                return Resolution(alias, name, confidence, match)
+        suggestions = tuple(name for name, _ in ranked[:MAX_SUGGESTIONS])
+        return Resolution(alias, None, 0.0, "none", suggestions)
+
+
+__all__ = [
+    "MIN_CONFIDENCE",
+    "NameIndex",
+    "Resolution",
+    "max_distance",
+    "normalize_name",
+]
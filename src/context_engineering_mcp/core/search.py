@@ -0,0 +1,349 @@
+"""Ranked full-text search over the technique catalog.
+
+`SearchIndex` is a BM25 index over `SearchDocument`s: one per protocol,
+cell, organ, program and thinking model. A document's fields are weighted
+(names and aliases above intents and use cases, those above process
+steps) and its terms are indexed with the same inflection folding as the
+router's keyword matching, so "testing" finds "tests". Each hit carries a
+snippet: the field that matched the most query terms.
+
+`TechniqueSearch` builds the index once from catalog metadata, with no
+template bodies read, and rebuilds it only when the catalog is reloaded
+or replaced.
+"""
+
+import math
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any, Final
+
+from context_engineering_mcp.core.catalog import (
+    TemplateCatalog,
+    get_catalog,
+    template_metadata,
+)
+from context_engineering_mcp.core.matching import tokenize, word_forms
+
+# Relative weight of a term occurrence in each field.
+FIELD_WEIGHTS: Final[dict[str, float]] = {
+    "name": 3.0,
+    "intent": 2.0,
+    "use_case": 2.0,
+    "category": 1.5,
+    "process": 1.0,
+}
+SNIPPET_CHARS: Final[int] = 160
+
+# How each catalog kind is fetched, for the `call` hint of a hit.
+KIND_CALLS: Final[dict[str, str]] = {
+    "protocol": 'get_protocol_shell(name="{name}")',
+    "cell": 'get_cell_protocol(name="{name}")',
+    "organ": 'get_organ(name="{name}")',
+    "program": 'get_prompt_program(program_type="{name}")',
+}
+
+STOPWORDS: Final[frozenset[str]] = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "do",
+        "for",
+        "from",
+        "how",
+        "i",
+        "in",
+        "into",
+        "is",
+        "it",
+        "me",
+        "my",
+        "of",
+        "on",
+        "or",
+        "our",
+        "that",
+        "the",
+        "their",
+        "this",
+        "to",
+        "use",
+        "using",
+        "want",
+        "we",
+        "what",
+        "when",
+        "with",
+    }
+)
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    """One searchable technique and the tool call that fetches it."""
+
+    kind: str
+    name: str
+    category: str
+    call: str
+    intent: str = ""
+    aliases: tuple[str, ...] = ()
+    use_cases: tuple[str, ...] = ()
+    process: tuple[str, ...] = ()
+
+    @classmethod
+    def from_template(
+        cls, kind: str, name: str, category: str, body: str, call: str
+    ) -> "SearchDocument":
+        """Describe a template kept outside the catalog from its body."""
+        meta = template_metadata(body)
+        return cls(
+            kind=kind,
+            name=name,
+            category=category,
+            call=call,
+            intent=meta["intent"],
+            use_cases=tuple(meta["use_cases"]),
+            process=tuple(meta["process"]),
+        )
+
+    def fields(self) -> Iterator[tuple[str, str]]:
+        """Yield ``(field, text)`` pairs, in snippet preference order."""
+        yield "intent", self.intent
+        for use_case in self.use_cases:
+            yield "use_case", use_case
+        for step in self.process:
+            yield "process", step
+        yield "category", f"{self.category} {self.kind}"
+        yield "name", " ".join((self.name, *self.aliases))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "category": self.category,
+            "call": self.call,
+            "intent": self.intent,
+        }
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """A ranked search result."""
+
+    document: SearchDocument
+    score: float
+    snippet: str
+    matched: tuple[str, ...] = ()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **self.document.to_dict(),
+            "score": round(self.score, 3),
+            "snippet": self.snippet,
+            "matched": list(self.matched),
+        }
+
+
+def query_terms(text: str) -> list[str]:
+    """Return the distinct non-stopword tokens of a query, in order."""
+    return list(dict.fromkeys(t for t in tokenize(text) if t not in STOPWORDS))
+
+
+def _snippet(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SNIPPET_CHARS:
+        return text
+    return text[: SNIPPET_CHARS - 1].rsplit(" ", 1)[0] + "…"
+
+
+class SearchIndex:
+    """BM25 index over weighted document fields.
+
+    Args:
+        documents: Documents to index, in their listing order.
+        k1: Term-frequency saturation.
+        b: Document-length normalization.
+    """
+
+    def __init__(
+        self, documents: Iterable[SearchDocument], k1: float = 1.2, b: float = 0.75
+    ) -> None:
+        self.documents: tuple[SearchDocument, ...] = tuple(documents)
+        self.k1 = k1
+        self.b = b
+        # term -> {document position: weighted term frequency}
+        self._postings: dict[str, dict[int, float]] = {}
+        self._lengths: list[float] = []
+        for position, document in enumerate(self.documents):
+            length = 0.0
+            for field, text in document.fields():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    if token in STOPWORDS:
+                        continue
+                    length += weight
+                    for form in word_forms(token):
+                        postings = self._postings.setdefault(form, {})
+                        postings[position] = postings.get(position, 0.0) + weight
+            self._lengths.append(length)
+        count = len(self.documents)
+        self._average = sum(self._lengths) / count if count else 0.0
+        self._idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def _term_scores(self, token: str) -> dict[int, float]:
+        # Best-scoring form of the query token per document, so a token
+        # matching both "tests" and "test" is not counted twice.
+        scores: dict[int, float] = {}
+        for form in word_forms(token):
+            postings = self._postings.get(form)
+            if not postings:
+                continue
+            idf = self._idf[form]
+            for position, tf in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[position] / self._average
+                score = idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+                if score > scores.get(position, 0.0):
+                    scores[position] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        where: Callable[[SearchDocument], bool] | None = None,
+    ) -> list[SearchHit]:
+        """Return the `limit` best documents for `query`, best first.
+
+        Args:
+            query: Free text. An empty query lists documents in index order.
+            limit: Maximum number of hits.
+            where: Optional filter applied before ranking.
+        """
+        allowed = [
+            position
+            for position, document in enumerate(self.documents)
+            if where is None or where(document)
+        ]
+        terms = query_terms(query)
+        if not terms:
+            return [
+                SearchHit(self.documents[p], 0.0, _snippet(self.documents[p].intent))
+                for p in allowed[:limit]
+            ]
+        scores: dict[int, float] = {}
+        matched: dict[int, list[str]] = {}
+        for term in terms:
+            for position, score in self._term_scores(term).items():
+                scores[position] = scores.get(position, 0.0) + score
+                matched.setdefault(position, []).append(term)
+        ranked = sorted(
+            (p for p in allowed if p in scores), key=lambda p: (-scores[p], p)
+        )
+        return [
+            SearchHit(
+                self.documents[p],
+                scores[p],
+                self._best_snippet(self.documents[p], matched[p]),
+                tuple(matched[p]),
+            )
+            for p in ranked[:limit]
+        ]
+
+    @staticmethod
+    def _best_snippet(document: SearchDocument, terms: list[str]) -> str:
+        wanted = {form for term in terms for form in word_forms(term)}
+        best, best_hits = document.intent, 0
+        for field, text in document.fields():
+            if field in ("name", "category"):
+                continue
+            hits = sum(
+                1
+                for token in tokenize(text)
+                if not wanted.isdisjoint(word_forms(token))
+            )
+            if hits > best_hits:
+                best, best_hits = text, hits
+        return _snippet(best)
+
+
+def catalog_documents(catalog: TemplateCatalog) -> list[SearchDocument]:
+    """Describe every listed catalog template, from index metadata only."""
+    return [
+        SearchDocument(
+            kind=entry.kind,
+            name=entry.name,
+            category=entry.category,
+            call=KIND_CALLS.get(entry.kind, "{name}").format(name=entry.name),
+            intent=entry.intent,
+            aliases=entry.aliases,
+            use_cases=entry.use_cases,
+            process=entry.process,
+        )
+        for entry in sorted(catalog.entries(), key=lambda e: (e.kind, e.name))
+    ]
+
+
+class TechniqueSearch:
+    """Catalog-wide search, indexed once and rebuilt when the catalog changes.
+
+    Args:
+        extra: Documents for techniques outside the catalog (thinking
+            models), returned by a callable so they are built on first use.
+    """
+
+    def __init__(self, extra: Callable[[], Iterable[SearchDocument]] = tuple) -> None:
+        self._extra = extra
+        self._lock = threading.Lock()
+        self._index: SearchIndex | None = None
+        self._built_for: tuple[int, int] | None = None
+        self.builds = 0
+
+    def index(self) -> SearchIndex:
+        """Return the index, rebuilding it if the catalog was reloaded."""
+        catalog = get_catalog()
+        catalog.entries()  # let a reloading catalog pick up changes first
+        version = (id(catalog), catalog.generation)
+        index = self._index
+        if index is not None and self._built_for == version:
+            return index
+        with self._lock:
+            if self._index is None or self._built_for != version:
+                self._index = SearchIndex([*catalog_documents(catalog), *self._extra()])
+                self._built_for = version
+                self.builds += 1
+            return self._index
+
+    def search(
+        self, query: str, category: str = "all", limit: int = 5
+    ) -> list[SearchHit]:
+        """Search all techniques; `category` matches a category or a kind."""
+        where = None
+        if category != "all":
+
+            def where(document: SearchDocument) -> bool:
+                return category in (document.category, document.kind)
+
+        return self.index().search(query, limit=limit, where=where)
+
+
+__all__ = [
+    "FIELD_WEIGHTS",
+    "KIND_CALLS",
+    "STOPWORDS",
+    "SearchDocument",
+    "SearchHit",
+    "SearchIndex",
+    "TechniqueSearch",
+    "catalog_documents",
+    "query_terms",
+]
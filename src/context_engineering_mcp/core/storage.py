@@ -0,0 +1,27 @@
+"""Filesystem locations for engines that persist state between runs."""
+
+import os
+from pathlib import Path
+from typing import Final
+
+DATA_DIR_ENV: Final[str] = "SUTRA_DATA_DIR"
+
+
+def data_dir(*parts: str) -> Path:
+    """Return (and create) a directory under the Sutra data root.
+
+    The root is `$SUTRA_DATA_DIR`, defaulting to `~/.sutra`.
+
+    Args:
+        *parts: Path components below the data root.
+
+    Returns:
+        The existing directory path.
+    """
+    root = os.getenv(DATA_DIR_ENV) or os.path.join(Path.home(), ".sutra")
+    path = Path(root, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+__all__ = ["DATA_DIR_ENV", "data_dir"]
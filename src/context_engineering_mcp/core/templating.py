@@ -0,0 +1,244 @@
+"""Precompiled template engine with a memoized render cache.
+
+Templates use `str.format` syntax (including doubled-brace escaping) but are
+parsed exactly once, at import time, into static and dynamic segments.
+Rendering then only fills the dynamic slots and joins the parts. Repeated
+renders with identical inputs are served from a bounded LRU cache.
+
+Every template can also be rendered in `compact` mode, which drops
+indentation, blank lines and redundant `action=` keys while keeping the
+protocol structure intact. Compact sources are derived once and cached.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+from string import Formatter
+from typing import Final, Literal
+
+from pydantic import Field
+
+from context_engineering_mcp.tracing import TracedModel, span
+
+DEFAULT_RENDER_CACHE_SIZE: Final[int] = 512
+
+RenderMode = Literal["full", "compact"]
+
+
+class RenderModeInput(TracedModel):
+    """Base input model for tools that return a template."""
+
+    render_mode: RenderMode = Field(
+        "full", description="'full' or 'compact' (whitespace-stripped) output."
+    )
+
+
+# `/step{action="..."}` -> `/step{"..."}`; the step's only field is its action.
+_STEP_ACTION: Final[re.Pattern[str]] = re.compile(r"(/[\w.]+\{\{?)action=")
+# Lines holding only closing brackets, folded onto the preceding line.
+_CLOSERS: Final[re.Pattern[str]] = re.compile(r"[\]}),;]+")
+
+
+@lru_cache(maxsize=256)
+def compact_text(text: str, preserve_indent: bool = False) -> str:
+    """Strip non-semantic whitespace from a protocol or program template.
+
+    Args:
+        text: Template or rendered text.
+        preserve_indent: Keep relative indentation (for indentation-sensitive
+            code such as Python), shrinking each 4-space level to one space.
+
+    Returns:
+        The compact text, one statement per line.
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if preserve_indent:
+        depths = [len(line) - len(line.lstrip(" ")) for line in lines]
+        if any(depth % 4 for depth in depths):
+            return "\n".join(lines)
+        return "\n".join(
+            " " * (depth // 4) + line.lstrip(" ") for depth, line in zip(depths, lines)
+        )
+
+    compact: list[str] = []
+    for line in lines:
+        stripped = _STEP_ACTION.sub(r"\1", line.strip())
+        if compact and _CLOSERS.fullmatch(stripped) and "//" not in compact[-1]:
+            compact[-1] += stripped
+        else:
+            compact.append(stripped)
+    return "\n".join(compact)
+
+
+class CompiledTemplate:
+    """A `str.format` template split once into static and dynamic segments."""
+
+    __slots__ = ("_compact", "_parts", "_slots", "fields", "name", "source")
+
+    def __init__(self, name: str, source: str) -> None:
+        parts: list[str] = []
+        slots: list[tuple[int, str]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if literal:
+                parts.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(
+                    f"Template '{name}' uses unsupported field '{{{field}}}'; "
+                    "only plain named fields are allowed."
+                )
+            slots.append((len(parts), field))
+            parts.append("")
+
+        self.name = name
+        self.source = source
+        self.fields: tuple[str, ...] = tuple(dict.fromkeys(f for _, f in slots))
+        self._parts = parts
+        self._slots = tuple(slots)
+        self._compact: CompiledTemplate | None = None
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """Fill the dynamic segments and return the rendered text.
+
+        Args:
+            values: Mapping from field name to replacement text.
+
+        Returns:
+            The rendered template; equivalent to `source.format(**values)`.
+        """
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = str(values[field])
+        return "".join(parts)
+
+    def compact(self) -> "CompiledTemplate":
+        """Return the compact-mode variant of this template (compiled once)."""
+        if self._compact is None:
+            self._compact = CompiledTemplate(
+                f"{self.name}:compact", compact_text(self.source)
+            )
+        return self._compact
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate(name={self.name!r}, fields={self.fields!r})"
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered templates.
+
+    Keys are a digest of the template name and its validated inputs, so large
+    inputs (long reasoning traces) are not retained as dictionary keys.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_RENDER_CACHE_SIZE) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(template: CompiledTemplate, values: Mapping[str, str]) -> bytes:
+        digest = hashlib.blake2b(template.name.encode(), digest_size=16)
+        for field in template.fields:
+            encoded = str(values[field]).encode()
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.digest()
+
+    def render(self, template: CompiledTemplate, values: Mapping[str, str]) -> str:
+        """Return a cached render of `template`, rendering on a miss."""
+        if self.maxsize == 0:
+            with self._lock:
+                self.misses += 1
+            return template.render(values)
+
+        key = self._key(template, values)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        rendered = template.render(values)
+        with self._lock:
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        """Drop all cached renders and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+RENDER_CACHE: Final[RenderCache] = RenderCache()
+
+
+def compile_template(name: str, source: str) -> CompiledTemplate:
+    """Compile a `str.format` template into static/dynamic segments.
+
+    Args:
+        name: Stable identifier used in cache keys and error messages.
+        source: Template text using `{field}` placeholders and `{{`/`}}` escapes.
+
+    Returns:
+        The compiled template.
+    """
+    return CompiledTemplate(name, source)
+
+
+def render_template(
+    template: CompiledTemplate, render_mode: RenderMode = "full", **values: str
+) -> str:
+    """Render a compiled template through the shared LRU render cache.
+
+    Args:
+        template: Template produced by `compile_template`.
+        render_mode: 'full' for the formatted template, 'compact' to strip
+            non-semantic whitespace before filling the slots.
+        **values: Validated field values.
+
+    Returns:
+        The rendered text.
+    """
+    with span("render", template=template.name, mode=render_mode):
+        if render_mode == "compact":
+            template = template.compact()
+        return RENDER_CACHE.render(template, values)
+
+
+__all__ = [
+    "RENDER_CACHE",
+    "CompiledTemplate",
+    "RenderCache",
+    "RenderMode",
+    "RenderModeInput",
+    "compact_text",
+    "compile_template",
+    "render_template",
+]
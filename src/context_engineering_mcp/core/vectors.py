@@ -0,0 +1,170 @@
+"""Offline hashed n-gram embeddings and a vectorized similarity matrix.
+
+Embeddings are signed feature-hashed bags of word unigrams and character
+n-grams, L2-normalized, so they need no model download or network access.
+`VectorMatrix` stores them row-wise in a NumPy array that grows in chunks
+(optionally a memory-mapped file) and scores every row against a query
+with a single matrix-vector product.
+
+NumPy is an optional dependency (`pip install context-engineering-mcp[vector]`).
+"""
+
+import os
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Final
+
+from context_engineering_mcp.core.matching import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the extra
+    np = None  # type: ignore[assignment]
+
+DEFAULT_DIM: Final[int] = 256
+DEFAULT_CHUNK_ROWS: Final[int] = 4096
+_NGRAM_SIZES: Final[tuple[int, ...]] = (3, 4)
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> Any:
+    if np is None:
+        raise RuntimeError(
+            "Vector recall requires NumPy. "
+            "Install it with: pip install 'context-engineering-mcp[vector]'"
+        )
+    return np
+
+
+class HashedNgramEmbedder:
+    """Deterministic feature-hashing embedder over words and character n-grams.
+
+    Args:
+        dim: Number of hashed feature buckets.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM) -> None:
+        _require_numpy()
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterable[bytes]:
+        for token in tokenize(text):
+            yield token.encode()
+            padded = f"<{token}>"
+            for size in _NGRAM_SIZES:
+                for start in range(len(padded) - size + 1):
+                    yield padded[start : start + size].encode()
+
+    def embed(self, text: str) -> Any:
+        """Return the L2-normalized float32 embedding of a text."""
+        hashes = np.fromiter(
+            (zlib.crc32(feature) for feature in self._features(text)), dtype=np.uint32
+        )
+        # The top hash bit picks the sign so bucket collisions tend to cancel.
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        vector = np.bincount(
+            hashes % self.dim, weights=signs, minlength=self.dim
+        ).astype(np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector
+
+
+class VectorMatrix:
+    """Row-wise embedding matrix that grows in chunks.
+
+    Args:
+        dim: Embedding dimensionality.
+        path: Optional file backing the matrix as a memory map. Existing rows
+            in the file are kept, so embeddings survive restarts.
+        chunk_rows: Rows added each time the matrix runs out of capacity.
+    """
+
+    def __init__(
+        self,
+        dim: int = DEFAULT_DIM,
+        path: str | os.PathLike[str] | None = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> None:
+        _require_numpy()
+        self.dim = dim
+        self.chunk_rows = chunk_rows
+        self.path = Path(path) if path is not None else None
+        self._rows = 0
+        self._data: Any
+        if self.path is None:
+            self._data = np.zeros((chunk_rows, dim), dtype=np.float32)
+            return
+
+        # The file is padded to whole chunks; the populated row count is kept
+        # in a sidecar written on every flush.
+        self._count_path = self.path.with_name(self.path.name + ".rows")
+        row_bytes = dim * np.dtype(np.float32).itemsize
+        file_rows = self.path.stat().st_size // row_bytes if self.path.exists() else 0
+        try:
+            recorded = int(self._count_path.read_text())
+        except (FileNotFoundError, ValueError):
+            recorded = 0
+        self._rows = min(recorded, file_rows)
+        self._data = self._map(max(file_rows, chunk_rows))
+
+    def _map(self, rows: int) -> Any:
+        assert self.path is not None
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        with open(self.path, "ab") as handle:
+            if handle.tell() < rows * row_bytes:
+                handle.truncate(rows * row_bytes)
+        return np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def rows(self) -> Any:
+        """View of the populated rows."""
+        return self._data[: self._rows]
+
+    def truncate(self, rows: int) -> None:
+        """Forget rows beyond `rows` (e.g. vectors without a log entry)."""
+        self._rows = min(self._rows, rows)
+
+    def append(self, vector: Any) -> int:
+        """Append a row and return its index."""
+        if self._rows == len(self._data):
+            capacity = len(self._data) + self.chunk_rows
+            if self.path is None:
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[: self._rows] = self._data[: self._rows]
+                self._data = grown
+            else:
+                self._data.flush()
+                self._data = self._map(capacity)
+        self._data[self._rows] = vector
+        self._rows += 1
+        return self._rows - 1
+
+    def flush(self) -> None:
+        """Persist a memory-mapped matrix and its populated row count."""
+        if self.path is None:
+            return
+        self._data.flush()
+        staging = self._count_path.with_name(self._count_path.name + ".tmp")
+        staging.write_text(str(self._rows))
+        os.replace(staging, self._count_path)
+
+    def scores(self, query: Any) -> Any:
+        """Cosine similarity of every row against a normalized query vector."""
+        return self.rows @ query
+
+
+__all__ = [
+    "DEFAULT_DIM",
+    "HashedNgramEmbedder",
+    "VectorMatrix",
+    "numpy_available",
+]
@@ -0,0 +1,427 @@
+"""Layer 2: Windowed cell engine.
+
+Server-side implementation of `cell.protocol.windowed`. Each window is a
+ring buffer with O(1) append and FIFO eviction, an optional salience
+min-heap, and both an item-count limit and a token budget. Ingesting an
+event returns only the evicted IDs and an incrementally maintained window
+fingerprint, so per-turn cost stays constant however long the conversation.
+"""
+
+import hashlib
+import heapq
+import itertools
+import threading
+from collections.abc import Callable, Iterator
+from typing import Any, Final, Literal
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel
+
+WindowPolicy = Literal["fifo", "recency", "salience"]
+
+DEFAULT_MAX_ITEMS: Final[int] = 50
+_SUMMARY_LIMIT: Final[int] = 2000
+
+
+def _event_tokens(content: str, max_tokens: int | None) -> int:
+    """Return an event's token cost, rejecting one over the whole budget."""
+    tokens = max(1, estimate_tokens(content))
+    if max_tokens is not None and tokens > max_tokens:
+        raise ValueError(
+            f"Event needs {tokens} tokens, more than the window's "
+            f"budget of {max_tokens}."
+        )
+    return tokens
+
+
+class WindowItem:
+    """An event held in a window."""
+
+    __slots__ = ("alive", "content", "id", "salience", "seq", "tokens")
+
+    def __init__(
+        self, id: str, content: str, tokens: int, salience: float, seq: int
+    ) -> None:
+        self.id = id
+        self.content = content
+        self.tokens = tokens
+        self.salience = salience
+        self.seq = seq
+        self.alive = True
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"id": self.id, "content": self.content, "salience": self.salience}
+
+
+class RingBuffer:
+    """Ring buffer of window items with O(1) append/popleft and lazy removal.
+
+    Items removed out of order are only flagged dead; `popleft` and iteration
+    skip them. A full buffer is compacted (and grown if needed) on append,
+    which keeps appends amortized O(1).
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self._slots: list[WindowItem | None] = [None] * capacity
+        self._head = 0
+        self._size = 0  # occupied slots, dead items included
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, item: WindowItem) -> None:
+        if self._size == len(self._slots):
+            self._compact()
+        self._slots[(self._head + self._size) % len(self._slots)] = item
+        self._size += 1
+
+    def popleft(self) -> WindowItem | None:
+        """Remove and return the oldest live item, discarding dead ones."""
+        while self._size:
+            item = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % len(self._slots)
+            self._size -= 1
+            if item is not None and item.alive:
+                return item
+        return None
+
+    def __iter__(self) -> Iterator[WindowItem]:
+        capacity = len(self._slots)
+        for offset in range(self._size):
+            item = self._slots[(self._head + offset) % capacity]
+            if item is not None and item.alive:
+                yield item
+
+    def _compact(self) -> None:
+        live = list(self)
+        capacity = len(self._slots)
+        if 2 * len(live) > capacity:
+            capacity *= 2
+        self._slots = [*live, *([None] * (capacity - len(live)))]
+        self._head = 0
+        self._size = len(live)
+
+
+class WindowedCell:
+    """A sliding context window with fifo, recency or salience eviction.
+
+    Args:
+        max_items: Maximum number of live items.
+        max_tokens: Optional token budget across live items.
+        policy: `fifo` evicts the oldest item and updates re-ingested IDs in
+            place; `recency` also evicts the oldest, but re-ingesting an ID
+            moves it to the newest position; `salience` evicts the
+            lowest-salience item (oldest first on ties).
+        summary_hook: Optional callable receiving each batch of evicted items.
+    """
+
+    def __init__(
+        self,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_tokens: int | None = None,
+        policy: WindowPolicy = "fifo",
+        summary_hook: Callable[[list[WindowItem]], None] | None = None,
+    ) -> None:
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.policy = policy
+        self.summary_hook = summary_hook
+        self.tokens = 0
+        self._buffer = RingBuffer(max(2 * max_items, 1))
+        self._live: dict[str, WindowItem] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._fingerprint = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    @staticmethod
+    def _item_hash(item: WindowItem) -> int:
+        digest = hashlib.blake2b(f"{item.id}\x00{item.seq}".encode(), digest_size=8)
+        return int.from_bytes(digest.digest(), "little")
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the window's items and versions, maintained in O(1)."""
+        return f"{len(self._live)}-{self._fingerprint:016x}"
+
+    def items(self) -> list[WindowItem]:
+        """Live items, oldest first."""
+        return list(self._buffer)
+
+    def _add(self, item: WindowItem) -> None:
+        self._live[item.id] = item
+        self.tokens += item.tokens
+        self._fingerprint ^= self._item_hash(item)
+        if self.policy == "salience":
+            heapq.heappush(self._heap, (item.salience, item.seq, item.id))
+            # Entries of replaced or evicted items are skipped lazily by their
+            # seq; rebuild once they outnumber the live ones.
+            if len(self._heap) > 2 * len(self._live) + 16:
+                self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [
+            (item.salience, item.seq, item.id) for item in self._live.values()
+        ]
+        heapq.heapify(self._heap)
+
+    def _discard(self, item: WindowItem) -> WindowItem:
+        item.alive = False
+        del self._live[item.id]
+        self.tokens -= item.tokens
+        self._fingerprint ^= self._item_hash(item)
+        return item
+
+    def _pop_victim(self) -> WindowItem | None:
+        if self.policy == "salience":
+            while self._heap:
+                _, seq, item_id = heapq.heappop(self._heap)
+                item = self._live.get(item_id)
+                if item is not None and item.seq == seq:
+                    return self._discard(item)
+            return None
+
+        item = self._buffer.popleft()
+        return None if item is None else self._discard(item)
+
+    def _over_limit(self) -> bool:
+        if len(self._live) > self.max_items:
+            return True
+        return self.max_tokens is not None and self.tokens > self.max_tokens
+
+    def evict(self) -> list[WindowItem]:
+        """Evict items until the window respects its limits."""
+        evicted: list[WindowItem] = []
+        while self._over_limit():
+            victim = self._pop_victim()
+            if victim is None:
+                break
+            evicted.append(victim)
+        if evicted and self.summary_hook is not None:
+            self.summary_hook(evicted)
+        return evicted
+
+    def ingest(
+        self, item_id: str | None, content: str, salience: float = 0.5
+    ) -> list[WindowItem]:
+        """Append an event and return the items evicted to make room for it.
+
+        Raises:
+            ValueError: If the event alone exceeds the token budget; the
+                window is left unchanged.
+        """
+        tokens = _event_tokens(content, self.max_tokens)
+        seq = next(self._seq)
+        item_id = item_id or f"e{seq}"
+
+        existing = self._live.get(item_id)
+        if existing is not None and self.policy == "fifo":
+            # Update in place: keep the ring position, bump the version.
+            self._fingerprint ^= self._item_hash(existing)
+            self.tokens += tokens - existing.tokens
+            existing.content, existing.tokens, existing.seq = content, tokens, seq
+            existing.salience = salience
+            self._fingerprint ^= self._item_hash(existing)
+            return self.evict()
+        if existing is not None:
+            self._discard(existing)
+
+        item = WindowItem(item_id, content, tokens, salience, seq)
+        self._buffer.append(item)
+        self._add(item)
+        return self.evict()
+
+    def reconfigure(
+        self,
+        max_items: int | None = None,
+        max_tokens: int | None = None,
+        policy: WindowPolicy | None = None,
+    ) -> list[WindowItem]:
+        """Update limits or policy and evict anything now out of bounds."""
+        if max_items is not None:
+            self.max_items = max_items
+        if max_tokens is not None:
+            self.max_tokens = max_tokens
+        if policy is not None and policy != self.policy:
+            self.policy = policy
+            self._rebuild_heap()
+        return self.evict()
+
+
+class _SummaryBuffer:
+    """Default summary hook: keeps a bounded extract of evicted content."""
+
+    def __init__(self, limit: int = _SUMMARY_LIMIT) -> None:
+        self.limit = limit
+        self.text = ""
+
+    def __call__(self, evicted: list[WindowItem]) -> None:
+        lines = [f"[{item.id}] {item.content.strip()[:160]}" for item in evicted]
+        self.text = "\n".join(filter(None, [self.text, *lines]))[-self.limit :]
+
+
+class WindowedCellEngine:
+    """Named per-session windows."""
+
+    def __init__(self) -> None:
+        self._windows: dict[tuple[str, str], tuple[WindowedCell, _SummaryBuffer]] = {}
+        self._lock = threading.Lock()
+
+    def window(
+        self,
+        session: str,
+        name: str,
+        max_items: int | None = None,
+        max_tokens: int | None = None,
+        policy: WindowPolicy | None = None,
+    ) -> tuple[WindowedCell, _SummaryBuffer, list[WindowItem]]:
+        """Return a window, creating or reconfiguring it as requested."""
+        ident = (session, name)
+        entry = self._windows.get(ident)
+        if entry is None:
+            summary = _SummaryBuffer()
+            cell = WindowedCell(
+                max_items=max_items or DEFAULT_MAX_ITEMS,
+                max_tokens=max_tokens,
+                policy=policy or "fifo",
+                summary_hook=summary,
+            )
+            self._windows[ident] = (cell, summary)
+            return cell, summary, []
+        cell, summary = entry
+        return cell, summary, cell.reconfigure(max_items, max_tokens, policy)
+
+    def ingest(
+        self,
+        session: str,
+        name: str,
+        content: str,
+        item_id: str | None = None,
+        salience: float = 0.5,
+        max_items: int | None = None,
+        max_tokens: int | None = None,
+        policy: WindowPolicy | None = None,
+    ) -> dict[str, Any]:
+        with self._lock:
+            # Reject an oversized event before a reconfiguration evicts anything.
+            if max_tokens is None and (session, name) in self._windows:
+                max_tokens = self._windows[session, name][0].max_tokens
+            try:
+                _event_tokens(content, max_tokens)
+            except ValueError as e:
+                return {"error": {"type": "over_budget", "message": str(e)}}
+            cell, _, evicted = self.window(session, name, max_items, max_tokens, policy)
+            evicted += cell.ingest(item_id, content, salience)
+            return {
+                "evicted": [item.id for item in evicted],
+                "fingerprint": cell.fingerprint,
+                "size": len(cell),
+                "tokens": cell.tokens,
+            }
+
+    def read(self, session: str, name: str) -> dict[str, Any]:
+        with self._lock:
+            cell, summary, _ = self.window(session, name)
+            return {
+                "items": [item.to_dict() for item in cell.items()],
+                "summary": summary.text,
+                "fingerprint": cell.fingerprint,
+                "policy": cell.policy,
+                "max_items": cell.max_items,
+                "max_tokens": cell.max_tokens,
+                "tokens": cell.tokens,
+            }
+
+
+WINDOWED_CELL_ENGINE: Final[WindowedCellEngine] = WindowedCellEngine()
+
+
+# --- Input Models ---
+
+
+class WindowTarget(TracedModel):
+    window: str = Field("default", min_length=1, description="Window name.")
+    session: str = Field("default", min_length=1, description="Session identifier.")
+
+
+class WindowIngestInput(WindowTarget):
+    event: str = Field(..., min_length=1, description="Incoming event text.")
+    event_id: str | None = Field(None, min_length=1, description="Optional event ID.")
+    salience: float = Field(0.5, ge=0.0, le=1.0, description="Event importance.")
+    max_items: int | None = Field(None, ge=1, le=10_000, description="Item limit.")
+    max_tokens: int | None = Field(None, ge=1, description="Token budget.")
+    policy: WindowPolicy | None = Field(None, description="Eviction policy.")
+
+
+# --- Tools ---
+
+
+@model_tool(WindowIngestInput)
+def cell_window_ingest(model: WindowIngestInput) -> dict:
+    """Append an event to a windowed cell, evicting per policy and budget.
+
+    Returns only the evicted IDs and the new window fingerprint; use
+    `cell_window_read` to fetch the window contents when needed.
+
+    Args:
+        event: Incoming event or message text.
+        event_id: Optional stable ID (re-using an ID replaces that item).
+        salience: Importance in [0, 1], used by the `salience` policy.
+        window: Window name within the session.
+        session: Session identifier.
+        max_items: Item-count limit (default 50 when the window is created).
+        max_tokens: Optional token budget across the window.
+        policy: Eviction policy: 'fifo', 'recency' or 'salience'.
+    """
+    return WINDOWED_CELL_ENGINE.ingest(
+        model.session,
+        model.window,
+        model.event,
+        item_id=model.event_id,
+        salience=model.salience,
+        max_items=model.max_items,
+        max_tokens=model.max_tokens,
+        policy=model.policy,
+    )
+
+
+@model_tool(WindowTarget)
+def cell_window_read(model: WindowTarget) -> dict:
+    """Return the live items of a windowed cell and a summary of evictions.
+
+    Args:
+        window: Window name within the session.
+        session: Session identifier.
+    """
+    return WINDOWED_CELL_ENGINE.read(model.session, model.window)
+
+
+def register_windowed_cell(mcp: FastMCP) -> None:
+    """Register the windowed cell engine tools on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    for tool in (cell_window_ingest, cell_window_read):
+        mcp.tool()(tool)
+
+
+__all__ = [
+    "WINDOWED_CELL_ENGINE",
+    "RingBuffer",
+    "WindowItem",
+    "WindowedCell",
+    "WindowedCellEngine",
+    "cell_window_ingest",
+    "cell_window_read",
+    "register_windowed_cell",
+]
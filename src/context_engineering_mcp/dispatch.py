@@ -0,0 +1,157 @@
+"""Model-declared tools validated in a single pass.
+
+A `ModelTool` pairs one input model with a handler taking the validated
+model. Arguments are checked once, by the model's compiled pydantic-core
+validator, instead of once by FastMCP against the function signature and
+again by the handler building its own model. The model's JSON schema,
+constraints and descriptions included, is the tool's `inputSchema`.
+
+    @mcp.tool()
+    @model_tool(VerifyLogicInput)
+    def verify_logic(model: VerifyLogicInput) -> str: ...
+
+`SutraMCP` recognizes model tools at registration and dispatches them
+itself; a validation failure becomes an `isError` result carrying the
+structured error from `validation_error`. Called directly, a model tool
+takes the tool's arguments and returns ``{"error": ...}`` on bad input. On
+a plain `FastMCP` server the tool still works through its synthesized
+signature (validating twice).
+"""
+
+import inspect
+import json
+from collections.abc import Callable, Mapping
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from context_engineering_mcp.tracing import span, traced
+
+M = TypeVar("M", bound=BaseModel)
+R = TypeVar("R")
+
+_JSON_TYPES = frozenset({"array", "object"})
+
+
+def validation_error(error: ValidationError) -> dict[str, Any]:
+    """Return the structured error object reported for invalid input."""
+    return {
+        "type": "validation_error",
+        "message": "Input Validation Error",
+        "details": [
+            {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+            for err in error.errors()
+        ],
+    }
+
+
+def _is_json_field(schema: dict[str, Any]) -> bool:
+    if schema.get("type") in _JSON_TYPES or "$ref" in schema:
+        return True
+    return any(_is_json_field(option) for option in schema.get("anyOf", ()))
+
+
+def _signature(model: type[BaseModel], returns: Any) -> inspect.Signature:
+    """Build the call signature of a model tool.
+
+    A model's own fields come before inherited ones (so a shared
+    `render_mode` stays last) and required fields before optional ones.
+    """
+    order: list[str] = []
+    for cls in model.__mro__:
+        for name in getattr(cls, "__annotations__", {}):
+            if name in model.model_fields and name not in order:
+                order.append(name)
+    fields = model.model_fields
+    order.sort(key=lambda name: not fields[name].is_required())
+    parameters = [
+        inspect.Parameter(
+            name,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=(
+                inspect.Parameter.empty
+                if fields[name].is_required()
+                else fields[name].get_default(call_default_factory=True)
+            ),
+            annotation=fields[name].annotation,
+        )
+        for name in order
+    ]
+    return inspect.Signature(parameters, return_annotation=returns)
+
+
+class ModelTool(Generic[M, R]):
+    """A tool whose arguments are validated once, against one input model.
+
+    Args:
+        model: Input model declaring every argument and its constraints.
+        handler: Synchronous function receiving the validated model.
+    """
+
+    def __init__(self, model: type[M], handler: Callable[[M], R]) -> None:
+        self.model = model
+        self.handler = handler
+        self.__name__ = handler.__name__
+        self.__qualname__ = handler.__qualname__
+        self.__module__ = handler.__module__
+        self.__doc__ = handler.__doc__
+        self.__signature__ = _signature(
+            model, inspect.signature(handler).return_annotation
+        )
+        # Compiled once per model class by pydantic; kept to skip lookups.
+        self._validator = model.__pydantic_validator__
+        self.input_schema = model.model_json_schema()
+        # Clients may send lists/objects JSON-encoded in a string (as FastMCP
+        # tolerates); only these fields are decoded before validation.
+        self._json_fields = frozenset(
+            name
+            for name, schema in self.input_schema.get("properties", {}).items()
+            if _is_json_field(schema)
+        )
+
+    def validate(self, arguments: Mapping[str, Any]) -> M:
+        """Validate `arguments` into the input model (raises ValidationError)."""
+        if self._json_fields:
+            arguments = dict(arguments)
+            for name in self._json_fields & arguments.keys():
+                value = arguments[name]
+                if isinstance(value, str):
+                    try:
+                        arguments[name] = json.loads(value)
+                    except json.JSONDecodeError:
+                        pass  # left for the validator to report
+        with span("validate", model=self.model.__name__):
+            return self._validator.validate_python(arguments)  # type: ignore[no-any-return]
+
+    @traced("tool.run")
+    def run(self, arguments: Mapping[str, Any]) -> R:
+        """Validate and handle one call (raises ValidationError)."""
+        return self.handler(self.validate(arguments))
+
+    def __call__(self, *args: Any, **arguments: Any) -> R | dict[str, Any]:
+        if args:
+            names = list(self.__signature__.parameters)
+            if len(args) > len(names):
+                raise TypeError(
+                    f"{self.__name__}() takes {len(names)} positional arguments"
+                )
+            arguments = {**dict(zip(names, args)), **arguments}
+        try:
+            return self.run(arguments)
+        except ValidationError as e:
+            return {"error": validation_error(e)}
+
+    def __repr__(self) -> str:
+        return f"ModelTool({self.__name__}, {self.model.__name__})"
+
+
+def model_tool(model: type[M]) -> Callable[[Callable[[M], R]], ModelTool[M, R]]:
+    """Declare `model` as the single input model of the decorated handler."""
+
+    def decorate(handler: Callable[[M], R]) -> ModelTool[M, R]:
+        return ModelTool(model, handler)
+
+    return decorate
+
+
+__all__ = ["ModelTool", "model_tool", "validation_error"]
@@ -0,0 +1,612 @@
+"""Load generator for sizing and soak-testing the MCP server.
+
+Starts the server (one process per session over stdio, or a single HTTP
+server, optionally multi-worker) and drives N concurrent client sessions.
+Each session draws `tools/call` and `resources/read` requests from an
+agent script by weight, so the request mix is configurable. The run
+reports throughput, the latency distribution overall and per target, the
+error rate, and the server's resident memory sampled over time.
+
+Usage:
+    context-engineering-loadgen --sessions 20 --duration 60
+    context-engineering-loadgen --http --workers 4 --sessions 200 --rate 100
+    context-engineering-loadgen --script agent.json --output report.json
+
+A script is a JSON list of steps::
+
+    [{"tool": "analyze_task_complexity",
+      "arguments": {"task_description": "Fix the login bug"}, "weight": 3},
+     {"resource": "context://reference/layers", "weight": 1}]
+
+String arguments may use ``{session}`` (the session's ID) and ``{n}`` (the
+session's request counter) placeholders.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.types import CallToolResult, TextContent
+
+from context_engineering_mcp.workers import STATEFUL_TOOLS
+
+SERVER_MODULE = "context_engineering_mcp.server"
+# Tool responses that report a failure in their text rather than isError.
+_ERROR_PREFIXES = ("Input Validation Error", "Error", '{\n  "error"')
+
+_TASK = "Refactor the billing service and add integration tests for invoice export"
+DEFAULT_SCRIPT: list[dict[str, Any]] = [
+    {
+        "tool": "analyze_task_complexity",
+        "arguments": {"task_description": _TASK},
+        "weight": 3,
+    },
+    {
+        "tool": "get_protocol_shell",
+        "arguments": {"name": "reasoning.systematic", "render_mode": "compact"},
+        "weight": 2,
+    },
+    {
+        "tool": "understand_question",
+        "arguments": {"question": _TASK, "context": "Session {session}, turn {n}."},
+        "weight": 2,
+    },
+    {
+        "tool": "cell_kv_set",
+        "arguments": {"key": "turn", "value": "{n}", "session": "{session}"},
+        "weight": 3,
+    },
+    {"tool": "cell_kv_get", "arguments": {"session": "{session}"}, "weight": 3},
+    {
+        "tool": "cell_window_ingest",
+        "arguments": {
+            "event": "Turn {n}: ran the invoice export tests, 2 failures remain.",
+            "session": "{session}",
+            "max_items": 20,
+        },
+        "weight": 2,
+    },
+    {
+        "tool": "verify_logic",
+        "arguments": {
+            "claim": "The export bug is fixed.",
+            "reasoning_trace": "Patched rounding; reran tests; 2 failures remain.",
+        },
+        "weight": 1,
+    },
+    {"resource": "context://reference/layers", "weight": 1},
+    {"resource": "context://molecules/cot", "weight": 1},
+]
+
+
+@dataclass(frozen=True)
+class Step:
+    """One weighted request of an agent script."""
+
+    kind: str  # "tool" or "resource"
+    target: str
+    arguments: dict[str, Any] = field(default_factory=dict)
+    weight: float = 1.0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Step":
+        if "tool" in data:
+            kind, target = "tool", data["tool"]
+        elif "resource" in data:
+            kind, target = "resource", data["resource"]
+        else:
+            raise ValueError(f"step needs a 'tool' or 'resource': {data!r}")
+        weight = float(data.get("weight", 1.0))
+        if weight <= 0:
+            raise ValueError(f"step weight must be positive: {data!r}")
+        return cls(kind, target, dict(data.get("arguments", {})), weight)
+
+
+def load_script(path: Path | None = None) -> list[Step]:
+    """Parse an agent script, or return the built-in one."""
+    data = DEFAULT_SCRIPT if path is None else json.loads(path.read_text())
+    steps = [Step.from_dict(item) for item in data]
+    if not steps:
+        raise ValueError("agent script has no steps")
+    return steps
+
+
+def resource_share(steps: list[Step], share: float) -> list[Step]:
+    """Reweight steps so resource reads make up `share` of the requests."""
+    if not 0 <= share <= 1:
+        raise ValueError("resource share must be between 0 and 1")
+    tools = sum(s.weight for s in steps if s.kind == "tool")
+    resources = sum(s.weight for s in steps if s.kind == "resource")
+    if (share > 0 and not resources) or (share < 1 and not tools):
+        raise ValueError("script lacks the request kind needed for this share")
+    scaled = []
+    for step in steps:
+        if step.kind == "resource":
+            weight = step.weight / resources * share if resources else 0.0
+        else:
+            weight = step.weight / tools * (1 - share) if tools else 0.0
+        if weight > 0:
+            scaled.append(Step(step.kind, step.target, step.arguments, weight))
+    return scaled
+
+
+def _fill(value: Any, session: str, n: int) -> Any:
+    if isinstance(value, str):
+        return value.replace("{session}", session).replace("{n}", str(n))
+    if isinstance(value, list):
+        return [_fill(item, session, n) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, session, n) for key, item in value.items()}
+    return value
+
+
+def _is_error(result: CallToolResult) -> bool:
+    if result.isError:
+        return True
+    text = "".join(b.text for b in result.content if isinstance(b, TextContent))
+    return text.startswith(_ERROR_PREFIXES)
+
+
+# --- Server processes ---
+
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on the loopback interface."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def http_server(
+    workers: int = 1,
+    env: dict[str, str] | None = None,
+    startup_timeout: float = 30.0,
+) -> Iterator[str]:
+    """Run an HTTP server subprocess and yield its MCP endpoint URL."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", SERVER_MODULE, "--http"],
+        env={
+            **os.environ,
+            **(env or {}),
+            "PORT": str(port),
+            "HOST": "127.0.0.1",
+            "SUTRA_HTTP_WORKERS": str(workers),
+        },
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                urllib.request.urlopen(f"{base}/stats", timeout=1).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("HTTP server failed to start") from None
+                time.sleep(0.1)
+        yield f"{base}/mcp"
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+@asynccontextmanager
+async def open_session(
+    url: str | None = None, env: dict[str, str] | None = None
+) -> AsyncIterator[ClientSession]:
+    """Yield an initialized session: over HTTP to `url`, else a stdio server."""
+    if url is not None:
+        async with (
+            streamablehttp_client(url) as (read, write, _),
+            ClientSession(read, write) as session,
+        ):
+            await session.initialize()
+            yield session
+        return
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", SERVER_MODULE],
+        env={**os.environ, **(env or {})},
+    )
+    # Opening the null device does not block the loop.
+    with open(os.devnull, "w") as devnull:  # noqa: ASYNC230
+        async with (
+            stdio_client(params, errlog=devnull) as (read, write),
+            ClientSession(read, write) as session,
+        ):
+            await session.initialize()
+            yield session
+
+
+def _children(pid: int) -> list[int]:
+    children: list[int] = []
+    for task in Path(f"/proc/{pid}/task").glob("*/children"):
+        try:
+            children.extend(int(child) for child in task.read_text().split())
+        except OSError:
+            continue  # the thread exited
+    return children
+
+
+def _rss(pid: int) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass  # the process exited
+    return 0
+
+
+def server_rss() -> int | None:
+    """Return the summed RSS in bytes of every process this one started.
+
+    Covers stdio servers, the HTTP supervisor and its workers. Returns None
+    where `/proc` is unavailable.
+    """
+    if not Path("/proc/self/status").exists():
+        return None
+    total = 0
+    pending = _children(os.getpid())
+    while pending:
+        pid = pending.pop()
+        total += _rss(pid)
+        pending.extend(_children(pid))
+    return total
+
+
+# --- Load ---
+
+
+@dataclass
+class Recorder:
+    """Collects per-request outcomes and memory samples of a run."""
+
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    rss: list[tuple[float, int]] = field(default_factory=list)
+    messages: dict[str, int] = field(default_factory=dict)
+
+    def record(self, target: str, latency: float, error: str | None) -> None:
+        self.latencies.setdefault(target, []).append(latency)
+        if error is not None:
+            self.errors[target] = self.errors.get(target, 0) + 1
+            self.messages[error] = self.messages.get(error, 0) + 1
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        ordered = ordered * 2
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p90_ms": round(cuts[89] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+async def _request(session: ClientSession, step: Step, name: str, n: int) -> None:
+    if step.kind == "resource":
+        await session.read_resource(step.target)  # type: ignore[arg-type]
+        return
+    result = await session.call_tool(step.target, _fill(step.arguments, name, n))
+    if _is_error(result):
+        raise RuntimeError("tool reported an error")
+
+
+async def run_session(
+    index: int,
+    steps: list[Step],
+    recorder: Recorder,
+    stop_at: float,
+    requests: int | None = None,
+    rate: float | None = None,
+    timeout: float = 30.0,
+    url: str | None = None,
+    env: dict[str, str] | None = None,
+    seed: int = 0,
+) -> None:
+    """Drive one client session until `stop_at` or `requests` are sent.
+
+    Args:
+        index: Session number, used for its ID and random stream.
+        steps: Weighted agent script.
+        recorder: Where outcomes are collected.
+        stop_at: Monotonic time at which the session stops.
+        requests: Requests to send before stopping; whichever of the two
+            limits is reached first ends the session.
+        rate: Requests per second this session paces itself to.
+        timeout: Seconds before a request counts as failed.
+        url: HTTP endpoint; a stdio server is spawned when omitted.
+        env: Extra environment for a spawned stdio server.
+        seed: Base seed of the step sampler.
+    """
+    name = f"load-{index}"
+    pick = random.Random(seed + index)
+    weights = [step.weight for step in steps]
+    interval = 1.0 / rate if rate else 0.0
+    try:
+        async with open_session(url, env) as session:
+            n = 0
+            next_at = time.monotonic()
+            while time.monotonic() < stop_at and (requests is None or n < requests):
+                step = pick.choices(steps, weights)[0]
+                started = time.perf_counter()
+                error = None
+                try:
+                    await asyncio.wait_for(_request(session, step, name, n), timeout)
+                except asyncio.TimeoutError:
+                    error = "timeout"
+                except Exception as exc:  # noqa: BLE001 - every failure is data
+                    error = f"{type(exc).__name__}: {exc}"[:120]
+                recorder.record(step.target, time.perf_counter() - started, error)
+                n += 1
+                if interval:
+                    next_at += interval
+                    await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+    except Exception as exc:  # noqa: BLE001 - a failed session is an error
+        recorder.record("session", 0.0, f"{type(exc).__name__}: {exc}"[:120])
+
+
+async def _sample_rss(recorder: Recorder, started: float, interval: float) -> None:
+    while True:
+        rss = server_rss()
+        if rss is not None:
+            recorder.rss.append((round(time.monotonic() - started, 2), rss))
+        await asyncio.sleep(interval)
+
+
+async def generate_load(
+    steps: list[Step],
+    sessions: int,
+    duration: float = 30.0,
+    requests: int | None = None,
+    rate: float | None = None,
+    url: str | None = None,
+    env: dict[str, str] | None = None,
+    timeout: float = 30.0,
+    sample_interval: float = 1.0,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Run `sessions` concurrent sessions and return the load report.
+
+    Args:
+        steps: Weighted agent script.
+        sessions: Number of concurrent client sessions.
+        duration: Seconds to run for.
+        requests: Optional cap on requests per session.
+        rate: Optional target request rate across all sessions (per second).
+        url: HTTP endpoint; each session spawns a stdio server when omitted.
+        env: Extra environment for spawned stdio servers.
+        timeout: Seconds before a request counts as failed.
+        sample_interval: Seconds between server RSS samples.
+        seed: Seed of the step samplers, for reproducible mixes.
+    """
+    recorder = Recorder()
+    started = time.monotonic()
+    sampler = asyncio.create_task(_sample_rss(recorder, started, sample_interval))
+    per_session = rate / sessions if rate else None
+    try:
+        await asyncio.gather(
+            *(
+                run_session(
+                    index,
+                    steps,
+                    recorder,
+                    started + duration,
+                    requests,
+                    per_session,
+                    timeout,
+                    url,
+                    env,
+                    seed,
+                )
+                for index in range(sessions)
+            )
+        )
+    finally:
+        sampler.cancel()
+    return report(recorder, time.monotonic() - started, sessions, url)
+
+
+def report(
+    recorder: Recorder, elapsed: float, sessions: int, url: str | None
+) -> dict[str, Any]:
+    """Summarize a run: throughput, latencies, errors and memory."""
+    samples = [s for values in recorder.latencies.values() for s in values]
+    total = len(samples)
+    errors = sum(recorder.errors.values())
+    targets = {
+        target: {
+            "requests": len(values),
+            "errors": recorder.errors.get(target, 0),
+            **_percentiles(values),
+        }
+        for target, values in sorted(recorder.latencies.items())
+    }
+    rss = None
+    if recorder.rss:
+        values = [value for _, value in recorder.rss]
+        rss = {
+            "start_mb": round(values[0] / 2**20, 1),
+            "end_mb": round(values[-1] / 2**20, 1),
+            "peak_mb": round(max(values) / 2**20, 1),
+            "samples": [[t, round(v / 2**20, 1)] for t, v in recorder.rss],
+        }
+    return {
+        "transport": "http" if url else "stdio",
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "throughput_rpm": round(total / elapsed * 60) if elapsed else 0,
+        "latency": _percentiles(samples) if samples else {},
+        "targets": targets,
+        "error_messages": dict(
+            sorted(recorder.messages.items(), key=lambda item: -item[1])[:10]
+        ),
+        "rss": rss,
+    }
+
+
+def format_report(result: dict[str, Any]) -> str:
+    """Render a load report as a plain-text summary."""
+    lines = [
+        (
+            f"{result['transport']}: {result['sessions']} sessions, "
+            f"{result['requests']} requests in {result['elapsed_s']}s"
+        ),
+        (
+            f"throughput  {result['throughput_rps']:.1f} req/s "
+            f"({result['throughput_rpm']} req/min)"
+        ),
+        f"errors      {result['errors']} ({result['error_rate']:.2%})",
+    ]
+    latency = result["latency"]
+    if latency:
+        lines.append(
+            "latency     "
+            + "  ".join(
+                f"{key[:-3]} {latency[key]:.1f}ms"
+                for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+            )
+        )
+    if result["rss"]:
+        rss = result["rss"]
+        lines.append(
+            f"server RSS  start {rss['start_mb']}MB  end {rss['end_mb']}MB  "
+            f"peak {rss['peak_mb']}MB"
+        )
+    lines.append("")
+    lines.append(
+        f"{'target':<32}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    for target, stats in result["targets"].items():
+        lines.append(
+            f"{target:<32}{stats['requests']:>9}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}"
+        )
+    for message, count in result["error_messages"].items():
+        lines.append(f"error x{count}: {message}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="context-engineering-loadgen", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--http", action="store_true", help="Load the HTTP server.")
+    parser.add_argument(
+        "--url", help="Load an already running HTTP endpoint instead of starting one."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="HTTP worker processes to start; with more than one the built-in "
+        "script skips the stateful tools, which such servers withhold.",
+    )
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument("--requests", type=int, help="Cap on requests per session.")
+    parser.add_argument(
+        "--rate", type=float, help="Target requests per second across all sessions."
+    )
+    parser.add_argument("--script", type=Path, help="Agent script JSON file.")
+    parser.add_argument(
+        "--resource-share",
+        type=float,
+        help="Fraction of requests that are resource reads (reweights the script).",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout.")
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between RSS samples.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Step sampler seed.")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here.")
+    args = parser.parse_args(argv)
+    if args.sessions < 1:
+        parser.error("--sessions must be >= 1")
+
+    try:
+        steps = load_script(args.script)
+        if args.script is None and args.http and args.workers > 1:
+            # Multi-worker servers withhold the stateful tools.
+            steps = [step for step in steps if step.target not in STATEFUL_TOOLS]
+        if args.resource_share is not None:
+            steps = resource_share(steps, args.resource_share)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("mcp.client").setLevel(logging.WARNING)
+
+    def run(url: str | None, env: dict[str, str] | None) -> dict[str, Any]:
+        return asyncio.run(
+            generate_load(
+                steps,
+                args.sessions,
+                args.duration,
+                args.requests,
+                args.rate,
+                url,
+                env,
+                args.timeout,
+                args.sample_interval,
+                args.seed,
+            )
+        )
+
+    # Spawned servers keep their persistent state out of the user's data dir.
+    with tempfile.TemporaryDirectory(prefix="sutra-load-") as data:
+        env = {"SUTRA_DATA_DIR": data}
+        if args.url:
+            result = run(args.url, None)
+        elif args.http:
+            with http_server(args.workers, env) as url:
+                result = run(url, None)
+        else:
+            result = run(None, env)
+
+    print(format_report(result))
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""Per-tool and per-resource metrics with negligible call overhead.
+
+`MetricsRegistry` keeps one `Series` per tool or resource. Each series
+records calls, errors, validation failures, request and response sizes
+and a latency histogram. Counters are sharded per thread: every thread
+owns a preallocated row of integers and is its row's only writer, so
+recording takes no lock and allocates nothing beyond the integers
+themselves. Reads sum the rows.
+
+Cache statistics are pulled from registered callables only when a
+snapshot is taken. Snapshots are plain JSON; `render_prometheus` turns
+one (or several merged with `merge_snapshots`) into the Prometheus text
+exposition format.
+"""
+
+import logging
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from typing import Any, Final, Literal
+
+logger = logging.getLogger(__name__)
+
+SeriesKind = Literal["tool", "resource"]
+Outcome = Literal["ok", "error", "validation"]
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+LATENCY_BUCKETS: Final[tuple[float, ...]] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+_BOUNDS_NS: Final[tuple[int, ...]] = tuple(int(b * 1e9) for b in LATENCY_BUCKETS)
+
+# Column layout of a shard row.
+_CALLS, _ERRORS, _VALIDATION, _REQUEST_BYTES, _RESPONSE_BYTES, _LATENCY_NS = range(6)
+_BUCKETS: Final[int] = 6
+_WIDTH: Final[int] = _BUCKETS + len(LATENCY_BUCKETS) + 1
+
+
+class Series:
+    """Counters and latency histogram of one tool or resource."""
+
+    __slots__ = ("_local", "_rows", "kind", "name")
+
+    def __init__(self, kind: SeriesKind, name: str) -> None:
+        self.kind = kind
+        self.name = name
+        self._local = threading.local()
+        self._rows: list[list[int]] = []
+
+    def _row(self) -> list[int]:
+        try:
+            return self._local.row
+        except AttributeError:
+            row = [0] * _WIDTH
+            self._local.row = row
+            self._rows.append(row)  # atomic; runs once per thread
+            return row
+
+    def observe(
+        self,
+        elapsed_ns: int,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+        outcome: Outcome = "ok",
+    ) -> None:
+        """Record one call."""
+        row = self._row()
+        row[_CALLS] += 1
+        if outcome != "ok":
+            row[_ERRORS] += 1
+            if outcome == "validation":
+                row[_VALIDATION] += 1
+        row[_REQUEST_BYTES] += request_bytes
+        row[_RESPONSE_BYTES] += response_bytes
+        row[_LATENCY_NS] += elapsed_ns
+        row[_BUCKETS + bisect_left(_BOUNDS_NS, elapsed_ns)] += 1
+
+    def totals(self) -> list[int]:
+        """Return the column sums across all thread rows."""
+        totals = [0] * _WIDTH
+        for row in list(self._rows):
+            for column, value in enumerate(row):
+                totals[column] += value
+        return totals
+
+    @property
+    def calls(self) -> int:
+        return sum(row[_CALLS] for row in list(self._rows))
+
+    @property
+    def errors(self) -> int:
+        return sum(row[_ERRORS] for row in list(self._rows))
+
+    def snapshot(self) -> dict[str, Any]:
+        totals = self.totals()
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "calls": totals[_CALLS],
+            "errors": totals[_ERRORS],
+            "validation_failures": totals[_VALIDATION],
+            "request_bytes": totals[_REQUEST_BYTES],
+            "response_bytes": totals[_RESPONSE_BYTES],
+            "latency_seconds_sum": totals[_LATENCY_NS] / 1e9,
+            "latency_buckets": totals[_BUCKETS:],
+        }
+
+
+def quantile(buckets: list[int], q: float) -> float | None:
+    """Estimate a latency quantile (seconds) from histogram bucket counts.
+
+    Returns the upper bound of the bucket holding the quantile, or None
+    when there are no observations or it falls in the +Inf bucket.
+    """
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        seen += count
+        if seen >= rank:
+            return bound
+    return None
+
+
+class MetricsRegistry:
+    """Series of every tool and resource plus registered cache statistics."""
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str], Series] = {}
+        self._caches: dict[str, Callable[[], dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def series(self, kind: SeriesKind, name: str) -> Series:
+        """Return the series of a tool or resource, creating it on first use."""
+        series = self._series.get((kind, name))
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault((kind, name), Series(kind, name))
+        return series
+
+    def register_cache(self, name: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """Report `stats()` (numeric values) under `name` in every snapshot."""
+        self._caches[name] = stats
+
+    def totals(self, kind: SeriesKind) -> tuple[int, int]:
+        """Return (calls, errors) summed over every series of a kind."""
+        calls = errors = 0
+        for series in list(self._series.values()):
+            if series.kind == kind:
+                calls += series.calls
+                errors += series.errors
+        return calls, errors
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return all metrics as a JSON-serializable dict."""
+        caches = {}
+        for name, stats in list(self._caches.items()):
+            try:
+                caches[name] = {
+                    key: value
+                    for key, value in stats().items()
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                }
+            except Exception:  # a broken source must not hide the rest
+                logger.exception("Cache stats source %r failed", name)
+        return {
+            "latency_bucket_bounds": list(LATENCY_BUCKETS),
+            "series": [s.snapshot() for s in list(self._series.values())],
+            "caches": caches,
+        }
+
+
+def lru_stats(fn: Any) -> Callable[[], dict[str, Any]]:
+    """Adapt a `functools.lru_cache` function to a cache stats source."""
+
+    def stats() -> dict[str, Any]:
+        info = fn.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize or 0,
+            "hit_rate": info.hits / total if total else 0.0,
+        }
+
+    return stats
+
+
+def summarize(snapshot: dict[str, Any]) -> dict[str, Any]:
+    """Add estimated p50/p95/p99 (ms) to each series, hottest first."""
+    series = []
+    for item in sorted(snapshot["series"], key=lambda s: -s["calls"]):
+        estimates = {}
+        for label, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            bound = quantile(item["latency_buckets"], q)
+            estimates[label] = None if bound is None else bound * 1000
+        series.append({**item, **estimates})
+    return {**snapshot, "series": series}
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Sum snapshots from several processes into one."""
+    merged: dict[tuple[str, str], dict[str, Any]] = {}
+    caches: dict[str, dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for item in snapshot.get("series", []):
+            key = (item["kind"], item["name"])
+            into = merged.get(key)
+            if into is None:
+                merged[key] = {**item, "latency_buckets": list(item["latency_buckets"])}
+                continue
+            for field, value in item.items():
+                if field == "latency_buckets":
+                    into[field] = [a + b for a, b in zip(into[field], value)]
+                elif isinstance(value, (int, float)):
+                    into[field] += value
+        for name, stats in snapshot.get("caches", {}).items():
+            into_cache = caches.setdefault(name, {})
+            for field, value in stats.items():
+                into_cache[field] = into_cache.get(field, 0) + value
+    for stats in caches.values():  # rates do not sum; recompute them
+        if "hit_rate" in stats:
+            total = stats.get("hits", 0) + stats.get("misses", 0)
+            stats["hit_rate"] = stats.get("hits", 0) / total if total else 0.0
+    return {
+        "latency_bucket_bounds": list(LATENCY_BUCKETS),
+        "series": list(merged.values()),
+        "caches": caches,
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+_COUNTERS: Final[tuple[tuple[str, str, str], ...]] = (
+    ("calls", "sutra_calls_total", "Tool calls and resource reads."),
+    ("errors", "sutra_errors_total", "Calls that failed or returned an error."),
+    (
+        "validation_failures",
+        "sutra_validation_failures_total",
+        "Calls rejected by input validation.",
+    ),
+    (
+        "request_bytes",
+        "sutra_request_bytes_total",
+        "Approximate size of call arguments (characters of string values).",
+    ),
+    ("response_bytes", "sutra_response_bytes_total", "UTF-8 bytes returned."),
+)
+
+
+def render_prometheus(snapshot: dict[str, Any]) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = []
+    series = sorted(snapshot["series"], key=lambda s: (s["kind"], s["name"]))
+    for field, metric, help_text in _COUNTERS:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for item in series:
+            labels = _labels(kind=item["kind"], name=item["name"])
+            lines.append(f"{metric}{labels} {item[field]}")
+
+    metric = "sutra_latency_seconds"
+    lines.append(f"# HELP {metric} Call latency.")
+    lines.append(f"# TYPE {metric} histogram")
+    for item in series:
+        cumulative = 0
+        for bound, count in zip(
+            [*LATENCY_BUCKETS, float("inf")], item["latency_buckets"]
+        ):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _labels(kind=item["kind"], name=item["name"], le=le)
+            lines.append(f"{metric}_bucket{labels} {cumulative}")
+        labels = _labels(kind=item["kind"], name=item["name"])
+        lines.append(f"{metric}_sum{labels} {item['latency_seconds_sum']}")
+        lines.append(f"{metric}_count{labels} {item['calls']}")
+
+    stats_names = sorted(
+        {key for stats in snapshot["caches"].values() for key in stats}
+    )
+    for stat in stats_names:
+        metric = f"sutra_cache_{stat}"
+        lines.append(f"# HELP {metric} Cache statistic '{stat}'.")
+        lines.append(f"# TYPE {metric} gauge")
+        for name, stats in sorted(snapshot["caches"].items()):
+            if stat in stats:
+                lines.append(f"{metric}{_labels(cache=name)} {stats[stat]}")
+    return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "LATENCY_BUCKETS",
+    "MetricsRegistry",
+    "Series",
+    "lru_stats",
+    "merge_snapshots",
+    "quantile",
+    "render_prometheus",
+    "summarize",
+]
@@ -0,0 +1,406 @@
+"""FastMCP server with off-loop tool execution and per-response accounting.
+
+`SutraMCP` behaves like `FastMCP` with six additions:
+
+- Synchronous tool functions are registered behind async handlers that run
+  them on a bounded thread pool (`ToolExecutor`), so rendering, validation
+  and engine work never block the event loop serving other HTTP sessions.
+  The decorator still returns the original function for direct calls.
+- Tools declared with one input model (`dispatch.ModelTool`) are validated
+  once, by that model, which also provides their `inputSchema`. Invalid
+  input yields an `isError` result with a structured error object.
+- Every tool result is wrapped in a `CallToolResult` whose `_meta` reports
+  the estimated token count of the text returned to the client.
+- Every tool call and resource read is recorded in `metrics`
+  (`MetricsRegistry`): count, latency, sizes and error/validation outcome.
+- Calls and reads are traced (see `tracing`) as a root span with children
+  for execution on the pool (`tool.run`) and response serialization, so a
+  slow call's time can be attributed. Spans are no-ops unless configured.
+- A tool running on the pool can call `report_progress` to send MCP
+  progress notifications for its call, when the client asked for them.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Final, TypeVar, cast
+
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.server.fastmcp.tools import Tool
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import CallToolResult, ContentBlock, TextContent
+from pydantic import AnyUrl, ValidationError
+
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.dispatch import ModelTool, validation_error
+from context_engineering_mcp.metrics import MetricsRegistry, Outcome
+from context_engineering_mcp.tracing import span, traced
+
+TOOL_WORKERS_ENV: Final[str] = "SUTRA_TOOL_WORKERS"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# (progress, total, message) -> None; set for the duration of a tool call.
+ProgressCallback = Callable[[float, float | None, str | None], None]
+_progress: contextvars.ContextVar[ProgressCallback | None] = contextvars.ContextVar(
+    "sutra_progress", default=None
+)
+
+
+def report_progress(
+    progress: float, total: float | None = None, message: str | None = None
+) -> None:
+    """Report progress of the tool call being handled, from any thread.
+
+    Sends an MCP progress notification when the client supplied a progress
+    token; otherwise (or outside a tool call) does nothing. Notifications
+    are queued on the server's event loop, so the caller never blocks.
+    """
+    callback = _progress.get()
+    if callback is not None:
+        callback(progress, total, message)
+
+
+def default_tool_workers() -> int:
+    """Pool size from `$SUTRA_TOOL_WORKERS`, else the stdlib default."""
+    configured = os.getenv(TOOL_WORKERS_ENV)
+    if configured:
+        return max(1, int(configured))
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class ToolExecutor:
+    """Bounded thread pool for synchronous tool handlers.
+
+    Tracks how many calls are waiting for a worker (`queued`) and running
+    (`active`) so saturation is visible.
+
+    Args:
+        max_workers: Number of worker threads.
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        self.max_workers = max_workers or default_tool_workers()
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sutra-tool"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+
+    def configure(self, max_workers: int) -> None:
+        """Replace the pool with one of a different size."""
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        old, self._pool = (
+            self._pool,
+            ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="sutra-tool"
+            ),
+        )
+        self.max_workers = max_workers
+        old.shutdown(wait=False)
+
+    def _call(self, context: contextvars.Context, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return context.run(fn)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    async def run(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool and await its result."""
+        with self._lock:
+            self._queued += 1
+        call = functools.partial(fn, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        # Copy context variables so per-request state follows the call.
+        return await loop.run_in_executor(
+            self._pool, self._call, contextvars.copy_context(), call
+        )
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+def _split_result(result: Any) -> tuple[list[ContentBlock], dict[str, Any] | None]:
+    """Normalize the shapes FastMCP returns into (content, structured)."""
+    if isinstance(result, CallToolResult):
+        return list(result.content), result.structuredContent
+    if isinstance(result, tuple):
+        content, structured = result
+        return list(content), structured
+    return list(result), None
+
+
+def _text(content: Sequence[ContentBlock]) -> str:
+    return "".join(block.text for block in content if isinstance(block, TextContent))
+
+
+def argument_size(value: Any) -> int:
+    """Approximate the size of call arguments without serializing them.
+
+    Counts the characters of string values (keys included) and 8 per other
+    scalar, which tracks the JSON size closely for text-heavy arguments.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        size = 0
+        for key, item in value.items():
+            size += len(str(key))
+            size += len(item) if isinstance(item, str) else argument_size(item)
+        return size
+    if isinstance(value, (list, tuple)):
+        return sum(argument_size(item) for item in value)
+    return 8
+
+
+# Tools report bad input in their text (a pydantic message) rather than
+# isError; the message's head identifies it without scanning the body.
+_VALIDATION_MARKERS: Final[tuple[str, ...]] = (
+    "validation error",
+    "Validation Error",
+    "validation_error",
+)
+_ERROR_HEADS: Final[tuple[str, ...]] = (
+    "Error",
+    "Input Validation Error",
+    '{\n  "error"',
+)
+
+
+def classify(text: str, is_error: bool) -> Outcome:
+    """Return the outcome of a tool response: ok, error or validation."""
+    if not is_error and not text.startswith(_ERROR_HEADS):
+        return "ok"
+    head = text[:120]
+    if any(marker in head for marker in _VALIDATION_MARKERS):
+        return "validation"
+    return "error"
+
+
+def offload(fn: Callable[..., Any], executor: ToolExecutor) -> Callable[..., Any]:
+    """Return an async handler running a synchronous tool on `executor`.
+
+    Async callables are returned unchanged. The handler keeps the tool's
+    name, docstring and signature, so its schema is identical.
+    """
+    if inspect.iscoroutinefunction(fn):
+        return fn
+    # The span opens on the worker thread, so time queued is excluded.
+    run = traced("tool.run")(fn)
+
+    @functools.wraps(fn)
+    async def handler(*args: Any, **kwargs: Any) -> Any:
+        return await executor.run(run, *args, **kwargs)
+
+    return handler
+
+
+def error_result(payload: dict[str, Any]) -> CallToolResult:
+    """Return an `isError` result carrying `payload` as text and structure."""
+    return CallToolResult(
+        content=[TextContent(type="text", text=json.dumps(payload, indent=2))],
+        structuredContent=payload,
+        isError=True,
+    )
+
+
+class SutraMCP(FastMCP):
+    """FastMCP server running sync tools off-loop and annotating responses.
+
+    Args:
+        *args: Passed to `FastMCP`.
+        tool_workers: Size of the tool thread pool (defaults to
+            `$SUTRA_TOOL_WORKERS` or the stdlib default).
+        **kwargs: Passed to `FastMCP`.
+    """
+
+    def __init__(
+        self, *args: Any, tool_workers: int | None = None, **kwargs: Any
+    ) -> None:
+        self.executor = ToolExecutor(tool_workers)
+        self.metrics = MetricsRegistry()
+        self._model_tools: dict[str, ModelTool[Any, Any]] = {}
+        super().__init__(*args, **kwargs)
+
+    def tool(self, *args: Any, **kwargs: Any) -> Callable[[F], F]:
+        # Same decorator, typed to return what it decorates (e.g. a ModelTool).
+        return cast(Callable[[F], F], super().tool(*args, **kwargs))
+
+    def add_tool(
+        self,
+        fn: Callable[..., Any],
+        name: str | None = None,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        super().add_tool(offload(fn, self.executor), name, *args, **kwargs)
+        if isinstance(fn, ModelTool):
+            name = name or fn.__name__
+            tool = self._tool_manager.get_tool(name)
+            if tool is not None:
+                tool.parameters = fn.input_schema
+                self._model_tools[name] = fn
+
+    def _progress_sender(self) -> ProgressCallback | None:
+        try:
+            request = self._mcp_server.request_context
+        except LookupError:
+            return None
+        token = request.meta.progressToken if request.meta else None
+        if token is None:
+            return None
+        loop = asyncio.get_running_loop()
+        session = request.session
+
+        def send(progress: float, total: float | None, message: str | None) -> None:
+            notification = session.send_progress_notification(
+                progress_token=token, progress=progress, total=total, message=message
+            )
+            # Scheduled in call order; the tool does not wait for delivery.
+            asyncio.run_coroutine_threadsafe(notification, loop)
+
+        return send
+
+    async def _execute(self, tool: Tool, arguments: dict[str, Any]) -> Any:
+        # FastMCP's Tool.run, split so execution and serialization are traced
+        # separately, with model tools validated only by their model.
+        model_tool = self._model_tools.get(tool.name)
+        # Set before dispatch: the pool copies the context into the worker.
+        progress = _progress.set(self._progress_sender())
+        try:
+            return await self._execute_traced(tool, model_tool, arguments)
+        finally:
+            _progress.reset(progress)
+
+    async def _execute_traced(
+        self,
+        tool: Tool,
+        model_tool: ModelTool[Any, Any] | None,
+        arguments: dict[str, Any],
+    ) -> Any:
+        with span("tool.execute"):
+            if model_tool is None:
+                raw = await tool.run(
+                    arguments, context=self.get_context(), convert_result=False
+                )
+            else:
+                try:
+                    raw = await self.executor.run(model_tool.run, arguments)
+                except ValidationError as e:
+                    return error_result({"error": validation_error(e)})
+                except Exception as e:
+                    raise ToolError(f"Error executing tool {tool.name}: {e}") from e
+        with span("serialize"):
+            try:
+                return tool.fn_metadata.convert_result(raw)
+            except Exception as e:
+                raise ToolError(f"Error executing tool {tool.name}: {e}") from e
+
+    async def call_tool(  # type: ignore[override]
+        self, name: str, arguments: dict[str, Any]
+    ) -> CallToolResult:
+        # Unknown names share one series so clients cannot grow the registry.
+        tool = self._tool_manager.get_tool(name)
+        series = self.metrics.series("tool", name if tool else "<unknown>")
+        started = time.perf_counter_ns()
+        with span("tool.call", tool=name) as root:
+            try:
+                if tool is None:
+                    result = await super().call_tool(name, arguments)
+                else:
+                    result = await self._execute(tool, arguments)
+            except Exception as e:
+                outcome = classify(str(e), True)
+                series.observe(
+                    time.perf_counter_ns() - started,
+                    argument_size(arguments),
+                    0,
+                    outcome,
+                )
+                raise
+            with span("response.meta"):
+                content, structured = _split_result(result)
+                is_error = isinstance(result, CallToolResult) and result.isError
+                text = _text(content)
+                size = len(text.encode())
+                tokens = estimate_tokens(text)
+            outcome = classify(text, is_error)
+            root.set("outcome", outcome)
+            root.set("response_bytes", size)
+        series.observe(
+            time.perf_counter_ns() - started, argument_size(arguments), size, outcome
+        )
+        return CallToolResult(
+            content=content,
+            structuredContent=structured,
+            isError=is_error,
+            _meta={"tokens": tokens, "bytes": size},
+        )
+
+    async def read_resource(self, uri: AnyUrl | str) -> Iterable[ReadResourceContents]:
+        started = time.perf_counter_ns()
+        try:
+            with span("resource.read", uri=str(uri)):
+                contents = list(await super().read_resource(uri))
+        except Exception as e:
+            # Unknown URIs share one series so clients cannot grow the registry.
+            name = "<unknown>" if "Unknown resource" in str(e) else str(uri)
+            self.metrics.series("resource", name).observe(
+                time.perf_counter_ns() - started, 0, 0, "error"
+            )
+            raise
+        size = sum(
+            len(c.content.encode()) if isinstance(c.content, str) else len(c.content)
+            for c in contents
+        )
+        self.metrics.series("resource", str(uri)).observe(
+            time.perf_counter_ns() - started, 0, size
+        )
+        return contents
+
+    def stats(self) -> dict[str, Any]:
+        """Return this process's tool call counters and pool state."""
+        calls, errors = self.metrics.totals("tool")
+        return {
+            "tool_calls": calls,
+            "tool_errors": errors,
+            "executor": self.executor.stats(),
+        }
+
+
+__all__ = [
+    "TOOL_WORKERS_ENV",
+    "SutraMCP",
+    "ToolExecutor",
+    "argument_size",
+    "classify",
+    "default_tool_workers",
+    "error_result",
+    "offload",
+    "report_progress",
+]
@@ -1,66 +1,142 @@
-import sys
+import argparse
+import json
+import os
 from typing import Any
 
-from mcp.server.fastmcp import FastMCP
 from pydantic import BaseModel, Field, ValidationError
 
 from context_engineering_mcp.cognitive import register_thinking_models
+from context_engineering_mcp.cognitive.thinking_models import (
+    THINKING_MODEL_TEMPLATES,
+    THINKING_MODEL_TOOLS,
+)
 from context_engineering_mcp.core import (
     CELL_PROTOCOL_REGISTRY,
     MOLECULAR_CONTEXT_FUNC,
+    RENDER_CACHE,
+    RenderMode,
+    RenderModeInput,
+    compact_text,
     format_protocol_shell,
+    get_catalog,
     get_cell_protocol_template,
+    get_program_runner,
     get_program_template,
     get_protocol_template,
+    register_episodic_cell,
+    register_example_store,
+    register_key_value_cell,
+    register_molecular_builder,
+    register_program_runtime,
+    register_windowed_cell,
+)
+from context_engineering_mcp.core.matching import word_forms
+from context_engineering_mcp.core.molecular import features as example_features
+from context_engineering_mcp.core.names import NameIndex
+from context_engineering_mcp.core.search import SearchDocument, TechniqueSearch
+from context_engineering_mcp.dispatch import ModelTool, model_tool, validation_error
+from context_engineering_mcp.metrics import lru_stats, summarize
+from context_engineering_mcp.runtime import SutraMCP
+from context_engineering_mcp.systems import (
+    get_organ_template,
+    get_registry_cache,
+    register_distiller,
+    register_registry_cache,
+    register_research_pipeline,
+    route_from_registry,
+    route_task,
+)
+from context_engineering_mcp.tracing import (
+    TRACE_ENV,
+    TracedModel,
+    configure_tracing,
+    exporter_from_spec,
+    span,
+)
+from context_engineering_mcp.workers import (
+    WORKERS_ENV,
+    serve_http,
 )
-from context_engineering_mcp.systems import get_organ_template
 
-# Initialize FastMCP server
-mcp = FastMCP("Context Engineering MCP")
+# Initialize FastMCP server (tool responses carry a token estimate in `_meta`)
+mcp = SutraMCP("Context Engineering MCP")
 
 # Register cognitive tools
 register_thinking_models(mcp)
 
+# Register cell engines
+register_key_value_cell(mcp)
+register_windowed_cell(mcp)
+register_episodic_cell(mcp)
+
+# Register the prompt-program runtime and molecule builder
+register_program_runtime(mcp)
+register_molecular_builder(mcp)
+register_example_store(mcp)
+
+# Register organ phases
+register_distiller(mcp)
+register_registry_cache(mcp)
+register_research_pipeline(mcp)
+
+# Cache statistics reported by context://metrics
+mcp.metrics.register_cache("render", RENDER_CACHE.stats)
+mcp.metrics.register_cache("compact_text", lru_stats(compact_text))
+mcp.metrics.register_cache("word_forms", lru_stats(word_forms))
+mcp.metrics.register_cache("example_features", lru_stats(example_features))
+mcp.metrics.register_cache("registry", lambda: get_registry_cache().stats())
+mcp.metrics.register_cache("templates", lambda: get_catalog().stats())
+mcp.metrics.register_cache("program_steps", lambda: get_program_runner().cache.stats())
+
 
 # --- Input Models ---
 
 
-class TechniqueGuideInput(BaseModel):
+class TechniqueGuideInput(TracedModel):
+    query: str | None = Field(
+        None,
+        max_length=1000,
+        description="Free-text description of the task; ranks techniques by relevance.",
+    )
     category: str = Field(
         "all",
-        pattern="^(reasoning|workflow|code|project|all)$",
-        description="Filter category.",
+        pattern=(
+            "^(all|reasoning|workflow|code|project|memory|orchestration"
+            "|protocol|cell|organ|program|thinking_model)$"
+        ),
+        description="Filter by category, or by kind (protocol, cell, organ, program, thinking_model).",
     )
+    limit: int = Field(5, ge=1, le=25, description="Maximum number of results.")
 
 
-class TaskComplexityInput(BaseModel):
+class TaskComplexityInput(TracedModel):
     task_description: str = Field(
         ..., min_length=5, description="The user's prompt or task."
     )
 
 
-class ProtocolShellInput(BaseModel):
+class ProtocolShellInput(RenderModeInput):
     name: str = Field("MyProtocol", min_length=1, description="Protocol name.")
     intent: str | None = Field(None, description="Optional intent.")
 
 
-class PromptProgramInput(BaseModel):
+class PromptProgramInput(RenderModeInput):
     program_type: str = Field(
         "math", pattern="^(math|debate)$", description="Program type."
     )
 
 
-class CellProtocolInput(BaseModel):
+class CellProtocolInput(RenderModeInput):
     name: str = Field(
         "cell.protocol.key_value", min_length=1, description="Cell protocol name."
     )
 
 
-class OrganInput(BaseModel):
+class OrganInput(RenderModeInput):
     name: str = Field("tool_master", min_length=1, description="Organ name.")
 
 
-class DesignArchitectureInput(BaseModel):
+class DesignArchitectureInput(TracedModel):
     goal: str = Field(
         ..., min_length=5, description="The goal of the system to design."
     )
@@ -69,11 +145,34 @@ class DesignArchitectureInput(BaseModel):
     )
 
 
+class MolecularTemplateInput(RenderModeInput):
+    pass
+
+
+class BatchRequest(BaseModel):
+    tool: str = Field(..., min_length=1, description="Template tool to invoke.")
+    arguments: dict[str, Any] = Field(
+        default_factory=dict, description="Arguments for the template tool."
+    )
+
+
+class BatchRenderInput(TracedModel):
+    requests: list[BatchRequest] = Field(
+        ..., min_length=1, max_length=64, description="Sub-requests to render."
+    )
+
+
 # --- Tools ---
 
 
+def _render(template: str, render_mode: RenderMode) -> str:
+    with span("render", mode=render_mode):
+        return compact_text(template) if render_mode == "compact" else template
+
+
 @mcp.tool()
-def design_context_architecture(goal: str, constraints: str | None = None) -> dict:
+@model_tool(DesignArchitectureInput)
+def design_context_architecture(model: DesignArchitectureInput) -> dict:
     """
     Architects a custom context system based on a high-level goal (The Architect).
     Returns a blueprint of Sutra components (Molecules, Cells, Organs, Thinking Models).
@@ -85,11 +184,6 @@ def design_context_architecture(goal: str, constraints: str | None = None) -> di
         goal: The user's objective (e.g., "Build a writing assistant that learns my style").
         constraints: Optional limits (e.g., "Must be lightweight").
     """
-    try:
-        model = DesignArchitectureInput(goal=goal, constraints=constraints)
-    except ValidationError as e:
-        return {"error": str(e)}
-
     g = model.goal.lower()
     c = (model.constraints or "").lower()
 
@@ -139,20 +233,43 @@ def design_context_architecture(goal: str, constraints: str | None = None) -> di
     return blueprint
 
 
+def _thinking_model_documents() -> list[SearchDocument]:
+    return [
+        SearchDocument.from_template(
+            "thinking_model",
+            name,
+            "reasoning",
+            template.source,
+            call=f"{name}({', '.join(template.fields)})",
+        )
+        for name, template in THINKING_MODEL_TEMPLATES.items()
+    ]
+
+
+TECHNIQUE_SEARCH = TechniqueSearch(extra=_thinking_model_documents)
+
+
 @mcp.tool()
-def get_technique_guide(category: str = "all") -> str:
+@model_tool(TechniqueGuideInput)
+def get_technique_guide(model: TechniqueGuideInput) -> str:
     """
-    Returns a guide to available Context Engineering techniques (The Librarian).
+    Searches the Context Engineering techniques (The Librarian).
     Use this to discover the best tool for a given task.
 
+    With a `query`, returns the best-matching protocols, cells, organs,
+    programs and thinking models, each with a snippet and the call that
+    fetches it. Without one, returns the overview guide (or, with a
+    category, every technique in it).
+
     Args:
-        category: Filter by 'reasoning', 'workflow', 'code', 'project', or 'all'.
+        query: Free-text description of the task (e.g., "debug failing tests").
+        category: Filter by 'reasoning', 'workflow', 'code', 'project', 'memory',
+            'orchestration', a kind ('protocol', 'cell', 'organ', 'program',
+            'thinking_model'), or 'all'.
+        limit: Maximum number of results.
     """
-    try:
-        _ = TechniqueGuideInput(category=category)
-    except ValidationError as e:
-        return f"Input Validation Error: {e}"
-
+    if model.query or model.category != "all":
+        return _format_hits(model.query or "", model.category, model.limit)
     guide = """
     # Context Engineering Technique Guide
 
@@ -170,151 +287,126 @@ def get_technique_guide(category: str = "all") -> str:
     **Usage:**
     - **YOLO Mode**: Call `analyze_task_complexity` to get a quick tool recommendation.
     - **Constructor Mode**: Call `design_context_architecture` to get a full system blueprint.
+    - **Search**: Call `get_technique_guide(query="...")` for ranked matches from the full catalog.
     """
-    # Simple filtering (mock implementation for now based on description)
-    # Ideally, this would filter the text, but the current implementation returns static text.
-    # The validation ensures 'category' is safe.
     return guide
 
 
+def _format_hits(query: str, category: str, limit: int) -> str:
+    hits = TECHNIQUE_SEARCH.search(query, category=category, limit=limit)
+    title = f'"{query}"' if query else "all"
+    if not hits:
+        return (
+            f"# Technique Search: {title} (category: {category})\n\n"
+            "No matching techniques. Try fewer words or category='all'."
+        )
+    lines = [f"# Technique Search: {title} (category: {category})", ""]
+    for rank, hit in enumerate(hits, 1):
+        doc = hit.document
+        score = f" · score {hit.score:.2f}" if query else ""
+        lines.append(f"{rank}. **{doc.name}** — {doc.kind} · {doc.category}{score}")
+        lines.append(f"   `{doc.call}`")
+        if hit.snippet:
+            lines.append(f"   {hit.snippet}")
+    return "\n".join(lines)
+
+
 @mcp.tool()
-def analyze_task_complexity(task_description: str) -> dict:
+@model_tool(TaskComplexityInput)
+def analyze_task_complexity(model: TaskComplexityInput) -> dict:
     """
     Analyzes a task to recommend the most efficient tool (The Router).
+    Consults the learned registry cache first, then keyword heuristics.
 
     Args:
         task_description: The user's prompt or task.
     """
-    try:
-        model = TaskComplexityInput(task_description=task_description)
-    except ValidationError as e:
-        return {"error": str(e)}
-
-    task = model.task_description.lower()
-
-    # Strategy: Constructor Mode (Build/Design)
-    if any(
-        w in task
-        for w in [
-            "build",
-            "create",
-            "design",
-            "architect",
-            "system",
-            "bot",
-            "assistant",
-        ]
-    ):
-        return {
-            "strategy": "constructor",
-            "complexity": "Variable",
-            "recommended_tool": "design_context_architecture",
-            "reasoning": "User wants to build a system/agent. Use the Architect to design a blueprint.",
-        }
-
-    # Strategy: YOLO Mode (Direct Solve)
-    if any(w in task for w in ["project", "repo", "codebase", "architecture"]):
-        return {
-            "strategy": "yolo",
-            "complexity": "Medium",
-            "recommended_tool": "project.explore",
-            "reasoning": "Task involves project-level understanding.",
-        }
-    elif any(w in task for w in ["test", "tdd", "verify"]):
-        return {
-            "strategy": "yolo",
-            "complexity": "High",
-            "recommended_tool": "workflow.test_driven",
-            "reasoning": "Task involves testing or verification workflows.",
-        }
-    elif any(w in task for w in ["analyze", "reason", "think", "solve", "complex"]):
-        return {
-            "strategy": "yolo",
-            "complexity": "High",
-            "recommended_tool": "reasoning.systematic",
-            "reasoning": "Task requires structured reasoning.",
-        }
-    else:
-        return {
-            "strategy": "yolo",
-            "complexity": "Low",
-            "recommended_tool": "Standard Molecule",
-            "reasoning": "Task appears simple. Use a basic prompt or few-shot molecule.",
-        }
+    # Learned intent->tool mappings (see `registry_record`) win over heuristics.
+    learned = route_from_registry(model.task_description)
+    if learned is not None:
+        return learned
+    return route_task(model.task_description)
 
 
 @mcp.tool()
-def get_protocol_shell(name: str = "MyProtocol", intent: str | None = None) -> str:
+@model_tool(ProtocolShellInput)
+def get_protocol_shell(model: ProtocolShellInput) -> str:
     """
     Returns a Protocol Shell. Can return a specific pre-defined template or a blank shell.
 
+    Only a template's exact name or declared alias selects it; any other name
+    builds a custom shell, with a "did you mean" line when a template is close.
+
     Args:
         name: The name of the protocol (e.g., 'reasoning.systematic') OR a custom name.
         intent: (Optional) The intent if creating a custom shell.
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
     """
-    try:
-        model = ProtocolShellInput(name=name, intent=intent)
-    except ValidationError as e:
-        return f"Input Validation Error: {e}"
-
-    template = get_protocol_template(model.name)
+    template = get_protocol_template(model.name, exact=True)
     if template:
-        return template
+        return _render(template, model.render_mode)
 
     intent_str = model.intent or "Define your intent here"
-    return format_protocol_shell(name=model.name, intent=intent_str)
+    shell = format_protocol_shell(
+        name=model.name, intent=intent_str, render_mode=model.render_mode
+    )
+    resolution = get_catalog().lookup("protocol", model.name)
+    near = (resolution.name,) if resolution.name else resolution.suggestions
+    if not near:
+        return shell
+    return f"// Custom shell; did you mean: {', '.join(near)}?\n{shell}"
 
 
 @mcp.tool()
-def get_molecular_template() -> str:
+@model_tool(MolecularTemplateInput)
+def get_molecular_template(model: MolecularTemplateInput) -> str:
     """
     Returns the Python function for creating molecular contexts (Module 02).
-    Use this to programmatically construct few-shot prompts.
+    Use this to programmatically construct few-shot prompts; to have the
+    server select examples under a token budget, use build_molecular_context.
+
+    Args:
+        render_mode: 'full' or 'compact' (blank lines dropped, 1-space indents).
     """
+    if model.render_mode == "compact":
+        return compact_text(MOLECULAR_CONTEXT_FUNC, preserve_indent=True)
     return MOLECULAR_CONTEXT_FUNC
 
 
 @mcp.tool()
-def get_prompt_program(program_type: str = "math") -> str:
+@model_tool(PromptProgramInput)
+def get_prompt_program(model: PromptProgramInput) -> str:
     """
     Returns a functional pseudo-code prompt template (Module 07).
 
     Args:
         program_type: The type of program ('math', 'debate').
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
     """
-    try:
-        model = PromptProgramInput(program_type=program_type)
-    except ValidationError as e:
-        return f"Input Validation Error: {e}"
-
-    return get_program_template(model.program_type)
+    return _render(get_program_template(model.program_type), model.render_mode)
 
 
 @mcp.tool()
-def get_cell_protocol(name: str = "cell.protocol.key_value") -> str:
+@model_tool(CellProtocolInput)
+def get_cell_protocol(model: CellProtocolInput) -> str:
     """
     Returns a cell protocol template describing memory behaviors.
 
     Args:
         name: Identifier of the cell protocol (key_value, windowed, episodic).
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
     """
-    try:
-        model = CellProtocolInput(name=name)
-    except ValidationError as e:
-        return f"Input Validation Error: {e}"
-
     template = get_cell_protocol_template(model.name)
     if template:
-        return template
+        return _render(template, model.render_mode)
 
-    available = ", ".join(sorted(CELL_PROTOCOL_REGISTRY.keys()))
-    return (
-        f"// Cell protocol '{model.name}' not found. Available protocols: {available}"
-    )
+    resolution = get_catalog().lookup("cell", model.name)
+    return resolution.not_found("Cell protocol", CELL_PROTOCOL_REGISTRY)
 
 
 @mcp.tool()
-def get_organ(name: str = "tool_master") -> str:
+@model_tool(OrganInput)
+def get_organ(model: OrganInput) -> str:
     """
     Returns an organ template for multi-agent orchestration (Layer 4).
 
@@ -323,13 +415,88 @@ def get_organ(name: str = "tool_master") -> str:
 
     Args:
         name: Identifier of the organ ('debate_council' for multi-perspective debate).
+        render_mode: 'full' or 'compact' (whitespace-stripped) output.
     """
+    return _render(get_organ_template(model.name), model.render_mode)
+
+
+# Template tools addressable from `batch_render`, keyed by tool name.
+TEMPLATE_TOOLS: dict[str, ModelTool[Any, str]] = {
+    "get_protocol_shell": get_protocol_shell,
+    "get_molecular_template": get_molecular_template,
+    "get_prompt_program": get_prompt_program,
+    "get_cell_protocol": get_cell_protocol,
+    "get_organ": get_organ,
+    **THINKING_MODEL_TOOLS,
+}
+_TEMPLATE_TOOL_NAMES = NameIndex({name: () for name in TEMPLATE_TOOLS})
+
+
+def _render_batch_item(index: int, request: BatchRequest) -> dict[str, Any]:
+    tool = TEMPLATE_TOOLS.get(request.tool)
+    if tool is None:
+        # Tool names are not auto-corrected; the closest ones are suggested.
+        resolution = _TEMPLATE_TOOL_NAMES.resolve(request.tool)
+        suggestions = resolution.suggestions or (
+            (resolution.name,) if resolution.name else ()
+        )
+        available = ", ".join(sorted(TEMPLATE_TOOLS))
+        return {
+            "index": index,
+            "tool": request.tool,
+            "ok": False,
+            "error": {
+                "type": "unknown_tool",
+                "message": f"Unknown template tool. Available: {available}",
+                "suggestions": list(suggestions),
+            },
+        }
+
     try:
-        model = OrganInput(name=name)
+        model = tool.validate(request.arguments)
     except ValidationError as e:
-        return f"Input Validation Error: {e}"
+        return {
+            "index": index,
+            "tool": request.tool,
+            "ok": False,
+            "error": validation_error(e),
+        }
+
+    try:
+        result = tool.handler(model)
+    except Exception as e:  # noqa: BLE001 - isolate failures to this item
+        return {
+            "index": index,
+            "tool": request.tool,
+            "ok": False,
+            "error": {"type": "render_error", "message": str(e)},
+        }
+    return {"index": index, "tool": request.tool, "ok": True, "result": result}
+
+
+@mcp.tool()
+@model_tool(BatchRenderInput)
+def batch_render(model: BatchRenderInput) -> dict:
+    """
+    Renders several template tools in one call and returns results in order.
 
-    return get_organ_template(model.name)
+    Each sub-request names a template tool (e.g. 'get_protocol_shell',
+    'get_cell_protocol', 'get_organ', 'get_prompt_program', 'verify_logic')
+    and its arguments. A failing item reports its own error without failing
+    the rest of the batch.
+
+    Args:
+        requests: Ordered list of {"tool": ..., "arguments": {...}} objects.
+    """
+    results = [
+        _render_batch_item(index, request)
+        for index, request in enumerate(model.requests)
+    ]
+    return {
+        "results": results,
+        "succeeded": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+    }
 
 
 # --- Resources ---
@@ -389,12 +556,62 @@ def get_neural_fields() -> str:
     """
 
 
+@mcp.resource("context://runtime/executor")
+def get_executor_stats() -> str:
+    """
+    Returns tool thread-pool statistics (size, queued, active, completed calls).
+    """
+    return json.dumps(mcp.executor.stats())
+
+
+@mcp.resource("context://metrics")
+def get_metrics() -> str:
+    """
+    Returns per-tool and per-resource metrics of this server process: call
+    and error counts, validation failures, request/response sizes, latency
+    histograms with estimated percentiles (hottest first), and cache stats.
+    """
+    return json.dumps(summarize(mcp.metrics.snapshot()))
+
+
 def main():
-    if "--http" in sys.argv:
-        import os
+    parser = argparse.ArgumentParser(prog="context-engineering-mcp")
+    parser.add_argument("--http", action="store_true", help="Serve over HTTP.")
+    parser.add_argument(
+        "--host",
+        default=os.getenv("HOST", "127.0.0.1"),
+        help="HTTP interface to bind (default: $HOST or 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv(WORKERS_ENV, "1")),
+        help="HTTP worker processes sharing the port; more than one withholds "
+        "the stateful cell, registry and example tools "
+        "(default: $SUTRA_HTTP_WORKERS).",
+    )
+    parser.add_argument(
+        "--tool-workers",
+        type=int,
+        default=None,
+        help="Threads running tool handlers (default: $SUTRA_TOOL_WORKERS).",
+    )
+    parser.add_argument(
+        "--trace",
+        default=os.getenv(TRACE_ENV),
+        help="Export spans to jsonl:<path> or otlp:<url> (default: $SUTRA_TRACE).",
+    )
+    args = parser.parse_args()
+    if args.tool_workers:
+        mcp.executor.configure(args.tool_workers)
+    try:
+        configure_tracing(exporter_from_spec(args.trace))
+    except (OSError, ValueError) as e:
+        parser.error(f"--trace: {e}")
 
+    if args.http:
         port = int(os.getenv("PORT", "8000"))
-        mcp.run(transport="http", port=port)
+        serve_http(mcp, args.host, port, workers=max(1, args.workers))
     else:
         mcp.run()
 
@@ -1,8 +1,37 @@
 """Systems layer modules for orchestrating multi-agent Context Engineering workflows."""
 
-from .organs import ORGAN_DEBATE_COUNCIL, get_organ_template
+from . import organs
+from .distiller import Distiller, distill_output, register_distiller
+from .organs import get_organ_template
+from .pipeline import ResearchPipeline, register_research_pipeline
+from .registry import (
+    RegistryCache,
+    get_registry_cache,
+    register_registry_cache,
+    route_from_registry,
+)
+from .router import ROUTING_RULES, route_task
+
+
+def __getattr__(name: str) -> str:
+    # Organ constants resolve lazily so importing the package loads no bodies.
+    if name == "ORGAN_DEBATE_COUNCIL":
+        return organs.ORGAN_DEBATE_COUNCIL
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
+    "Distiller",
+    "distill_output",
+    "register_distiller",
     "ORGAN_DEBATE_COUNCIL",
     "get_organ_template",
+    "ResearchPipeline",
+    "register_research_pipeline",
+    "RegistryCache",
+    "get_registry_cache",
+    "register_registry_cache",
+    "route_from_registry",
+    "ROUTING_RULES",
+    "route_task",
 ]
@@ -0,0 +1,452 @@
+"""Distiller phase of the Tool-Master organ (Layer 4).
+
+Server-side implementation of `/phase.distiller`: raw downstream tool
+output is pruned before it reaches the model. JSON is walked once, dropping
+ID, timestamp and null fields, collapsing long arrays into a count plus a
+few distinct samples, and truncating long strings behind a content hash.
+Input can be fed in chunks. Plain text and JSON Lines are distilled line
+by line as each line completes, so their working state is bounded by the
+rules. A JSON document is parsed whole once its last chunk arrives, so its
+memory grows with its size. The `distill_output` tool receives the raw
+output as one argument and distills it in a single pass.
+"""
+
+import hashlib
+import itertools
+import json
+import re
+from collections.abc import Iterable
+from typing import Any, Final, Literal
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel
+
+DistillFormat = Literal["auto", "json", "jsonl", "text"]
+
+_HASH_SIZE: Final[int] = 6
+# Items examined per requested sample when collapsing a long array.
+_SAMPLE_SCAN: Final[int] = 8
+# Input blocks longer than this have their token count extrapolated from
+# evenly spaced windows instead of scanned in full.
+_TOKEN_WINDOW: Final[int] = 1024
+_TOKEN_WINDOWS: Final[int] = 8
+
+_ID_KEYS: Final[frozenset[str]] = frozenset(
+    {"id", "ids", "_id", "uuid", "guid", "etag", "node_id"}
+)
+_ID_SUFFIXES: Final[tuple[str, ...]] = ("_id", "_ids", "-id", "_uuid", "_guid")
+_TIME_KEYS: Final[frozenset[str]] = frozenset(
+    {"ts", "timestamp", "time", "date", "datetime", "created", "updated", "modified"}
+)
+_TIME_SUFFIXES: Final[tuple[str, ...]] = ("_at", "_ts", "_time", "_date", "timestamp")
+# camelCase keys such as `userId` or `createdAt`.
+_CAMEL_ID: Final[re.Pattern[str]] = re.compile(r"[a-z0-9](?:Id|ID|Ids|IDs|Uuid)$")
+_CAMEL_TIME: Final[re.Pattern[str]] = re.compile(r"[a-z0-9](?:At|Time|Date|Timestamp)$")
+
+_TIMESTAMP: Final[str] = (
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+_UUID: Final[str] = r"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}"
+_TIMESTAMP_VALUE: Final[re.Pattern[str]] = re.compile(_TIMESTAMP)
+_UUID_VALUE: Final[re.Pattern[str]] = re.compile(_UUID)
+_TIMESTAMP_IN_TEXT: Final[re.Pattern[str]] = re.compile(rf"\[?{_TIMESTAMP}\]?\s*")
+_ID_IN_TEXT: Final[re.Pattern[str]] = re.compile(
+    rf"\b(?:{_UUID}|[0-9a-f]{{24,}})\b", re.IGNORECASE
+)
+
+
+def _is_id_key(key: str) -> bool:
+    lowered = key.lower()
+    return (
+        lowered in _ID_KEYS
+        or lowered.endswith(_ID_SUFFIXES)
+        or _CAMEL_ID.search(key) is not None
+    )
+
+
+def _is_time_key(key: str) -> bool:
+    lowered = key.lower()
+    return (
+        lowered in _TIME_KEYS
+        or lowered.endswith(_TIME_SUFFIXES)
+        or _CAMEL_TIME.search(key) is not None
+    )
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=_HASH_SIZE).hexdigest()
+
+
+def _estimate_input_tokens(text: str) -> int:
+    if len(text) <= _TOKEN_WINDOW * _TOKEN_WINDOWS:
+        return estimate_tokens(text)
+    step = len(text) // _TOKEN_WINDOWS
+    sampled = sum(
+        estimate_tokens(text[start : start + _TOKEN_WINDOW])
+        for start in range(0, step * _TOKEN_WINDOWS, step)
+    )
+    return round(sampled * len(text) / (_TOKEN_WINDOW * _TOKEN_WINDOWS))
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class DistillRules(TracedModel):
+    """Pruning rules applied by the distiller."""
+
+    drop_ids: bool = Field(default=True, description="Drop ID-like fields and values.")
+    drop_timestamps: bool = Field(default=True, description="Drop timestamp fields.")
+    drop_nulls: bool = Field(default=True, description="Drop null and emptied fields.")
+    drop_keys: list[str] = Field(
+        default_factory=list, description="Additional field names to drop."
+    )
+    max_array_items: int = Field(
+        default=5,
+        ge=1,
+        le=100,
+        description="Arrays longer than this collapse to samples.",
+    )
+    max_string_length: int = Field(
+        default=200,
+        ge=16,
+        le=100_000,
+        description="Strings longer than this are truncated.",
+    )
+
+
+class DistillStats:
+    """Counters describing what a distillation removed."""
+
+    __slots__ = (
+        "collapsed_arrays",
+        "collapsed_lines",
+        "dropped_fields",
+        "input_bytes",
+        "input_tokens",
+        "truncated_strings",
+    )
+
+    def __init__(self) -> None:
+        self.input_bytes = 0
+        self.input_tokens = 0
+        self.dropped_fields = 0
+        self.collapsed_arrays = 0
+        self.collapsed_lines = 0
+        self.truncated_strings = 0
+
+    def to_dict(self, output: str) -> dict[str, int]:
+        output_bytes = len(output.encode())
+        output_tokens = estimate_tokens(output)
+        return {
+            "input_bytes": self.input_bytes,
+            "output_bytes": output_bytes,
+            "bytes_saved": self.input_bytes - output_bytes,
+            "input_tokens": self.input_tokens,
+            "output_tokens": output_tokens,
+            "tokens_saved": self.input_tokens - output_tokens,
+            "dropped_fields": self.dropped_fields,
+            "collapsed_arrays": self.collapsed_arrays,
+            "collapsed_lines": self.collapsed_lines,
+            "truncated_strings": self.truncated_strings,
+        }
+
+
+class Distiller:
+    """Incremental pruner for JSON, JSON Lines and plain-text tool output.
+
+    Feed raw output with `feed()` as it arrives and call `finish()` for the
+    result. JSON Lines records and text lines are distilled as soon as their
+    line is complete; a single JSON document is parsed once it is complete.
+    Input token counts of long blocks are extrapolated from samples.
+
+    Args:
+        rules: Pruning rules.
+        format: Input format, or 'auto' to detect it from the first line.
+    """
+
+    def __init__(
+        self, rules: DistillRules | None = None, format: DistillFormat = "auto"
+    ) -> None:
+        self.rules = rules or DistillRules()
+        self.format = format
+        self.stats = DistillStats()
+        self._drop_keys = frozenset(self.rules.drop_keys)
+        # Pieces of the current, still incomplete line.
+        self._pending: list[str] = []
+        # JSON document lines (format 'json').
+        self._document: list[str] = []
+        # The document so far is one complete object, which becomes the
+        # first JSON Lines record if another line follows.
+        self._single_record = False
+        # JSON Lines: record count and distinct distilled samples.
+        self._records = 0
+        self._samples: dict[str, Any] = {}
+        # Text: distilled lines with the previous line's repeat count.
+        self._lines: list[str] = []
+        self._last_line: str | None = None
+        self._repeats = 0
+
+    # --- JSON values ---
+
+    def _drop(self, key: str, value: Any) -> bool:
+        rules = self.rules
+        if key in self._drop_keys:
+            return True
+        if rules.drop_nulls and value is None:
+            return True
+        if rules.drop_ids and (
+            _is_id_key(key)
+            or (isinstance(value, str) and _UUID_VALUE.fullmatch(value) is not None)
+        ):
+            return True
+        return rules.drop_timestamps and (
+            _is_time_key(key)
+            or (
+                isinstance(value, str) and _TIMESTAMP_VALUE.fullmatch(value) is not None
+            )
+        )
+
+    def _string(self, text: str) -> str:
+        limit = self.rules.max_string_length
+        if len(text) <= limit:
+            return text
+        self.stats.truncated_strings += 1
+        return f"{text[:limit]}…[+{len(text) - limit} chars #{_digest(text)}]"
+
+    def _array(self, items: list[Any]) -> Any:
+        limit = self.rules.max_array_items
+        if len(items) <= limit:
+            return [self.distill_value(item) for item in items]
+        self.stats.collapsed_arrays += 1
+        # Only distill a bounded prefix while looking for distinct samples.
+        samples: dict[str, Any] = {}
+        for item in itertools.islice(items, limit * _SAMPLE_SCAN):
+            distilled = self.distill_value(item)
+            samples.setdefault(_dumps(distilled), distilled)
+            if len(samples) == limit:
+                break
+        return {"_count": len(items), "_sample": list(samples.values())}
+
+    def distill_value(self, value: Any) -> Any:
+        """Return a pruned copy of a decoded JSON value."""
+        if isinstance(value, dict):
+            pruned: dict[str, Any] = {}
+            for key, item in value.items():
+                if self._drop(key, item):
+                    self.stats.dropped_fields += 1
+                    continue
+                distilled = self.distill_value(item)
+                if self.rules.drop_nulls and distilled in ({}, []):
+                    self.stats.dropped_fields += 1
+                    continue
+                pruned[key] = distilled
+            return pruned
+        if isinstance(value, list):
+            return self._array(value)
+        if isinstance(value, str):
+            return self._string(value)
+        return value
+
+    # --- Streaming ---
+
+    def _detect(self, line: str) -> DistillFormat:
+        stripped = line.strip()
+        if not stripped.startswith(("{", "[")):
+            return "text"
+        if stripped.startswith("{"):
+            try:
+                json.loads(stripped)
+            except ValueError:
+                return "json"
+            return "jsonl"
+        return "json"
+
+    def _record(self, line: str) -> None:
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+        except ValueError:
+            self._text(line)
+            return
+        self._records += 1
+        if len(self._samples) < self.rules.max_array_items:
+            distilled = self.distill_value(record)
+            self._samples.setdefault(_dumps(distilled), distilled)
+
+    def _text(self, line: str) -> None:
+        if self.rules.drop_timestamps:
+            line = _TIMESTAMP_IN_TEXT.sub("", line)
+        if self.rules.drop_ids:
+            line = _ID_IN_TEXT.sub("<id>", line)
+        line = line.strip()
+        if not line:
+            return
+        if line == self._last_line:
+            self._repeats += 1
+            self.stats.collapsed_lines += 1
+            return
+        self._flush_repeats()
+        self._lines.append(self._string(line))
+        self._last_line = line
+
+    def _flush_repeats(self) -> None:
+        if self._repeats:
+            self._lines[-1] += f" (x{self._repeats + 1})"
+            self._repeats = 0
+
+    def _consume(self, line: str) -> None:
+        if self.format == "auto":
+            if not line.strip():
+                return
+            self.format = self._detect(line)
+            if self.format == "jsonl":
+                self.format = "json"
+                self._single_record = True
+        elif self._single_record and line.strip():
+            self._single_record = False
+            self.format = "jsonl"
+            for held in self._document:
+                self._record(held)
+            self._document.clear()
+        if self.format == "json":
+            self._document.append(line)
+        elif self.format == "jsonl":
+            self._record(line)
+        else:
+            self._text(line)
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next chunk of raw output."""
+        self.stats.input_bytes += len(chunk.encode())
+        # Only the new chunk is scanned, so long lines stay linear.
+        cut = chunk.rfind("\n") + 1
+        if not cut:
+            self._pending.append(chunk)
+            return
+        complete = "".join([*self._pending, chunk[:cut]])
+        self._pending = [chunk[cut:]] if cut < len(chunk) else []
+        # Estimate per complete block so chunk boundaries never split a word.
+        self.stats.input_tokens += _estimate_input_tokens(complete)
+        for line in complete.splitlines():
+            self._consume(line)
+
+    def finish(self) -> dict[str, Any]:
+        """Flush buffered input and return the distilled output with stats."""
+        distilled: Any = None
+        if self._pending:
+            tail = "".join(self._pending)
+            self._pending = []
+            self.stats.input_tokens += _estimate_input_tokens(tail)
+            self._consume(tail)
+
+        if self.format == "json":
+            try:
+                document = json.loads("\n".join(self._document))
+            except ValueError:
+                # Not valid JSON after all; distill it as text.
+                self.format = "text"
+                for line in self._document:
+                    self._text(line)
+            else:
+                distilled = self.distill_value(document)
+        elif self.format == "jsonl":
+            samples = list(self._samples.values())
+            distilled = samples
+            if self._records > len(samples):
+                self.stats.collapsed_arrays += 1
+                distilled = {"_count": self._records, "_sample": samples}
+
+        self._flush_repeats()
+        if self.format in ("text", "auto"):
+            distilled = "\n".join(self._lines)
+            output = distilled
+        else:
+            if self._lines:  # non-JSON lines interleaved with JSON Lines records
+                distilled = {"records": distilled, "text": "\n".join(self._lines)}
+            output = _dumps(distilled)
+
+        return {
+            "format": "text" if self.format == "auto" else self.format,
+            "distilled": distilled,
+            "stats": self.stats.to_dict(output),
+        }
+
+
+def distill_stream(
+    chunks: Iterable[str],
+    rules: DistillRules | None = None,
+    format: DistillFormat = "auto",
+) -> dict[str, Any]:
+    """Distill raw output delivered as an iterable of text chunks.
+
+    Args:
+        chunks: Raw output pieces in order (e.g. reads from a pipe).
+        rules: Pruning rules; defaults apply when omitted.
+        format: 'json', 'jsonl', 'text' or 'auto' to detect.
+
+    Returns:
+        `format`, the `distilled` value (JSON value or text) and `stats`
+        with bytes/tokens in, out and saved.
+    """
+    distiller = Distiller(rules, format)
+    for chunk in chunks:
+        distiller.feed(chunk)
+    return distiller.finish()
+
+
+# --- Input Models ---
+
+
+class DistillInput(DistillRules):
+    raw: str = Field(..., min_length=1, description="Raw tool output to distill.")
+    format: DistillFormat = Field("auto", description="auto|json|jsonl|text.")
+
+
+# --- Tools ---
+
+
+@model_tool(DistillInput)
+def distill_output(model: DistillInput) -> dict:
+    """Prune verbose tool output before it reaches the model (The Distiller).
+
+    Drops IDs, timestamps and nulls, collapses long arrays (and JSON Lines
+    records or repeated text lines) into a count plus distinct samples, and
+    truncates long strings behind a content hash.
+
+    Args:
+        raw: Raw JSON, JSON Lines or text output from another tool.
+        format: 'json', 'jsonl', 'text' or 'auto' to detect.
+        drop_ids: Drop ID-like fields (and replace IDs in text with <id>).
+        drop_timestamps: Drop timestamp fields and strip timestamps in text.
+        drop_nulls: Drop null fields and containers left empty by pruning.
+        drop_keys: Extra field names to drop.
+        max_array_items: Arrays longer than this keep only this many samples.
+        max_string_length: Strings longer than this are truncated.
+    """
+    rules = DistillRules(**model.model_dump(exclude={"raw", "format"}))
+    return distill_stream((model.raw,), rules, model.format)
+
+
+def register_distiller(mcp: FastMCP) -> None:
+    """Register the distiller tool on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    mcp.tool()(distill_output)
+
+
+__all__ = [
+    "DistillRules",
+    "DistillStats",
+    "Distiller",
+    "distill_output",
+    "distill_stream",
+    "register_distiller",
+]
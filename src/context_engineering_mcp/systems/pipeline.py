@@ -0,0 +1,434 @@
+"""Streaming executor for the research_synthesis organ.
+
+The organ describes scout → architect → scribe as three batch phases: the
+architect waits for all raw data and the scribe for the whole blueprint.
+`ResearchPipeline` runs the same roles as stages joined by bounded
+queues, one section (sub-topic) at a time:
+
+1. scope: the topic is split into sub-topics (or the caller gives them);
+2. scout: each sub-topic is researched, and its finding is queued as soon
+   as it arrives;
+3. architect: a section is outlined as soon as its finding is dequeued;
+4. scribe: a section is drafted as soon as its outline is dequeued.
+
+Each stage is a pool of workers, so the first section is drafted while
+later scouts are still out. A full queue makes its producers wait, which
+bounds the work buffered between stages. Completions go through the
+prompt-program runtime's backend and step memo. Every completion counts
+one unit of progress; `run_research_synthesis` reports it as MCP progress
+notifications.
+"""
+
+import asyncio
+import re
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Final, Literal
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field
+
+from context_engineering_mcp.core.execution import (
+    DEFAULT_CONCURRENCY,
+    ProgramRunner,
+    PromptBuilder,
+    get_program_runner,
+)
+from context_engineering_mcp.core.tokens import estimate_tokens
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.runtime import ProgressCallback, report_progress
+from context_engineering_mcp.tracing import TracedModel, span
+
+DEFAULT_QUEUE_SIZE: Final[int] = 4
+# Sections planned per depth when the scope step does not list sub-topics.
+DEPTH_SECTIONS: Final[dict[str, int]] = {"low": 2, "medium": 3, "high": 5}
+DEFAULT_FACETS: Final[tuple[str, ...]] = (
+    "Background and key concepts",
+    "Current state of knowledge",
+    "Evidence and findings",
+    "Debates and open questions",
+    "Implications and outlook",
+)
+
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+?)\s*$")
+
+SCOPE_PROMPT: Final[PromptBuilder] = PromptBuilder(
+    "scope_research",
+    ("topic", "depth", "count"),
+    """
+    Task: Identify the key domains and sub-topics of a research topic.
+    Topic: ${topic}
+    Depth: ${depth}
+
+    List the ${count} most important sub-topics, one per line, each starting with "- ".
+  """,
+)
+SCOUT_PROMPT: Final[PromptBuilder] = PromptBuilder(
+    "scout_subtopic",
+    ("topic", "subtopic"),
+    """
+    Task: Gather information on "${subtopic}" for research on ${topic}.
+
+    Please:
+    1. Retrieve relevant facts and data
+    2. Filter for relevance and credibility
+    3. Identify gaps requiring further investigation
+  """,
+)
+OUTLINE_PROMPT: Final[PromptBuilder] = PromptBuilder(
+    "outline_section",
+    ("topic", "subtopic", "finding", "format"),
+    """
+    Task: Outline the "${subtopic}" section of a ${format} on ${topic}.
+    Research: ${finding}
+
+    Please:
+    1. Analyze the research for patterns and themes
+    2. Develop a logical outline for the section
+    3. Allocate evidence to each point of the outline
+  """,
+)
+DRAFT_PROMPT: Final[PromptBuilder] = PromptBuilder(
+    "draft_section",
+    ("topic", "subtopic", "outline", "finding", "format"),
+    """
+    Task: Draft the "${subtopic}" section of a ${format} on ${topic}.
+    Outline: ${outline}
+    Research: ${finding}
+
+    Expand the outline into full prose, integrate the evidence seamlessly,
+    and format the section for a ${format}.
+  """,
+)
+
+
+def parse_subtopics(text: str, limit: int) -> list[str]:
+    """Return up to `limit` distinct list items ("- x", "1. x") from `text`."""
+    items = (
+        match.group(1) for match in map(_LIST_ITEM.match, text.splitlines()) if match
+    )
+    return list(dict.fromkeys(items))[:limit]
+
+
+@dataclass
+class Section:
+    """One sub-topic as it moves through the pipeline."""
+
+    index: int
+    subtopic: str
+    finding: str = ""
+    outline: str = ""
+    draft: str = ""
+
+
+@dataclass
+class PipelineRun:
+    """Result of one research pipeline run."""
+
+    topic: str
+    backend: str
+    sections: list[Section]
+    steps: list[dict[str, Any]]
+    elapsed_ms: float
+    first_section_ms: float | None
+    failures: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def llm_calls(self) -> int:
+        return sum(1 for step in self.steps if not step["cached"])
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failures)
+
+    def output(self) -> dict[str, Any]:
+        """Return the organ's outputs: research summary, blueprint, document."""
+        scouted = [s for s in self.sections if s.finding]
+        drafted = [s for s in self.sections if s.draft]
+        return {
+            "research_summary": "\n\n".join(
+                f"## {s.subtopic}\n{s.finding}" for s in scouted
+            ),
+            "blueprint": {s.subtopic: s.outline for s in self.sections if s.outline},
+            "final_document": "\n\n".join(
+                [f"# {self.topic}", *(f"## {s.subtopic}\n\n{s.draft}" for s in drafted)]
+            ),
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "organ": "research_synthesis",
+            "backend": self.backend,
+            "output": self.output(),
+            "sections": [s.subtopic for s in self.sections],
+            "steps": self.steps,
+            "llm_calls": self.llm_calls,
+            "cached_steps": len(self.steps) - self.llm_calls,
+            "first_section_ms": (
+                None
+                if self.first_section_ms is None
+                else round(self.first_section_ms, 2)
+            ),
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "partial": self.partial,
+            "failures": self.failures,
+        }
+
+
+SectionQueue = asyncio.Queue[Section | None]
+
+
+async def _stage(
+    inbox: SectionQueue,
+    outbox: SectionQueue | None,
+    work: Callable[[Section], Awaitable[bool]],
+    workers: int,
+) -> None:
+    """Run `work` on each queued section with `workers` workers.
+
+    Sections for which `work` succeeds are passed to `outbox`. `None` ends
+    the stream: the worker that takes it puts it back for its siblings,
+    and the stage forwards it once every worker has stopped.
+    """
+
+    async def worker() -> None:
+        while (section := await inbox.get()) is not None:
+            if await work(section) and outbox is not None:
+                await outbox.put(section)
+        inbox.put_nowait(None)  # the slot just freed; never blocks
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        await outbox.put(None)
+
+
+class ResearchPipeline:
+    """Scout → architect → scribe, streamed section by section.
+
+    Args:
+        runner: Program runtime whose backend and step memo are used
+            (the process-wide runner by default).
+        max_concurrency: Workers per stage (completions in flight per stage).
+        queue_size: Sections buffered between two stages.
+    """
+
+    def __init__(
+        self,
+        runner: ProgramRunner | None = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> None:
+        self.runner = runner
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+
+    async def run(
+        self,
+        topic: str,
+        depth: str = "medium",
+        format: str = "report",
+        subtopics: Sequence[str] | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> PipelineRun:
+        """Research `topic` and draft one section per sub-topic.
+
+        Args:
+            topic: Research topic.
+            depth: ``low``, ``medium`` or ``high``; the number of sub-topics
+                the scope step asks for.
+            format: ``report``, ``brief`` or ``presentation``.
+            subtopics: Sections to write, skipping the scope step.
+            progress: Called as ``(done, total, message)`` after every
+                completion; `total` is None until the sections are known.
+        """
+        runner = self.runner or get_program_runner()
+        started = time.perf_counter()
+        trace: list[dict[str, Any]] = []
+        failures: list[dict[str, Any]] = []
+        first_section: float | None = None
+        done = 0
+        total: int | None = None
+
+        def advance(message: str, skipped: int = 0) -> None:
+            # A failed step also cancels the later steps of its section.
+            nonlocal done, total
+            done += 1
+            if total is not None:
+                total -= skipped
+            if progress is not None:
+                progress(done, total, message)
+
+        async def complete(stage: str, section: str, prompt: str) -> str | None:
+            step_started = time.perf_counter()
+            with span("pipeline.step", stage=stage, section=section) as s:
+                try:
+                    text, cached = await runner.cache.complete(
+                        runner.backend, prompt, runner.max_tokens
+                    )
+                except Exception as e:  # noqa: BLE001 - one section, not the run
+                    s.set("outcome", "error")
+                    failures.append(
+                        {
+                            "stage": stage,
+                            "section": section,
+                            "error": f"{type(e).__name__}: {e}",
+                        }
+                    )
+                    return None
+                s.set("cached", cached)
+            trace.append(
+                {
+                    "stage": stage,
+                    "section": section,
+                    "cached": cached,
+                    "ms": round((time.perf_counter() - step_started) * 1000, 2),
+                    "prompt_tokens": estimate_tokens(prompt),
+                    "output_tokens": estimate_tokens(text),
+                }
+            )
+            return text
+
+        with span("pipeline.run", organ="research_synthesis"):
+            count = DEPTH_SECTIONS.get(depth, DEPTH_SECTIONS["medium"])
+            planned = list(dict.fromkeys(subtopics or ()))
+            if not planned:
+                text = await complete(
+                    "scope", "", SCOPE_PROMPT.render([topic, depth, count])
+                )
+                advance("scoped topic")
+                planned = parse_subtopics(text or "", count) or list(
+                    DEFAULT_FACETS[:count]
+                )
+            sections = [Section(i, subtopic) for i, subtopic in enumerate(planned)]
+            total = done + 3 * len(sections)
+
+            async def scout(section: Section) -> bool:
+                prompt = SCOUT_PROMPT.render([topic, section.subtopic])
+                text = await complete("scout", section.subtopic, prompt)
+                section.finding = text or ""
+                advance(f"scouted: {section.subtopic}", 0 if text else 2)
+                return text is not None
+
+            async def outline(section: Section) -> bool:
+                prompt = OUTLINE_PROMPT.render(
+                    [topic, section.subtopic, section.finding, format]
+                )
+                text = await complete("architect", section.subtopic, prompt)
+                section.outline = text or ""
+                advance(f"outlined: {section.subtopic}", 0 if text else 1)
+                return text is not None
+
+            async def draft(section: Section) -> bool:
+                nonlocal first_section
+                prompt = DRAFT_PROMPT.render(
+                    [topic, section.subtopic, section.outline, section.finding, format]
+                )
+                text = await complete("scribe", section.subtopic, prompt)
+                section.draft = text or ""
+                if text is not None and first_section is None:
+                    first_section = (time.perf_counter() - started) * 1000
+                advance(f"drafted: {section.subtopic}")
+                return text is not None
+
+            pending: SectionQueue = asyncio.Queue()
+            findings: SectionQueue = asyncio.Queue(self.queue_size)
+            outlines: SectionQueue = asyncio.Queue(self.queue_size)
+            for section in sections:
+                pending.put_nowait(section)
+            pending.put_nowait(None)
+            workers = self.max_concurrency
+            await asyncio.gather(
+                _stage(pending, findings, scout, workers),
+                _stage(findings, outlines, outline, workers),
+                _stage(outlines, None, draft, workers),
+            )
+        return PipelineRun(
+            topic=topic,
+            backend=runner.backend.name,
+            sections=sections,
+            steps=trace,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            first_section_ms=first_section,
+            failures=failures,
+        )
+
+
+# --- Input Models ---
+
+
+class ResearchSynthesisInput(TracedModel):
+    topic: str = Field(..., min_length=1, description="Research topic.")
+    depth: Literal["low", "medium", "high"] = Field(
+        "medium", description="How many sub-topics to research (2, 3 or 5)."
+    )
+    format: Literal["report", "brief", "presentation"] = Field(
+        "report", description="Form of the final document."
+    )
+    subtopics: list[str] | None = Field(
+        None,
+        max_length=12,
+        description="Sections to write; skips the scope step when given.",
+    )
+    max_concurrency: int = Field(
+        DEFAULT_CONCURRENCY, ge=1, le=16, description="Workers per stage."
+    )
+    queue_size: int = Field(
+        DEFAULT_QUEUE_SIZE, ge=1, le=64, description="Sections buffered between stages."
+    )
+
+
+# --- Tools ---
+
+
+@model_tool(ResearchSynthesisInput)
+def run_research_synthesis(model: ResearchSynthesisInput) -> dict:
+    """Run the research_synthesis organ server-side as a streaming pipeline.
+
+    Scouts research each sub-topic in parallel; each finding is outlined
+    and drafted as soon as it arrives, so sections are written while other
+    research is still running. Progress notifications report each completed
+    step. Uses the same completion backend as `run_prompt_program`.
+
+    Args:
+        topic: Research topic.
+        depth: 'low', 'medium' or 'high' (2, 3 or 5 sub-topics).
+        format: 'report', 'brief' or 'presentation'.
+        subtopics: Optional explicit sections, in document order.
+        max_concurrency: Workers per stage.
+        queue_size: Sections buffered between stages.
+    """
+    pipeline = ResearchPipeline(
+        get_program_runner(), model.max_concurrency, model.queue_size
+    )
+    run = asyncio.run(
+        pipeline.run(
+            model.topic,
+            model.depth,
+            model.format,
+            model.subtopics,
+            progress=report_progress,
+        )
+    )
+    return run.to_dict()
+
+
+def register_research_pipeline(mcp: FastMCP) -> None:
+    """Register the research pipeline tool on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    mcp.tool()(run_research_synthesis)
+
+
+__all__ = [
+    "DEFAULT_FACETS",
+    "DEPTH_SECTIONS",
+    "PipelineRun",
+    "ResearchPipeline",
+    "Section",
+    "parse_subtopics",
+    "register_research_pipeline",
+    "run_research_synthesis",
+]
@@ -0,0 +1,398 @@
+"""Registry cache of the Tool-Master organ (Layer 4).
+
+Server-side implementation of the organ's "Registry Cache (Cell)": learned
+intent -> tool-chain mappings that survive restarts, so an agent does not
+rediscover its tools every session. Intents are normalized into canonical
+keys (stopwords dropped, inflections folded, word order ignored). Entries
+track hit counts and success rates, expire after a TTL, and are evicted
+least-frequently-used first (least recently used among equals) via
+frequency buckets. The cache is persisted as a JSON file replaced
+atomically.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Final
+
+from mcp.server.fastmcp import FastMCP
+from pydantic import Field, field_validator
+
+from context_engineering_mcp.core.matching import tokenize, word_forms
+from context_engineering_mcp.core.search import STOPWORDS
+from context_engineering_mcp.core.storage import data_dir
+from context_engineering_mcp.dispatch import model_tool
+from context_engineering_mcp.tracing import TracedModel
+
+REGISTRY_PATH_ENV: Final[str] = "SUTRA_REGISTRY_PATH"
+DEFAULT_CAPACITY: Final[int] = 512
+DEFAULT_TTL: Final[float] = 30 * 24 * 3600.0
+# Hit-count updates are written back at most this often.
+DEFAULT_SAVE_INTERVAL: Final[float] = 5.0
+# Mappings that fail more often than this are not recommended.
+MIN_SUCCESS_RATE: Final[float] = 0.5
+# Prompts longer than this are never looked up when routing: learned intents
+# are short, so a long prompt cannot match and normalizing it is wasted work.
+MAX_ROUTED_INTENT_CHARS: Final[int] = 512
+
+# Request phrasing that carries no intent, on top of the search stopwords.
+_IGNORED: Final[frozenset[str]] = STOPWORDS | frozenset(
+    {"please", "help", "need", "would", "could", "should", "like", "some"}
+)
+
+
+def _canonical(token: str) -> str:
+    # The shortest de-inflected form, so "fixing", "fixed" and "fix" agree.
+    return min(word_forms(token), key=len)
+
+
+def normalize_intent(intent: str) -> str:
+    """Return the canonical registry key of an intent.
+
+    "Fixing the failing tests" and "fix failing test" share a key.
+    """
+    stems = {
+        _canonical(token)
+        for token in tokenize(intent)
+        if len(token) > 1 and token not in _IGNORED
+    }
+    return " ".join(sorted(stems))
+
+
+class RegistryEntry:
+    """A learned intent -> tool-chain mapping."""
+
+    __slots__ = (
+        "failures",
+        "hits",
+        "intent",
+        "key",
+        "successes",
+        "tools",
+        "updated",
+    )
+
+    def __init__(
+        self,
+        key: str,
+        intent: str,
+        tools: list[str],
+        hits: int = 0,
+        successes: int = 0,
+        failures: int = 0,
+        updated: float | None = None,
+    ) -> None:
+        self.key = key
+        self.intent = intent
+        self.tools = tools
+        self.hits = hits
+        self.successes = successes
+        self.failures = failures
+        self.updated = time.time() if updated is None else updated
+
+    @property
+    def success_rate(self) -> float:
+        total = self.successes + self.failures
+        return self.successes / total if total else 1.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "key": self.key,
+            "intent": self.intent,
+            "tools": self.tools,
+            "hits": self.hits,
+            "successes": self.successes,
+            "failures": self.failures,
+            "updated": self.updated,
+        }
+
+
+class RegistryCache:
+    """LFU + TTL cache of intent -> tool-chain mappings with file persistence.
+
+    Args:
+        path: JSON file to load from and save to. When omitted the cache is
+            purely in-memory.
+        capacity: Maximum number of mappings kept.
+        ttl: Seconds after its last update before a mapping expires.
+        save_interval: Minimum seconds between write-backs of hit counts.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str] | None = None,
+        capacity: int = DEFAULT_CAPACITY,
+        ttl: float = DEFAULT_TTL,
+        save_interval: float = DEFAULT_SAVE_INTERVAL,
+    ) -> None:
+        self.path = Path(path) if path is not None else None
+        self.capacity = capacity
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self._lock = threading.RLock()
+        self._entries: dict[str, RegistryEntry] = {}
+        # Hit count -> keys in least-recently-used order.
+        self._buckets: dict[int, OrderedDict[str, None]] = {}
+        self._min_hits = 0
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._lookup_hits = 0
+        self._lookup_misses = 0
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "RegistryCache":
+        """Create a cache persisted to `$SUTRA_REGISTRY_PATH` (or the data dir)."""
+        path = os.getenv(REGISTRY_PATH_ENV) or data_dir() / "registry.json"
+        return cls(path)
+
+    # --- Internal helpers ---
+
+    def _bucket_add(self, entry: RegistryEntry) -> None:
+        self._buckets.setdefault(entry.hits, OrderedDict())[entry.key] = None
+        if entry.hits < self._min_hits or len(self._entries) == 1:
+            self._min_hits = entry.hits
+
+    def _bucket_remove(self, entry: RegistryEntry) -> None:
+        bucket = self._buckets[entry.hits]
+        del bucket[entry.key]
+        if not bucket:
+            del self._buckets[entry.hits]
+            if self._min_hits == entry.hits:
+                self._min_hits = min(self._buckets, default=0)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bucket_remove(entry)
+
+    def _evict(self, room: int = 0) -> None:
+        """Drop least-frequently-used entries until `room` more would fit."""
+        while self._entries and len(self._entries) + room > self.capacity:
+            bucket = self._buckets[self._min_hits]
+            key = next(iter(bucket))
+            self._remove(key)
+
+    def _expired(self, entry: RegistryEntry, now: float) -> bool:
+        return now - entry.updated > self.ttl
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            payload = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return  # unreadable cache; start empty and overwrite on save
+        now = time.time()
+        for item in payload.get("entries", []):
+            try:
+                entry = RegistryEntry(**item)
+            except TypeError:
+                continue  # malformed item; skip it
+            if not self._expired(entry, now):
+                self._entries[entry.key] = entry
+                self._bucket_add(entry)
+        self._evict()
+
+    def _maybe_save(self) -> None:
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    # --- Operations ---
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, intent: str) -> RegistryEntry | None:
+        """Return the learned mapping for an intent and count the hit.
+
+        Expired mappings and those with a success rate below
+        `MIN_SUCCESS_RATE` are not returned.
+        """
+        key = normalize_intent(intent)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._lookup_misses += 1
+                return None
+            if self._expired(entry, time.time()):
+                self._remove(key)
+                self._dirty = True
+                self._lookup_misses += 1
+                return None
+            if entry.success_rate < MIN_SUCCESS_RATE:
+                self._lookup_misses += 1
+                return None
+            self._lookup_hits += 1
+            self._bucket_remove(entry)
+            entry.hits += 1
+            self._bucket_add(entry)
+            self._dirty = True
+            self._maybe_save()
+            return entry
+
+    def record(
+        self, intent: str, tools: list[str], success: bool = True
+    ) -> RegistryEntry:
+        """Learn (or reinforce) the tool chain used for an intent.
+
+        Recording a different chain for a known intent replaces the chain
+        and resets its success statistics.
+        """
+        key = normalize_intent(intent)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.tools != tools:
+                if entry is not None:
+                    self._remove(key)
+                # Make room first so the new, unhit entry is not the victim.
+                self._evict(room=1)
+                entry = RegistryEntry(key, intent, list(tools))
+                self._entries[key] = entry
+                self._bucket_add(entry)
+            if success:
+                entry.successes += 1
+            else:
+                entry.failures += 1
+            entry.updated = time.time()
+            self._dirty = True
+            self.save()
+            return entry
+
+    def forget(self, intent: str) -> bool:
+        """Remove the mapping for an intent; returns whether one existed."""
+        key = normalize_intent(intent)
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self._dirty = True
+            self.save()
+            return True
+
+    def save(self) -> None:
+        """Write the cache to its file atomically (no-op when in-memory)."""
+        with self._lock:
+            self._dirty = False
+            self._last_save = time.monotonic()
+            if self.path is None:
+                return
+            payload = {"entries": [e.to_dict() for e in self._entries.values()]}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            staging = self.path.with_name(self.path.name + ".tmp")
+            staging.write_text(json.dumps(payload, separators=(",", ":")))
+            os.replace(staging, self.path)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._lookup_hits + self._lookup_misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "ttl_seconds": self.ttl,
+                "total_hits": sum(e.hits for e in self._entries.values()),
+                "hits": self._lookup_hits,
+                "misses": self._lookup_misses,
+                "hit_rate": self._lookup_hits / lookups if lookups else 0.0,
+            }
+
+
+_cache: RegistryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_registry_cache() -> RegistryCache:
+    """Return the process-wide registry cache, loading it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RegistryCache.from_env()
+        return _cache
+
+
+def route_from_registry(intent: str) -> dict[str, Any] | None:
+    """Return a routing recommendation from a learned mapping, if any.
+
+    The shape matches `route_task` so callers can use either result. Prompts
+    over `MAX_ROUTED_INTENT_CHARS` are not looked up.
+    """
+    if len(intent) > MAX_ROUTED_INTENT_CHARS:
+        return None
+    entry = get_registry_cache().lookup(intent)
+    if entry is None:
+        return None
+    return {
+        "strategy": "registry",
+        "complexity": "Known",
+        "recommended_tool": entry.tools[0],
+        "reasoning": (
+            f"Learned mapping for '{entry.key}' "
+            f"({entry.hits} hits, {entry.success_rate:.0%} success)."
+        ),
+        "matches": [],
+        "tool_chain": entry.tools,
+    }
+
+
+# --- Input Models ---
+
+
+class RegistryRecordInput(TracedModel):
+    intent: str = Field(..., min_length=3, description="The task or intent.")
+    tools: list[str] = Field(
+        ..., min_length=1, max_length=16, description="Tool chain that was used."
+    )
+    success: bool = Field(True, description="Whether the chain achieved the intent.")
+
+    @field_validator("intent")
+    @classmethod
+    def _distinctive(cls, intent: str) -> str:
+        if not normalize_intent(intent):
+            raise ValueError("Intent has no distinctive keywords to learn from.")
+        return intent
+
+
+# --- Tools ---
+
+
+@model_tool(RegistryRecordInput)
+def registry_record(model: RegistryRecordInput) -> dict:
+    """Teach the Tool-Master registry which tool chain served an intent.
+
+    Later `analyze_task_complexity` calls with an equivalent intent return
+    the learned chain directly instead of re-running heuristics.
+
+    Args:
+        intent: The task or intent the tools were used for.
+        tools: Ordered tool names that were used.
+        success: Whether the chain achieved the intent.
+    """
+    entry = get_registry_cache().record(model.intent, model.tools, model.success)
+    return {
+        "key": entry.key,
+        "tools": entry.tools,
+        "success_rate": round(entry.success_rate, 3),
+    }
+
+
+def register_registry_cache(mcp: FastMCP) -> None:
+    """Register the registry cache tools on the provided MCP instance.
+
+    Args:
+        mcp: Active FastMCP instance to attach tools to.
+    """
+    mcp.tool()(registry_record)
+
+
+__all__ = [
+    "REGISTRY_PATH_ENV",
+    "RegistryCache",
+    "RegistryEntry",
+    "get_registry_cache",
+    "normalize_intent",
+    "register_registry_cache",
+    "registry_record",
+    "route_from_registry",
+]
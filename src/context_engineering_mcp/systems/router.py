@@ -0,0 +1,106 @@
+"""Task router backing `analyze_task_complexity` (The Router).
+
+Routing is driven by a declarative rule table compiled once into a
+`KeywordIndex`. Rules are listed in priority order: the first matched rule
+decides the recommendation, while every matched rule is reported with its
+score so callers can see competing signals.
+"""
+
+from typing import Any, Final, NamedTuple
+
+from context_engineering_mcp.core.matching import KeywordIndex
+
+
+class RoutingRule(NamedTuple):
+    name: str
+    keywords: tuple[str, ...]
+    strategy: str
+    complexity: str
+    recommended_tool: str
+    reasoning: str
+
+
+ROUTING_RULES: Final[tuple[RoutingRule, ...]] = (
+    # Strategy: Constructor Mode (Build/Design)
+    RoutingRule(
+        name="constructor",
+        keywords=(
+            "build",
+            "create",
+            "design",
+            "architect",
+            "system",
+            "bot",
+            "assistant",
+        ),
+        strategy="constructor",
+        complexity="Variable",
+        recommended_tool="design_context_architecture",
+        reasoning="User wants to build a system/agent. Use the Architect to design a blueprint.",
+    ),
+    # Strategy: YOLO Mode (Direct Solve)
+    RoutingRule(
+        name="project",
+        keywords=("project", "repo", "codebase", "architecture"),
+        strategy="yolo",
+        complexity="Medium",
+        recommended_tool="project.explore",
+        reasoning="Task involves project-level understanding.",
+    ),
+    RoutingRule(
+        name="testing",
+        keywords=("test", "tdd", "verify"),
+        strategy="yolo",
+        complexity="High",
+        recommended_tool="workflow.test_driven",
+        reasoning="Task involves testing or verification workflows.",
+    ),
+    RoutingRule(
+        name="reasoning",
+        keywords=("analyze", "reason", "think", "solve", "complex"),
+        strategy="yolo",
+        complexity="High",
+        recommended_tool="reasoning.systematic",
+        reasoning="Task requires structured reasoning.",
+    ),
+)
+
+FALLBACK_RULE: Final[RoutingRule] = RoutingRule(
+    name="simple",
+    keywords=(),
+    strategy="yolo",
+    complexity="Low",
+    recommended_tool="Standard Molecule",
+    reasoning="Task appears simple. Use a basic prompt or few-shot molecule.",
+)
+
+_RULES_BY_NAME: Final[dict[str, RoutingRule]] = {
+    rule.name: rule for rule in ROUTING_RULES
+}
+_ROUTING_INDEX: Final[KeywordIndex] = KeywordIndex(
+    {rule.name: rule.keywords for rule in ROUTING_RULES}
+)
+
+
+def route_task(task: str) -> dict[str, Any]:
+    """Recommend a strategy and tool for a task description.
+
+    Args:
+        task: The user's prompt or task.
+
+    Returns:
+        The recommendation of the highest-priority matched rule (or the
+        fallback) plus `matches`, every matched rule with its score.
+    """
+    matches = _ROUTING_INDEX.match(task)
+    rule = _RULES_BY_NAME[matches[0].rule] if matches else FALLBACK_RULE
+    return {
+        "strategy": rule.strategy,
+        "complexity": rule.complexity,
+        "recommended_tool": rule.recommended_tool,
+        "reasoning": rule.reasoning,
+        "matches": [match.to_dict() for match in matches],
+    }
+
+
+__all__ = ["FALLBACK_RULE", "ROUTING_RULES", "RoutingRule", "route_task"]
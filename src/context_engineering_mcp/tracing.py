@@ -0,0 +1,407 @@
+"""Span tracing for the server's internal phases.
+
+Spans mark the boundaries a slow call can spend its time in: the whole
+tool call or resource read, tool execution on the worker pool, input
+validation (`TracedModel`), template lookup, rendering and serialization
+of the response. Spans nest through a context variable, which the tool
+pool copies into its threads, so every span of a call shares its trace.
+
+Tracing is off by default: `span` then returns a shared no-op object and
+`traced` functions call straight through. `configure_tracing` installs an
+exporter:
+
+- `JsonlExporter` appends one JSON object per finished span to a file.
+- `OtlpHttpExporter` batches spans in the OTLP/HTTP JSON encoding and
+  posts them to an OpenTelemetry collector (or anything speaking it).
+- `MemoryExporter` keeps spans in a list, for tests and debugging.
+
+`exporter_from_spec` parses the `--trace` / `$SUTRA_TRACE` setting:
+``jsonl:<path>`` or ``otlp:<url>``.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from collections.abc import Callable
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Final, Protocol, TypeVar, final
+
+from pydantic import BaseModel
+
+TRACE_ENV: Final[str] = "SUTRA_TRACE"
+SERVICE_NAME: Final[str] = "context-engineering-mcp"
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@final
+class Span:
+    """A timed, attributed unit of work within a trace."""
+
+    __slots__ = (
+        "_started",
+        "_token",
+        "attributes",
+        "duration_ns",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "status",
+        "trace_id",
+    )
+
+    def __init__(self, name: str, attributes: dict[str, Any]) -> None:
+        parent = _current.get()
+        self.name = name
+        self.attributes = attributes
+        self.trace_id: str = (
+            parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        )
+        self.parent_id: str | None = parent.span_id if parent else None
+        self.span_id: str = f"{random.getrandbits(64):016x}"
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.status = "ok"
+        self._started = 0
+        self._token: contextvars.Token[Span | None] | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.duration_ns = time.perf_counter_ns() - self._started
+        if exc is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(exc).__name__}: {exc}"[:200]
+        if self._token is not None:
+            _current.reset(self._token)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ns / 1e6, 4),
+            "status": self.status,
+            "attributes": self.attributes,
+            "pid": os.getpid(),
+        }
+
+
+@final
+class _NoopSpan:
+    """Stand-in returned by `span` while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        pass
+
+
+class Exporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+_NOOP: Final[_NoopSpan] = _NoopSpan()
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "sutra_span", default=None
+)
+_exporter: Exporter | None = None
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """Return a context manager timing `name` (a no-op when tracing is off)."""
+    if _exporter is None:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def current_span() -> Span | None:
+    """Return the innermost active span, if tracing is on."""
+    return _current.get()
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorate a function so each call is a span named `name`."""
+
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None:
+                return fn(*args, **kwargs)
+            with Span(name, {"function": fn.__name__}):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class TracedModel(BaseModel):
+    """Base for tool input models; validation is traced as a span."""
+
+    def __init__(self, /, **data: Any) -> None:
+        if _exporter is None:
+            super().__init__(**data)
+            return
+        with Span("validate", {"model": type(self).__name__}):
+            super().__init__(**data)
+
+
+# --- Exporters ---
+
+
+class MemoryExporter:
+    """Keeps finished spans in `spans`."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JsonlExporter:
+    """Appends one JSON object per finished span to a file.
+
+    The file is opened in append mode, so forked HTTP workers can share it.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(span: Span) -> dict[str, Any]:
+    """Encode a span in the OTLP/JSON span shape."""
+    encoded: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in span.attributes.items()
+        ],
+        "status": {"code": 2 if span.status == "error" else 1},
+    }
+    if span.parent_id:
+        encoded["parentSpanId"] = span.parent_id
+    return encoded
+
+
+class OtlpHttpExporter:
+    """Posts spans in batches to an OTLP/HTTP JSON endpoint.
+
+    Spans are queued and sent from a background thread, so request
+    handling never waits on the collector. When the queue is full (the
+    collector is down or slow) new spans are dropped.
+
+    Args:
+        endpoint: Collector URL, e.g. ``http://localhost:4318/v1/traces``.
+        batch_size: Spans per request.
+        interval: Maximum seconds a span waits before being sent.
+        max_queue: Spans buffered before new ones are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        batch_size: int = 128,
+        interval: float = 1.0,
+        max_queue: int = 8192,
+    ) -> None:
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.dropped = 0
+        self._queue: queue.Queue[Span | None] = queue.Queue(max_queue)
+        self._thread: threading.Thread | None = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork(); each worker process starts its own.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(self._queue.maxsize)
+                    self._thread = threading.Thread(
+                        target=self._run, name="sutra-otlp", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def export(self, span: Span) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _post(self, spans: list[Span]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": _otlp_value(SERVICE_NAME)},
+                            {"key": "process.pid", "value": _otlp_value(os.getpid())},
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [otlp_span(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(body, default=str).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except OSError as e:
+            self.dropped += len(spans)
+            logger.warning("Dropped %d spans: %s", len(spans), e)
+
+    def _run(self) -> None:
+        batch: list[Span] = []
+        deadline = time.monotonic() + self.interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+                stop = False
+            else:
+                stop = item is None
+            if item is not None:
+                batch.append(item)
+            if batch and (
+                stop or len(batch) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                self._post(batch)
+                batch = []
+            if stop:
+                return
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.interval
+
+    def shutdown(self) -> None:
+        """Send queued spans and stop the background thread."""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+
+def exporter_from_spec(spec: str | None) -> Exporter | None:
+    """Build an exporter from ``jsonl:<path>`` or ``otlp:<url>``."""
+    if not spec:
+        return None
+    kind, _, target = spec.partition(":")
+    if kind == "jsonl" and target:
+        return JsonlExporter(target)
+    if kind == "otlp" and target:
+        return OtlpHttpExporter(target)
+    raise ValueError(f"Unknown trace spec {spec!r}; use jsonl:<path> or otlp:<url>")
+
+
+def configure_tracing(exporter: Exporter | None) -> None:
+    """Install `exporter` (None disables tracing), shutting down the old one."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.shutdown()
+
+
+__all__ = [
+    "TRACE_ENV",
+    "JsonlExporter",
+    "MemoryExporter",
+    "OtlpHttpExporter",
+    "Span",
+    "TracedModel",
+    "configure_tracing",
+    "current_span",
+    "exporter_from_spec",
+    "otlp_span",
+    "span",
+    "traced",
+    "tracing_enabled",
+]
@@ -0,0 +1,398 @@
+"""HTTP serving with an optional pre-forked worker pool.
+
+`serve_http` runs the streamable-HTTP app under uvicorn. With more than one
+worker, the parent binds the listening socket once and forks the workers,
+which all accept on that shared socket. The parent supervises them:
+crashed workers are restarted (with a delay when they crash on start-up),
+and SIGTERM/SIGINT is forwarded so each worker drains in-flight requests
+before the pool exits, with a hard kill after the drain timeout.
+
+Each worker publishes its own stats and metrics to a file in a shared
+directory once a second; the `/stats` (JSON) and `/metrics` (Prometheus
+text) routes served by any worker aggregate all of them.
+Sessions cannot follow a client across processes, so multi-worker mode
+runs the MCP transport statelessly.
+
+Stateful tools (key-value, windowed and episodic cells, the registry and
+example stores) keep their state in the serving process, and their files
+take a single writer. Consecutive calls landing on different workers
+would disagree, and workers sharing one data directory would overwrite
+each other's files. Multi-worker mode therefore withholds these tools:
+every other tool is served, and the withheld ones are logged at start-up.
+Serve with one worker to use them. `analyze_task_complexity` still
+consults routes learned earlier; with several workers their hit counts
+are approximate, since each worker writes back its own view.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Final
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from context_engineering_mcp.metrics import merge_snapshots, render_prometheus
+from context_engineering_mcp.runtime import SutraMCP
+
+logger = logging.getLogger(__name__)
+
+WORKERS_ENV: Final[str] = "SUTRA_HTTP_WORKERS"
+# Tools whose results depend on state held by the serving process; not
+# served by multi-worker pools.
+STATEFUL_TOOLS: Final[frozenset[str]] = frozenset(
+    {
+        "add_examples",
+        "build_molecular_context",
+        "cell_episodic_checkpoint",
+        "cell_episodic_recall",
+        "cell_episodic_record",
+        "cell_kv_cas",
+        "cell_kv_delete",
+        "cell_kv_get",
+        "cell_kv_set",
+        "cell_window_ingest",
+        "cell_window_read",
+        "registry_record",
+    }
+)
+DEFAULT_DRAIN_TIMEOUT: Final[float] = 30.0
+# Workers that die sooner than this after starting are restarted with a delay.
+_MIN_UPTIME: Final[float] = 1.0
+_RESTART_DELAY: Final[float] = 1.0
+_PUBLISH_INTERVAL: Final[float] = 1.0
+_POLL_INTERVAL: Final[float] = 0.1
+_SUPERVISOR_FILE: Final[str] = "supervisor.json"
+# Counters summed across workers in the aggregated view.
+_TOTALS: Final[tuple[str, ...]] = ("tool_calls", "tool_errors")
+_EXECUTOR_TOTALS: Final[tuple[str, ...]] = (
+    "max_workers",
+    "queued",
+    "active",
+    "completed",
+)
+
+
+def _write_json(path: Path, payload: dict[str, Any]) -> None:
+    staging = path.with_name(path.name + ".tmp")
+    staging.write_text(json.dumps(payload))
+    os.replace(staging, path)
+
+
+def stateful_tools(mcp: SutraMCP) -> list[str]:
+    """Return the registered tools that keep per-process state."""
+    return sorted(name for name in STATEFUL_TOOLS if mcp._tool_manager.get_tool(name))
+
+
+def withhold_stateful_tools(mcp: SutraMCP) -> list[str]:
+    """Unregister the stateful tools and return their names.
+
+    Must run before the workers fork so no worker serves them.
+    """
+    withheld = stateful_tools(mcp)
+    for name in withheld:
+        mcp.remove_tool(name)
+    return withheld
+
+
+def worker_stats(
+    mcp: SutraMCP, index: int, started: float, metrics: bool = False
+) -> dict[str, Any]:
+    """Return the stats one worker publishes (optionally with its metrics)."""
+    stats = {
+        "worker": index,
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.time() - started, 3),
+        **mcp.stats(),
+    }
+    if metrics:
+        stats["metrics"] = mcp.metrics.snapshot()
+    return stats
+
+
+def aggregate_stats(workers: list[dict[str, Any]]) -> dict[str, Any]:
+    """Sum per-worker counters into pool totals."""
+    totals: dict[str, Any] = {key: 0 for key in _TOTALS}
+    executor = {key: 0 for key in _EXECUTOR_TOTALS}
+    for stats in workers:
+        for key in _TOTALS:
+            totals[key] += stats.get(key, 0)
+        for key in _EXECUTOR_TOTALS:
+            executor[key] += stats.get("executor", {}).get(key, 0)
+    totals["executor"] = executor
+    totals["workers"] = len(workers)
+    return totals
+
+
+def read_pool_stats(stats_dir: Path) -> dict[str, Any]:
+    """Collect every live worker's published stats and the supervisor's."""
+    workers = []
+    for path in sorted(stats_dir.glob("worker-*.json")):
+        try:
+            workers.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # the worker is restarting; skip its stale file
+    try:
+        supervisor = json.loads((stats_dir / _SUPERVISOR_FILE).read_text())
+    except (OSError, ValueError):
+        supervisor = {}
+    return {
+        "totals": aggregate_stats(workers),
+        "workers": workers,
+        "supervisor": supervisor,
+    }
+
+
+def install_stats_route(mcp: SutraMCP, stats_dir: Path | None) -> None:
+    """Serve pool stats at `/stats` and Prometheus metrics at `/metrics`.
+
+    With a `stats_dir` both aggregate every worker's published files;
+    without one they report this process.
+    """
+    started = time.time()
+
+    def pool() -> dict[str, Any]:
+        if stats_dir is None:
+            own = worker_stats(mcp, 0, started, metrics=True)
+            return {
+                "totals": aggregate_stats([own]),
+                "workers": [own],
+                "supervisor": {},
+            }
+        return read_pool_stats(stats_dir)
+
+    @mcp.custom_route("/stats", methods=["GET"])
+    async def stats(request: Request) -> JSONResponse:
+        payload = pool()
+        for worker in payload["workers"]:
+            worker.pop("metrics", None)
+        return JSONResponse(payload)
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        snapshots = [w["metrics"] for w in pool()["workers"] if "metrics" in w]
+        return PlainTextResponse(
+            render_prometheus(merge_snapshots(snapshots)),
+            media_type="text/plain; version=0.0.4",
+        )
+
+
+class WorkerPool:
+    """Pre-forks HTTP workers on a shared socket and supervises them.
+
+    Args:
+        mcp: Server whose streamable-HTTP app each worker runs.
+        sock: Bound, listening socket shared by all workers.
+        workers: Number of worker processes.
+        stats_dir: Directory where workers publish their stats.
+        drain_timeout: Seconds workers get to finish requests on shutdown.
+        log_level: uvicorn log level.
+    """
+
+    def __init__(
+        self,
+        mcp: SutraMCP,
+        sock: socket.socket,
+        workers: int,
+        stats_dir: Path,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+        log_level: str = "info",
+    ) -> None:
+        self.mcp = mcp
+        self.sock = sock
+        self.workers = workers
+        self.stats_dir = stats_dir
+        self.drain_timeout = drain_timeout
+        self.log_level = log_level
+        # Worker slot -> (pid, start time).
+        self._children: dict[int, tuple[int, float]] = {}
+        self._restarts = 0
+        self._stopping = False
+
+    # --- Worker side ---
+
+    def _publish(self, index: int, started: float) -> None:
+        path = self.stats_dir / f"worker-{index}.json"
+        while True:
+            try:
+                _write_json(path, worker_stats(self.mcp, index, started, True))
+            except OSError:
+                pass  # stats directory removed during shutdown
+            time.sleep(_PUBLISH_INTERVAL)
+
+    def _run_worker(self, index: int) -> None:
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        started = time.time()
+        threading.Thread(
+            target=self._publish, args=(index, started), daemon=True
+        ).start()
+        config = uvicorn.Config(
+            self.mcp.streamable_http_app(),
+            log_level=self.log_level,
+            timeout_graceful_shutdown=int(self.drain_timeout),
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    # --- Supervisor side ---
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:  # child
+            code = 0
+            try:
+                self._run_worker(index)
+            except BaseException:  # noqa: BLE001 - never return into the supervisor
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[index] = (pid, time.monotonic())
+        self._publish_supervisor()
+
+    def _publish_supervisor(self) -> None:
+        _write_json(
+            self.stats_dir / _SUPERVISOR_FILE,
+            {
+                "pid": os.getpid(),
+                "workers": {str(i): pid for i, (pid, _) in self._children.items()},
+                "restarts": self._restarts,
+            },
+        )
+
+    def _stop(self, signum: int, frame: Any) -> None:
+        self._stopping = True
+
+    def _reap(self) -> list[tuple[int, int]]:
+        """Return (slot, exit status) for every worker that exited."""
+        exited = []
+        for index, (pid, _) in list(self._children.items()):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if done:
+                exited.append((index, status))
+        return exited
+
+    def _drain(self) -> None:
+        for pid, _ in self._children.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.drain_timeout + 1
+        while self._children and time.monotonic() < deadline:
+            for index, _ in self._reap():
+                del self._children[index]
+            time.sleep(_POLL_INTERVAL)
+        for pid, _ in self._children.values():  # did not drain in time
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children.clear()
+
+    def run(self) -> None:
+        """Fork the workers and supervise them until SIGTERM/SIGINT."""
+        previous = {
+            signum: signal.signal(signum, self._stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for index in range(self.workers):
+                self._spawn(index)
+            while not self._stopping:
+                for index, _ in self._reap():
+                    _, started = self._children.pop(index)
+                    (self.stats_dir / f"worker-{index}.json").unlink(missing_ok=True)
+                    if self._stopping:
+                        break
+                    if time.monotonic() - started < _MIN_UPTIME:
+                        time.sleep(_RESTART_DELAY)  # avoid a tight crash loop
+                    self._restarts += 1
+                    self._spawn(index)
+                time.sleep(_POLL_INTERVAL)
+            self._drain()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+
+def serve_http(
+    mcp: SutraMCP,
+    host: str,
+    port: int,
+    workers: int = 1,
+    drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+) -> None:
+    """Serve `mcp` over streamable HTTP with one or more worker processes.
+
+    With several workers the stateful tools are withheld (see the module
+    docstring).
+
+    Args:
+        mcp: Server to expose.
+        host: Interface to bind.
+        port: TCP port to bind.
+        workers: Number of worker processes sharing the socket.
+        drain_timeout: Seconds in-flight requests get on shutdown.
+    """
+    import uvicorn
+
+    mcp.settings.host = host
+    mcp.settings.port = port
+    log_level = mcp.settings.log_level.lower()
+    if workers <= 1:
+        install_stats_route(mcp, None)
+        config = uvicorn.Config(
+            mcp.streamable_http_app(),
+            host=host,
+            port=port,
+            log_level=log_level,
+            timeout_graceful_shutdown=int(drain_timeout),
+        )
+        uvicorn.Server(config).run()
+        return
+
+    withheld = withhold_stateful_tools(mcp)
+    if withheld:
+        logger.warning(
+            "Stateful tools are not served by %d workers: %s",
+            workers,
+            ", ".join(withheld),
+        )
+
+    # Any worker may receive any request, so no session state may be held.
+    mcp.settings.stateless_http = True
+    sock = socket.create_server((host, port), reuse_port=False, backlog=2048)
+    sock.set_inheritable(True)
+    with tempfile.TemporaryDirectory(prefix="sutra-workers-") as stats_dir:
+        install_stats_route(mcp, Path(stats_dir))
+        pool = WorkerPool(mcp, sock, workers, Path(stats_dir), drain_timeout, log_level)
+        try:
+            pool.run()
+        finally:
+            sock.close()
+
+
+__all__ = [
+    "STATEFUL_TOOLS",
+    "WORKERS_ENV",
+    "WorkerPool",
+    "aggregate_stats",
+    "read_pool_stats",
+    "serve_http",
+    "stateful_tools",
+    "withhold_stateful_tools",
+]
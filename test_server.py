@@ -1,3 +1,7 @@
+import os
+
+import pytest
+
 from context_engineering_mcp.server import (
     get_protocol_shell,
     get_prompt_program,
@@ -10,6 +14,15 @@ from context_engineering_mcp.server import (
 )
 
 
+@pytest.fixture(autouse=True)
+def _isolated_registry(tmp_path, monkeypatch):
+    """Keep learned routes out of the user's ~/.sutra registry."""
+    from context_engineering_mcp.systems import registry
+
+    monkeypatch.setenv(registry.REGISTRY_PATH_ENV, str(tmp_path / "registry.json"))
+    monkeypatch.setattr(registry, "_cache", None)
+
+
 def test_get_protocol_shell():
     """Test that protocol shell returns correct structure."""
     intent = "Test Intent"
@@ -29,6 +42,45 @@ def test_get_technique_guide():
     assert "reasoning.systematic" in result
 
 
+def test_get_technique_guide_search_ranks_catalog():
+    from context_engineering_mcp.core.search import SearchDocument, SearchIndex
+    from context_engineering_mcp.server import TECHNIQUE_SEARCH
+
+    result = get_technique_guide(query="debug failing tests", limit=3)
+    builds = TECHNIQUE_SEARCH.builds
+    first = result.splitlines()[2]
+    assert "**workflow.test_driven**" in first and "score" in first
+    assert 'get_protocol_shell(name="workflow.test_driven")' in result
+
+    # Thinking models are indexed alongside the catalog; the filter applies.
+    result = get_technique_guide(query="check the logic", category="thinking_model")
+    assert "**verify_logic**" in result.splitlines()[2]
+    assert "protocol ·" not in result
+    assert (
+        "literature reviews" in get_technique_guide(query="literature review").lower()
+    )
+    assert "No matching techniques" in get_technique_guide(query="xyzzy")
+    assert get_technique_guide(category="memory").count("get_cell_protocol(") == 3
+    # Drafts are not searchable.
+    assert "debate_council" not in get_technique_guide(query="debate")
+
+    # Indexed once, from metadata: later searches reuse the index.
+    assert TECHNIQUE_SEARCH.builds == builds
+
+    index = SearchIndex(
+        [
+            SearchDocument("protocol", "a", "code", "a()", intent="Write tests first"),
+            SearchDocument("protocol", "b", "code", "b()", intent="Refactor code"),
+        ]
+    )
+    hits = index.search("testing")
+    assert [hit.document.name for hit in hits] == ["a"]
+    assert hits[0].matched == ("testing",) and hits[0].snippet == "Write tests first"
+    assert [
+        h.document.name for h in index.search("", where=lambda d: d.name == "b")
+    ] == ["b"]
+
+
 def test_analyze_task_complexity():
     # Test Constructor Mode
     constructor = analyze_task_complexity("Build a research assistant bot")
@@ -104,8 +156,8 @@ def test_get_prompt_program_unknown():
     """Test that unknown program type returns validation error."""
     result = get_prompt_program(program_type="unknown_type")
 
-    assert "Input Validation Error" in result
-    assert "program_type" in result
+    assert result["error"]["type"] == "validation_error"
+    assert result["error"]["details"][0]["loc"] == ["program_type"]
 
 
 def test_get_molecular_template():
@@ -255,9 +307,1374 @@ def test_get_organ_tool_master():
 
 
 def test_get_organ_unknown():
-    """Test unknown organ returns helpful error with example."""
+    """Test unknown organ returns a short error listing the organs."""
     result = get_organ("unknown_organ")
 
     assert "not found" in result.lower()
     assert "tool_master" in result
-    assert "/organ.tool_master" in result  # Should include example
+    assert "/organ.tool_master" not in result  # No unrequested template
+
+
+def test_fuzzy_name_resolution():
+    from context_engineering_mcp.core.names import NameIndex
+
+    index = NameIndex({"research_synthesis": ["research"], "tool_master": ["tool"]})
+    exact = index.resolve("Research-Synthesis")
+    assert (exact.name, exact.match, exact.confidence) == (
+        "research_synthesis",
+        "exact",
+        1.0,
+    )
+    typo = index.resolve("reserch_synthesis")
+    assert typo.name == "research_synthesis" and typo.match == "fuzzy"
+    assert 0.75 <= typo.confidence < 1.0
+    assert index.resolve("tool_mas").match == "prefix"
+    assert index.resolve("xyz").name is None
+
+    # Misspelled names resolve with a note instead of a wrong template.
+    organ = get_organ("reserch_synthesis")
+    assert organ.startswith(
+        "// Resolved 'reserch_synthesis' to organ 'research_synthesis'"
+    )
+    assert "/organ.research_synthesis" in organ
+    # Protocol shells never swap a custom name for a near template.
+    for custom in ("code.analyse", "code.analyzer", "reasoning.system", "analyze"):
+        shell = get_protocol_shell(custom, intent="Mine")
+        assert shell.startswith("// Custom shell; did you mean: ")
+        assert f"/protocol.{custom}{{" in shell
+        assert 'intent="Mine"' in shell
+    assert get_protocol_shell("protocol.code.analyze").startswith("\n/code.analyze{")
+    from context_engineering_mcp.core import get_program_template
+
+    assert "to program 'debate' (prefix match" in get_program_template("debat")
+    assert "Did you mean" not in get_program_template("poetry")
+    # Exact and custom names are untouched.
+    systematic = get_protocol_shell("reasoning.systematic")
+    assert systematic.startswith("\n/reasoning.systematic")
+    assert get_protocol_shell("MyProtocol").startswith("\n/protocol.MyProtocol{")
+
+    missing = get_organ("orchestra")
+    assert "not found" in missing
+    assert "Available: research_synthesis, tool_master" in missing
+    from context_engineering_mcp.server import batch_render
+
+    result = batch_render(requests=[{"tool": "get_organs", "arguments": {}}])
+    assert result["results"][0]["error"]["suggestions"] == ["get_organ"]
+
+
+def test_compiled_template_matches_str_format():
+    """Compiled templates render identically to str.format, braces included."""
+    from context_engineering_mcp.core.atoms import PROTOCOL_SHELL_STRUCTURE
+    from context_engineering_mcp.core.templating import compile_template
+
+    template = compile_template("test.shell", PROTOCOL_SHELL_STRUCTURE)
+    assert template.fields == ("name", "intent")
+    assert template.render({"name": "X", "intent": "Y {z}"}) == (
+        PROTOCOL_SHELL_STRUCTURE.format(name="X", intent="Y {z}")
+    )
+
+
+def test_render_cache_hits_and_eviction():
+    """The render cache counts hits/misses and respects its size bound."""
+    from context_engineering_mcp.core.templating import RenderCache, compile_template
+
+    template = compile_template("test.greeting", "Hello {who}!")
+    cache = RenderCache(maxsize=2)
+
+    assert cache.render(template, {"who": "a"}) == "Hello a!"
+    assert cache.render(template, {"who": "a"}) == "Hello a!"
+    cache.render(template, {"who": "b"})
+    cache.render(template, {"who": "c"})
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["size"] == 2
+
+
+def test_batch_render_mixed_results():
+    """Batch render returns results in order with per-item errors."""
+    from context_engineering_mcp.server import batch_render
+
+    result = batch_render(
+        [
+            {"tool": "get_protocol_shell", "arguments": {"name": "code.analyze"}},
+            {"tool": "get_cell_protocol", "arguments": {}},
+            {"tool": "get_organ", "arguments": {"name": "research_synthesis"}},
+            {"tool": "get_prompt_program", "arguments": {"program_type": "nope"}},
+            {"tool": "verify_logic", "arguments": {"claim": "x"}},
+            {"tool": "missing_tool"},
+        ]
+    )
+
+    assert result["succeeded"] == 3
+    assert result["failed"] == 3
+    items = result["results"]
+    assert [item["index"] for item in items] == list(range(6))
+    assert "/code.analyze" in items[0]["result"]
+    assert "cell.protocol.key_value" in items[1]["result"]
+    assert "/organ.research_synthesis" in items[2]["result"]
+    assert items[3]["error"]["type"] == "validation_error"
+    assert items[4]["error"]["type"] == "validation_error"
+    assert items[5]["error"]["type"] == "unknown_tool"
+
+
+def test_analyze_task_complexity_word_boundaries():
+    """Keywords match whole words (with inflections) and report every rule."""
+    # "bot" must not fire inside "both"; "tests" folds to "test".
+    both = analyze_task_complexity("Compare both tests and then verify them")
+    assert both["strategy"] == "yolo"
+    assert both["recommended_tool"] == "workflow.test_driven"
+    assert both["matches"] == [
+        {"rule": "testing", "score": 2, "keywords": ["test", "verify"]}
+    ]
+
+    mixed = analyze_task_complexity("Build a bot that can analyze the repo")
+    assert mixed["strategy"] == "constructor"
+    assert [m["rule"] for m in mixed["matches"]] == [
+        "constructor",
+        "project",
+        "reasoning",
+    ]
+
+
+def test_keyword_index_scan_scales_with_input():
+    """Routing stays linear and cheaper than tokenizing the prompt."""
+    import time
+
+    from context_engineering_mcp.core.matching import KeywordIndex, tokenize
+    from context_engineering_mcp.systems.router import route_task
+
+    index = KeywordIndex({"phrase": ["test driven"], "word": ["verify"]})
+    assert [m.rule for m in index.match("Verified, test-driven!")] == [
+        "phrase",
+        "word",
+    ]
+    assert index.match("attests unverifiable") == []
+
+    def best(fn, text):
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            fn(text)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    line = "Please look over the module and tell me what looks off here. "
+    small, large = line * 170, line * 1700  # ~10 KB and ~100 KB
+    assert best(route_task, large) < 20 * best(route_task, small)
+    # The scan runs in the regex engine, not a per-token Python loop.
+    assert best(route_task, large) < best(tokenize, large)
+
+
+def test_key_value_cell_engine_deltas_and_versions():
+    """Key-value operations return only deltas and a compact version."""
+    from context_engineering_mcp.core.key_value import KeyValueCellEngine
+
+    engine = KeyValueCellEngine()
+    first = engine.set("s1", "prefs", "tone", "formal")
+    assert first == {
+        "delta": {"op": "set", "key": "tone", "value": "formal", "previous": None},
+        "version": 1,
+    }
+    assert engine.get("s1", "prefs", "tone")["value"] == "formal"
+    assert engine.get("s2", "prefs", "tone")["found"] is False
+
+    failed = engine.cas("s1", "prefs", "tone", "casual", "terse")
+    assert failed["swapped"] is False
+    assert failed["current"] == "formal"
+    assert failed["version"] == 1
+
+    swapped = engine.cas("s1", "prefs", "tone", "formal", "terse")
+    assert swapped["swapped"] is True
+    assert swapped["version"] == 2
+
+    removed = engine.delete("s1", "prefs", "tone")
+    assert removed["delta"]["op"] == "delete"
+    assert removed["version"] == 3
+    assert engine.delete("s1", "prefs", "tone") == {"delta": None, "version": 3}
+
+    # A stored JSON null is present, so "expected absent" must not match it.
+    engine.set("s1", "prefs", "nullable", None)
+    assert engine.cas("s1", "prefs", "nullable", None, "x")["swapped"] is False
+    assert engine.cas("s1", "prefs", "fresh", None, "x")["swapped"] is True
+
+
+def test_key_value_cell_engine_sqlite_persistence(tmp_path):
+    """State and versions survive an engine restart when backed by SQLite."""
+    from context_engineering_mcp.core.key_value import KeyValueCellEngine
+
+    db_path = str(tmp_path / "kv.sqlite3")
+    engine = KeyValueCellEngine(db_path)
+    engine.set("s1", "default", "a", {"nested": [1, 2]})
+    engine.set("s1", "default", "b", 2)
+    engine.delete("s1", "default", "b")
+    engine.close()
+
+    reopened = KeyValueCellEngine(db_path)
+    assert reopened.get("s1", "default") == {
+        "state": {"a": {"nested": [1, 2]}},
+        "version": 3,
+    }
+    reopened.close()
+
+    # Only `max_stores` stores stay in memory; evicted ones reload from disk.
+    bounded = KeyValueCellEngine(db_path, max_stores=2)
+    for session in ("s1", "s2", "s3"):
+        bounded.set(session, "default", "k", session)
+    assert len(bounded._stores) == 2
+    assert bounded.get("s1", "default", "k")["value"] == "s1"
+    bounded.close()
+
+
+def test_cell_kv_tools_validate_input():
+    """The cell_kv_* tools report validation errors as structured dicts."""
+    from context_engineering_mcp.core.key_value import cell_kv_get, cell_kv_set
+
+    assert cell_kv_set(key="", value=1)["error"]["type"] == "validation_error"
+    result = cell_kv_set(key="tool_test_key", value=1, session="tool-test")
+    assert result["delta"]["key"] == "tool_test_key"
+    assert cell_kv_get(key="tool_test_key", session="tool-test")["value"] == 1
+
+
+def test_windowed_cell_fifo_and_token_budget():
+    """FIFO eviction honours both the item limit and the token budget."""
+    from context_engineering_mcp.core.windowed import WindowedCell
+
+    summaries: list[list[str]] = []
+    cell = WindowedCell(
+        max_items=3,
+        max_tokens=10,
+        summary_hook=lambda items: summaries.append([i.id for i in items]),
+    )
+    for index in range(3):
+        assert cell.ingest(f"m{index}", "abcd") == []  # 1 token each
+    assert [item.id for item in cell.ingest("m3", "abcd")] == ["m0"]
+    nine_tokens = "one two three four five six seven eight nine"
+    assert [item.id for item in cell.ingest("big", nine_tokens)] == ["m1", "m2"]
+    assert [item.id for item in cell.items()] == ["m3", "big"]
+    assert cell.tokens == 10
+    assert summaries == [["m0"], ["m1", "m2"]]
+
+    # An event over the whole budget is rejected without touching the window.
+    for policy in ("fifo", "salience"):
+        cell = WindowedCell(max_items=10, max_tokens=100, policy=policy)
+        for index in range(5):
+            cell.ingest(f"a{index}", "small item")
+        with pytest.raises(ValueError):
+            cell.ingest("big", " ".join(["word"] * 500))
+        assert [item.id for item in cell.items()] == [f"a{i}" for i in range(5)]
+
+
+def test_windowed_cell_salience_and_fingerprint():
+    """Salience eviction drops the least important item; fingerprints track state."""
+    from context_engineering_mcp.core.windowed import WindowedCell
+
+    cell = WindowedCell(max_items=2, policy="salience")
+    cell.ingest("keep", "important", salience=0.9)
+    cell.ingest("drop", "noise", salience=0.1)
+    before = cell.fingerprint
+    evicted = cell.ingest("new", "fresh", salience=0.5)
+    assert [item.id for item in evicted] == ["drop"]
+    assert [item.id for item in cell.items()] == ["keep", "new"]
+    assert cell.fingerprint != before
+
+    # Thousands of ingests keep the ring buffer bounded and consistent.
+    for index in range(5000):
+        cell.ingest(None, f"event {index}", salience=(index % 7) / 7)
+    assert len(cell) == 2
+    assert len(cell.items()) == 2
+
+    # Re-ingesting one ID leaves stale heap entries that are compacted away.
+    for index in range(1000):
+        cell.ingest("keep", f"revision {index}", salience=0.9)
+    assert len(cell._heap) <= 2 * len(cell) + 16
+
+
+def test_cell_window_tools():
+    """The window tools return evicted IDs and expose contents on read."""
+    from context_engineering_mcp.core.windowed import (
+        cell_window_ingest,
+        cell_window_read,
+    )
+
+    first = cell_window_ingest("hello", event_id="a", session="w-test", max_items=1)
+    assert first["evicted"] == []
+    second = cell_window_ingest("world", event_id="b", session="w-test")
+    assert second["evicted"] == ["a"]
+
+    state = cell_window_read(session="w-test")
+    assert [item["id"] for item in state["items"]] == ["b"]
+    assert state["fingerprint"] == second["fingerprint"]
+    assert "[a] hello" in state["summary"]
+    invalid = cell_window_ingest("x", policy="random")
+    assert invalid["error"]["details"][0]["loc"] == ["policy"]
+    cell_window_ingest("one", event_id="c", session="w-test", max_items=2)
+    over = cell_window_ingest(
+        "a b c d e f", session="w-test", max_items=1, max_tokens=2
+    )
+    assert over["error"]["type"] == "over_budget"
+    # The rejected call does not apply its reconfiguration either.
+    state = cell_window_read(session="w-test")
+    assert [item["id"] for item in state["items"]] == ["b", "c"]
+    assert state["max_tokens"] is None
+
+
+def test_episodic_log_index_recall_and_checkpoint(tmp_path):
+    """Recall intersects tag/keyword postings and honours importance and refs."""
+    from context_engineering_mcp.core.episodic import EpisodicLog
+
+    log = EpisodicLog(tmp_path / "log", segment_bytes=400, fsync_every=4)
+    log.record("Deployed the billing service", "ep1", ["deploy"], "high")
+    log.record("Billing tests failed on CI", "ep1", ["ci"], "medium")
+    checkpoint = log.checkpoint()
+    log.record("Fixed failing billing test", "ep2", ["ci", "fix"], "low")
+    for index in range(10):
+        log.record(f"routine heartbeat {index}", "ep3", [], "low")
+
+    assert len(list((tmp_path / "log").glob("*.seg"))) > 1
+
+    ci = log.recall(tags=["ci"], keywords=["billing"])
+    assert [entry["episode_id"] for entry in ci] == ["ep2", "ep1"]
+
+    # "tests" and "test" share a stem.
+    tested = log.recall(keywords=["test"], min_importance="medium")
+    assert [entry["event"] for entry in tested] == ["Billing tests failed on CI"]
+
+    recent = log.recall(keywords=["billing"], after=checkpoint)
+    assert [entry["episode_id"] for entry in recent] == ["ep2"]
+    assert len(log.recall(limit=3)) == 3
+    log.close()
+
+    reopened = EpisodicLog(tmp_path / "log")
+    assert len(reopened) == 13
+    assert reopened.recall(tags=["deploy"])[0]["event"] == (
+        "Deployed the billing service"
+    )
+    reopened.close()
+
+
+def test_episodic_log_drops_torn_tail(tmp_path):
+    """A partially written final record is discarded on reopen."""
+    from context_engineering_mcp.core.episodic import EpisodicLog
+
+    log = EpisodicLog(tmp_path)
+    log.record("complete entry")
+    log.close()
+    with open(next(tmp_path.glob("*.seg")), "ab") as handle:
+        handle.write(b'{"event": "torn')
+
+    reopened = EpisodicLog(tmp_path)
+    reopened.record("after restart")
+    assert [e["event"] for e in reopened.recall()] == [
+        "after restart",
+        "complete entry",
+    ]
+    reopened.close()
+
+
+def test_episodic_log_quarantines_damaged_lines(tmp_path):
+    """A corrupt complete line is skipped and moved aside; refs stay valid."""
+    from context_engineering_mcp.core.episodic import EpisodicLog
+
+    log = EpisodicLog(tmp_path)
+    log.record("first entry")
+    log.close()
+    segment = next(tmp_path.glob("*.seg"))
+    with open(segment, "ab") as handle:
+        handle.write(b'{"event": "bro\n')
+    log = EpisodicLog(tmp_path)
+    last = log.record("last entry")
+    assert log.skipped_lines == 1
+    log.close()
+
+    reopened = EpisodicLog(tmp_path)
+    assert reopened.skipped_lines == 0  # blanked in place on the first open
+    assert [e["ref"] for e in reopened.recall(keywords=["last"])] == [last["ref"]]
+    assert [e["event"] for e in reopened.recall()] == ["last entry", "first entry"]
+    assert segment.with_suffix(".corrupt").read_bytes() == b'{"event": "bro\n'
+    reopened.close()
+
+
+def test_cell_episodic_tools(tmp_path, monkeypatch):
+    """Episodic tools record, recall and checkpoint under the data directory."""
+    from context_engineering_mcp.core import episodic
+
+    monkeypatch.setattr(
+        episodic, "EPISODIC_CELL_ENGINE", episodic.EpisodicCellEngine(tmp_path)
+    )
+    stored = episodic.cell_episodic_record(
+        "User prefers concise answers", tags=["prefs"], importance="high"
+    )
+    assert "concise" in stored["retrieval_keys"]
+
+    recalled = episodic.cell_episodic_recall(keywords="concise answers")
+    assert recalled["count"] == 1
+    assert episodic.cell_episodic_checkpoint()["entries"] == 1
+    escaped = episodic.cell_episodic_record("x", log="../escape")
+    assert escaped["error"]["type"] == "validation_error"
+    episodic.EPISODIC_CELL_ENGINE.close()
+
+
+def test_episodic_similarity_recall(tmp_path):
+    """Similarity recall ranks related wording first and honours filters."""
+    pytest.importorskip("numpy")
+    from context_engineering_mcp.core.episodic import EpisodicLog
+
+    log = EpisodicLog(tmp_path, embedding_dim=256)
+    log.record("Database connection pooling was misconfigured", tags=["infra"])
+    log.record("User prefers short bullet point answers", tags=["prefs"])
+    log.record("Renamed the billing service endpoints", importance="low")
+
+    best = log.recall(query="pooled database connections")
+    assert best[0]["event"].startswith("Database connection")
+    assert best[0]["score"] > best[-1]["score"]
+    assert [e["tags"] for e in log.recall(query="answers", tags=["prefs"])] == [
+        ["prefs"]
+    ]
+    assert len(log.recall(query="billing", min_importance="medium")) == 2
+    log.close()
+
+
+def test_episodic_vectors_persist_in_memory_map(tmp_path):
+    """Memory-mapped vectors are reused on reopen and trimmed to the log."""
+    pytest.importorskip("numpy")
+    from context_engineering_mcp.core.episodic import EpisodicLog
+
+    log = EpisodicLog(tmp_path, embedding_dim=64, mmap_vectors=True)
+    for i in range(5):
+        log.record(f"deployment number {i} finished")
+    log.close()
+    assert (tmp_path / "vectors-64.f32.rows").read_text() == "5"
+
+    reopened = EpisodicLog(tmp_path, embedding_dim=64, mmap_vectors=True)
+    reopened.record("rollback of deployment")
+    assert len(reopened.recall(query="deployment rollback", limit=10)) == 6
+    assert reopened.recall(query="rollback", limit=1)[0]["event"].startswith("rollback")
+    reopened.close()
+
+
+def test_compact_render_mode_keeps_protocol_structure():
+    """Compact mode strips layout whitespace but keeps the protocol and inputs."""
+    from context_engineering_mcp.cognitive.thinking_models import verify_logic
+    from context_engineering_mcp.core import estimate_tokens
+    from context_engineering_mcp.server import get_cell_protocol
+
+    full = get_cell_protocol("cell.protocol.key_value")
+    compact = get_cell_protocol("cell.protocol.key_value", render_mode="compact")
+    assert compact.startswith("/cell.protocol.key_value{\nintent=")
+    assert '/validate{"Ensure value respects constraints/schema"},' in compact
+    assert "\n\n" not in compact and "\n " not in compact
+    assert estimate_tokens(compact) < estimate_tokens(full)
+
+    trace = "step one\n    indented step two"
+    rendered = verify_logic("claim holds", trace, render_mode="compact")
+    assert f'reasoning_trace="{trace}"' in rendered
+    invalid = get_cell_protocol(render_mode="tiny")
+    assert invalid["error"]["details"][0]["loc"] == ["render_mode"]
+
+
+def test_compact_molecular_template_is_valid_python():
+    """Compact Python keeps indentation semantics."""
+    code = compile(get_molecular_template(render_mode="compact"), "<template>", "exec")
+    assert "create_molecular_context" in code.co_names
+
+
+def test_tool_responses_report_token_estimate():
+    """Every tool response carries its token estimate in `_meta`."""
+    import asyncio
+
+    from context_engineering_mcp.server import batch_render, mcp
+
+    full = asyncio.run(mcp.call_tool("get_organ", {"name": "tool_master"}))
+    compact = asyncio.run(
+        mcp.call_tool("get_organ", {"name": "tool_master", "render_mode": "compact"})
+    )
+    assert full.meta["tokens"] > compact.meta["tokens"] > 0
+    assert full.meta["bytes"] == len(full.content[0].text.encode())
+
+    batch = batch_render(
+        [{"tool": "get_protocol_shell", "arguments": {"render_mode": "compact"}}]
+    )
+    assert batch["results"][0]["result"].startswith("/protocol.MyProtocol{\n")
+
+
+def test_distill_output_prunes_json():
+    """IDs, timestamps and nulls are dropped; long arrays and strings shrink."""
+    import json
+
+    from context_engineering_mcp.systems import distill_output
+
+    raw = json.dumps(
+        {
+            "items": [
+                {
+                    "id": 7,
+                    "userId": "u-1",
+                    "created_at": "2024-05-01T10:00:00Z",
+                    "name": f"item {index % 2}",
+                    "owner": None,
+                    "body": "x" * 300,
+                }
+                for index in range(50)
+            ],
+            "total": 50,
+        },
+        indent=2,
+    )
+    result = distill_output(raw, max_array_items=3)
+    assert result["format"] == "json"
+    items = result["distilled"]["items"]
+    assert items["_count"] == 50
+    assert [sample["name"] for sample in items["_sample"]] == ["item 0", "item 1"]
+    assert set(items["_sample"][0]) == {"name", "body"}
+    assert items["_sample"][0]["body"].startswith("x" * 200 + "…[+100 chars #")
+    assert result["stats"]["bytes_saved"] > 0
+    assert result["stats"]["tokens_saved"] > 0
+    assert distill_output("")["error"]["details"][0]["loc"] == ["raw"]
+
+
+def test_distiller_streams_text_and_json_lines():
+    """Text lines and JSON Lines records are distilled as chunks arrive."""
+    from context_engineering_mcp.systems.distiller import Distiller
+
+    distiller = Distiller()
+    log = "".join(
+        f"2024-05-01T10:00:0{i}Z GET /health 3f2a9c1e-0000-4000-8000-00000000000{i}\n"
+        for i in range(5)
+    )
+    for start in range(0, len(log), 7):  # split mid-line on purpose
+        distiller.feed(log[start : start + 7])
+    result = distiller.finish()
+    assert result["distilled"] == "GET /health <id> (x5)"
+    assert result["stats"]["collapsed_lines"] == 4
+
+    records = Distiller()
+    records.feed('{"id": 1, "level": "info"}\n{"id": 2, "level": "info"}\n')
+    assert records.finish()["distilled"] == {
+        "_count": 2,
+        "_sample": [{"level": "info"}],
+    }
+
+    # One minified object with no record separator is a JSON document.
+    single = Distiller()
+    single.feed('{"a": 1, "id": 2}')
+    result = single.finish()
+    assert result["format"] == "json"
+    assert result["distilled"] == {"a": 1}
+
+
+def test_registry_cache_lfu_ttl_and_persistence(tmp_path):
+    """Mappings are keyed canonically, evicted LFU, expire and persist."""
+    import json
+    import time
+
+    from context_engineering_mcp.systems.registry import (
+        RegistryCache,
+        normalize_intent,
+    )
+
+    assert normalize_intent("Fixing the failing tests") == normalize_intent(
+        "please fix failing test"
+    )
+
+    path = tmp_path / "registry.json"
+    cache = RegistryCache(path, capacity=2)
+    cache.record("search the docs", ["search", "read_page"])
+    cache.record("fix failing tests", ["grep", "patch", "run_tests"])
+    assert cache.lookup("fixed failing test").tools[0] == "grep"
+    cache.record("write release notes", ["git_log", "write_file"])
+    assert cache.lookup("search docs") is None  # least frequently used
+    assert len(cache) == 2
+
+    reloaded = RegistryCache(path)
+    assert reloaded.lookup("fix the failing tests").tools == [
+        "grep",
+        "patch",
+        "run_tests",
+    ]
+    reloaded.record("write release notes", ["git_log", "write_file"], success=False)
+    reloaded.record("write release notes", ["git_log", "write_file"], success=False)
+    assert reloaded.lookup("write release notes") is None  # mostly failing
+
+    expired = RegistryCache(path, ttl=0.0)
+    assert len(expired) == 0
+
+    # On a full cache the newly recorded mapping survives its own eviction.
+    full = RegistryCache(capacity=2)
+    full.record("search the docs", ["search"])
+    full.record("fix failing tests", ["patch"])
+    assert full.lookup("search the docs") is not None
+    assert full.lookup("fix failing tests") is not None
+    full.record("write release notes", ["git_log"])
+    assert full.lookup("write release notes") is not None
+    assert len(full) == 2
+
+    # Malformed items are skipped rather than failing the load.
+    good = {"key": "ok", "intent": "ok", "tools": ["t"], "updated": time.time()}
+    bad = {"key": "k", "intent": "i", "tools": [], "bogus": 1}
+    path.write_text(json.dumps({"entries": [bad, good]}))
+    assert len(RegistryCache(path)) == 1
+
+
+def test_analyze_task_complexity_consults_registry():
+    """A learned mapping is returned before the keyword heuristics run."""
+    from context_engineering_mcp.systems import registry
+
+    task = "Summarize the open pull requests"
+    assert analyze_task_complexity(task)["strategy"] != "registry"
+
+    learned = registry.registry_record(task, ["list_pull_requests", "distill_output"])
+    assert learned["key"] == "open pull request summarize"
+    result = analyze_task_complexity("summarize open pull requests")
+    assert result["strategy"] == "registry"
+    assert result["tool_chain"] == ["list_pull_requests", "distill_output"]
+    vague = registry.registry_record("the and", ["x"])
+    assert vague["error"]["details"][0]["loc"] == ["intent"]
+    long_task = "summarize open pull requests " * 40
+    assert len(long_task) > registry.MAX_ROUTED_INTENT_CHARS
+    assert analyze_task_complexity(long_task)["strategy"] != "registry"
+
+
+def test_sync_tools_run_on_bounded_pool():
+    """Sync tools are offloaded so a slow call does not block the event loop."""
+    import asyncio
+    import threading
+    import time
+
+    from context_engineering_mcp.runtime import SutraMCP
+
+    server = SutraMCP("pool-test", tool_workers=2)
+    release = threading.Event()
+
+    def slow(seconds: float) -> str:
+        """Block a worker thread."""
+        release.wait(seconds)
+        return threading.current_thread().name
+
+    def fast() -> str:
+        """Return immediately."""
+        return "done"
+
+    assert server.tool()(slow) is slow  # direct calls stay synchronous
+    server.tool()(fast)
+
+    async def scenario() -> None:
+        blocked = asyncio.create_task(server.call_tool("slow", {"seconds": 5}))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        assert (await server.call_tool("fast", {})).content[0].text == "done"
+        assert time.perf_counter() - started < 1
+        assert server.executor.stats()["active"] == 1
+        release.set()
+        result = await blocked
+        assert result.content[0].text.startswith("sutra-tool")
+
+    asyncio.run(scenario())
+    assert server.executor.stats() == {
+        "max_workers": 2,
+        "queued": 0,
+        "active": 0,
+        "completed": 2,
+    }
+    server.executor.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork workers need fork()")
+def test_http_workers_share_port_and_restart(tmp_path):
+    """Workers share one port, crashed workers come back, SIGTERM drains."""
+    import asyncio
+    import json
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import time
+    import urllib.request
+
+    from context_engineering_mcp.loadgen import open_session
+    from context_engineering_mcp.workers import STATEFUL_TOOLS
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "context_engineering_mcp.server", "--http"],
+        env={
+            **os.environ,
+            "PORT": str(port),
+            "SUTRA_HTTP_WORKERS": "2",
+            "SUTRA_DATA_DIR": str(tmp_path),
+        },
+        cwd=tmp_path,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    def stats(expect=lambda s: True):
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                url = f"http://127.0.0.1:{port}/stats"
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    payload = json.load(response)
+                if expect(payload):
+                    return payload
+            except OSError:
+                pass
+            assert time.monotonic() < deadline, "server did not reach state"
+            time.sleep(0.2)
+
+    try:
+        first = stats(lambda s: s["totals"]["workers"] == 2)
+        pids = {w["pid"] for w in first["workers"]}
+        os.kill(first["workers"][0]["pid"], signal.SIGKILL)
+        second = stats(
+            lambda s: (
+                s["supervisor"].get("restarts") == 1 and s["totals"]["workers"] == 2
+            )
+        )
+        assert {w["pid"] for w in second["workers"]} != pids
+
+        async def served_tools():
+            async with open_session(f"http://127.0.0.1:{port}/mcp") as session:
+                return {tool.name for tool in (await session.list_tools()).tools}
+
+        tools = asyncio.run(served_tools())
+        assert "analyze_task_complexity" in tools
+        assert not tools & STATEFUL_TOOLS
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=20) == 0
+
+
+def test_http_workers_withhold_stateful_tools():
+    """Multi-worker pools do not serve tools that keep per-process state."""
+    from context_engineering_mcp.core.key_value import register_key_value_cell
+    from context_engineering_mcp.runtime import SutraMCP
+    from context_engineering_mcp.workers import (
+        stateful_tools,
+        withhold_stateful_tools,
+    )
+
+    server = SutraMCP("workers-test")
+    register_key_value_cell(server)
+    server.tool()(get_organ)
+    assert "cell_kv_set" in stateful_tools(server)
+
+    withheld = withhold_stateful_tools(server)
+    assert withheld == ["cell_kv_cas", "cell_kv_delete", "cell_kv_get", "cell_kv_set"]
+    assert stateful_tools(server) == []
+    assert server._tool_manager.get_tool("get_organ") is not None
+
+
+def test_benchmark_suite_flags_regressions():
+    """The benchmark harness measures cases and gates on the baseline."""
+    from benchmarks.bench import CASES, compare, reasoning_trace, run
+
+    assert len(reasoning_trace(100 * 1024)) == 100 * 1024
+    wanted = {"verify_logic", "context://molecules/cot"}
+    cases = tuple(case for case in CASES if case.target in wanted)
+    current = run(("direct",), cases, iterations=5)
+    assert set(current["results"]) == {
+        "direct:verify_logic:short",
+        "direct:verify_logic:1kb",
+        "direct:verify_logic:10kb",
+        "direct:verify_logic:100kb",
+        "direct:context://molecules/cot:-",
+    }
+    assert compare(current, current) == []
+
+    faster = {
+        key: {**stats, "p50_ms": stats["p50_ms"] / 10, "calls_per_sec": 1e9}
+        for key, stats in current["results"].items()
+    }
+    regressions = compare(current, {"results": faster}, threshold=0.25)
+    assert any("calls_per_sec" in line for line in regressions)
+
+
+def test_loadgen_drives_concurrent_stdio_sessions(tmp_path):
+    """The load generator runs a weighted script and reports the run."""
+    import asyncio
+
+    from context_engineering_mcp.loadgen import (
+        generate_load,
+        load_script,
+        resource_share,
+    )
+
+    steps = load_script()
+    only_tools = resource_share(steps, 0.0)
+    assert all(step.kind == "tool" for step in only_tools)
+    quarter = resource_share(steps, 0.25)
+    assert sum(s.weight for s in quarter if s.kind == "resource") == pytest.approx(0.25)
+
+    result = asyncio.run(
+        generate_load(
+            steps,
+            sessions=2,
+            duration=60,
+            requests=5,
+            env={"SUTRA_DATA_DIR": str(tmp_path)},
+            sample_interval=0.2,
+        )
+    )
+    assert result["transport"] == "stdio"
+    assert result["requests"] == 10
+    assert result["errors"] == 0, result["error_messages"]
+    assert sum(t["requests"] for t in result["targets"].values()) == 10
+    assert result["latency"]["p50_ms"] > 0
+
+
+def test_metrics_record_tools_resources_and_render_prometheus():
+    """Calls are counted per tool/resource and exported as JSON and text."""
+    import asyncio
+    import json
+
+    from context_engineering_mcp.metrics import merge_snapshots, render_prometheus
+    from context_engineering_mcp.runtime import SutraMCP
+
+    server = SutraMCP("metrics-test", tool_workers=2)
+
+    def echo(text: str) -> str:
+        """Echo text back, rejecting short input like the template tools."""
+        if len(text) < 3:
+            return "Input Validation Error: 1 validation error for EchoInput"
+        return text
+
+    server.tool()(echo)
+    server.resource("context://echo", name="echo")(lambda: "resource body")
+
+    async def scenario() -> None:
+        await server.call_tool("echo", {"text": "hello"})
+        await server.call_tool("echo", {"text": "no"})
+        await server.read_resource("context://echo")
+        with pytest.raises(Exception):
+            await server.read_resource("context://missing")
+
+    asyncio.run(scenario())
+    server.metrics.register_cache(
+        "demo", lambda: {"hits": 3, "misses": 1, "hit_rate": 0.75}
+    )
+    snapshot = server.metrics.snapshot()
+    series = {(s["kind"], s["name"]): s for s in snapshot["series"]}
+
+    echo_series = series[("tool", "echo")]
+    assert echo_series["calls"] == 2
+    assert echo_series["validation_failures"] == 1
+    assert echo_series["request_bytes"] == len("text") * 2 + 7
+    assert sum(echo_series["latency_buckets"]) == 2
+    assert series[("resource", "context://echo")]["response_bytes"] == 13
+    assert series[("resource", "<unknown>")]["errors"] == 1
+    assert server.stats()["tool_calls"] == 2
+    json.dumps(snapshot)
+
+    merged = merge_snapshots([snapshot, snapshot])
+    text = render_prometheus(merged)
+    assert 'sutra_calls_total{kind="tool",name="echo"} 4' in text
+    assert 'sutra_latency_seconds_bucket{kind="tool",name="echo",le="+Inf"} 4' in text
+    assert 'sutra_cache_hit_rate{cache="demo"} 0.75' in text
+    server.executor.shutdown()
+
+
+def test_server_rejects_bad_trace_spec():
+    """An unusable --trace or $SUTRA_TRACE is a usage error, not a traceback."""
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-m", "context_engineering_mcp.server"],
+        env={**os.environ, "SUTRA_TRACE": "bogus"},
+        check=False,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 2
+    assert "error: --trace: Unknown trace spec 'bogus'" in result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_tracing_spans_nest_per_call_and_export_jsonl(tmp_path):
+    """Spans cover execute/validate/lookup/render/serialize under one trace."""
+    import asyncio
+    import json
+
+    from pydantic import Field
+
+    from context_engineering_mcp.core import compile_template, get_protocol_template
+    from context_engineering_mcp.core.templating import render_template
+    from context_engineering_mcp.runtime import SutraMCP
+    from context_engineering_mcp.tracing import (
+        JsonlExporter,
+        MemoryExporter,
+        TracedModel,
+        configure_tracing,
+        otlp_span,
+        span,
+    )
+
+    class EchoInput(TracedModel):
+        text: str = Field(..., min_length=3)
+
+    template = compile_template("echo", "{protocol}\n{text}")
+    server = SutraMCP("tracing-test", tool_workers=2)
+
+    def echo(text: str) -> str:
+        model = EchoInput(text=text)
+        protocol = get_protocol_template("reasoning.systematic") or ""
+        return render_template(template, text=model.text, protocol=protocol[:20])
+
+    server.tool()(echo)
+
+    # Disabled by default: spans are a shared no-op and nothing is recorded.
+    assert span("anything") is span("other")
+    asyncio.run(server.call_tool("echo", {"text": "hello"}))
+
+    exporter = MemoryExporter()
+    configure_tracing(exporter)
+    try:
+        asyncio.run(server.call_tool("echo", {"text": "hello"}))
+    finally:
+        configure_tracing(None)
+
+    spans = {s.name: s for s in exporter.spans}
+    assert set(spans) >= {
+        "tool.call",
+        "tool.execute",
+        "tool.run",
+        "validate",
+        "template.lookup",
+        "render",
+        "serialize",
+    }
+    root = spans["tool.call"]
+    assert root.parent_id is None and root.attributes["outcome"] == "ok"
+    assert {s.trace_id for s in exporter.spans} == {root.trace_id}
+    assert spans["tool.execute"].parent_id == root.span_id
+    assert spans["serialize"].parent_id == root.span_id
+    for name in ("validate", "template.lookup", "render"):
+        assert spans[name].parent_id == spans["tool.run"].span_id
+    assert spans["validate"].attributes["model"] == "EchoInput"
+    assert root.duration_ns >= spans["tool.execute"].duration_ns
+    assert otlp_span(spans["render"])["parentSpanId"] == spans["tool.run"].span_id
+
+    path = tmp_path / "spans.jsonl"
+    configure_tracing(JsonlExporter(path))
+    try:
+        with pytest.raises(Exception, match="EchoInput"):
+            asyncio.run(server.call_tool("echo", {"text": "no"}))
+    finally:
+        configure_tracing(None)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    validate = next(r for r in records if r["name"] == "validate")
+    assert validate["status"] == "error"
+    assert records[-1]["name"] == "tool.call"
+    assert records[-1]["status"] == "error"
+    server.executor.shutdown()
+
+
+def test_model_tools_validate_once_with_structured_errors():
+    """Model tools publish their model's schema and report structured errors."""
+    import asyncio
+    import json
+
+    from context_engineering_mcp.server import mcp
+
+    async def scenario():
+        tools = {tool.name: tool for tool in await mcp.list_tools()}
+        ok = await mcp.call_tool(
+            "verify_logic",
+            {"claim": "x is even", "reasoning_trace": "x = 2k for some k"},
+        )
+        bad = await mcp.call_tool(
+            "verify_logic", {"claim": "x", "reasoning_trace": "short"}
+        )
+        batch = await mcp.call_tool(
+            "batch_render",
+            {"requests": '[{"tool": "get_organ", "arguments": {}}]'},
+        )
+        return tools, ok, bad, batch
+
+    tools, ok, bad, batch = asyncio.run(scenario())
+
+    schema = tools["verify_logic"].inputSchema
+    assert schema["properties"]["reasoning_trace"]["minLength"] == 10
+    assert schema["required"] == ["claim", "reasoning_trace"]
+    assert tools["get_organ"].inputSchema["properties"]["render_mode"]["enum"] == [
+        "full",
+        "compact",
+    ]
+
+    assert not ok.isError and "x = 2k for some k" in ok.content[0].text
+    assert bad.isError
+    error = bad.structuredContent["error"]
+    assert error["type"] == "validation_error"
+    assert sorted(d["loc"][0] for d in error["details"]) == [
+        "claim",
+        "reasoning_trace",
+    ]
+    # JSON-encoded list arguments are still accepted, as FastMCP allows.
+    assert json.loads(batch.content[0].text)["succeeded"] == 1
+
+
+def test_template_catalog_index_lazy_bodies_and_hot_reload(tmp_path):
+    """Templates come from data files: indexed up front, bodies read on use."""
+    from context_engineering_mcp.core.catalog import (
+        PACKAGED_TEMPLATES,
+        TemplateCatalog,
+        build_index,
+        load_index,
+        scan,
+    )
+    from context_engineering_mcp.server import get_cell_protocol, get_organ
+
+    # The shipped index must match the template files it describes.
+    assert load_index(PACKAGED_TEMPLATES) == scan(PACKAGED_TEMPLATES)
+
+    # Documented short names and organ aliases resolve; drafts are hidden.
+    assert get_cell_protocol(name="windowed").startswith("\n/cell.protocol.windowed{")
+    assert "/organ.research_synthesis" in get_organ(name="organ.Research")
+    assert "not found" in get_organ(name="debate_council")
+
+    extra = tmp_path / "in-house"
+    (extra / "protocols").mkdir(parents=True)
+    custom = extra / "protocols" / "triage.txt"
+    custom.write_text(
+        "---\n"
+        "name: ops.triage\n"
+        "kind: protocol\n"
+        "category: workflow\n"
+        'aliases: ["triage"]\n'
+        "---\n"
+        '/ops.triage{\n    intent="Sort incidents",\n'
+        '    input={\n        incident="<text>"\n    },\n}\n'
+    )
+    build_index(extra)
+
+    catalog = TemplateCatalog(
+        [PACKAGED_TEMPLATES, extra], reload=True, reload_interval=0
+    )
+    entry = catalog.resolve("protocol", "TRIAGE")
+    assert entry is not None and entry.name == "ops.triage"
+    assert entry.intent == "Sort incidents" and entry.parameters == ("incident",)
+    assert catalog.stats()["loaded"] == 0
+    assert catalog.template("protocol", "triage").startswith("/ops.triage{")
+    assert catalog.stats()["loaded"] == 1
+
+    # Edits and new files are picked up without rebuilding the catalog.
+    custom.write_text(custom.read_text().replace("Sort incidents", "Rank incidents"))
+    os.utime(custom, ns=(1, 1))
+    (extra / "protocols" / "handoff.txt").write_text(
+        "---\nname: ops.handoff\nkind: protocol\ncategory: workflow\n---\n/ops.handoff{}\n"
+    )
+    assert 'intent="Rank incidents"' in catalog.template("protocol", "ops.triage")
+    assert catalog.template("protocol", "ops.handoff") == "/ops.handoff{}\n"
+    assert catalog.stats()["reloads"] == 1
+
+
+def test_prompt_program_runtime_runs_dag_with_memoized_steps():
+    import asyncio
+
+    from context_engineering_mcp.core.backends import StubBackend
+    from context_engineering_mcp.core.execution import (
+        ProgramRunner,
+        load_program,
+        run_prompt_program,
+        set_program_runner,
+    )
+
+    # Straight-line programs compile from their pseudo-code.
+    math = load_program("math")
+    assert [step.name for step in math.calls] == [
+        "problem_analysis",
+        "solution_plan",
+        "detailed_solution",
+        "verification",
+    ]
+
+    backend = StubBackend({"Verify the correctness": "VERIFIED"})
+    set_program_runner(ProgramRunner(backend))
+    try:
+        result = run_prompt_program(
+            program_type="math", arguments={"problem": "2x+3=7"}
+        )
+        assert result["backend"] == "stub" and result["llm_calls"] == 4
+        assert result["output"]["original_problem"] == "2x+3=7"
+        assert result["output"]["verification"] == "VERIFIED"
+        # Each prompt receives the previous step's output.
+        assert result["output"]["analysis"] in backend.prompts[1]
+
+        # A repeated run is served from the step memo.
+        again = run_prompt_program(program_type="math", arguments={"problem": "2x+3=7"})
+        assert again["llm_calls"] == 0 and again["cached_steps"] == 4
+        assert again["output"] == result["output"]
+
+        error = run_prompt_program(program_type="math", arguments={})["error"]
+        assert error["type"] == "program_error" and "problem" in error["message"]
+        assert (
+            "Unknown program"
+            in run_prompt_program(program_type="poem")["error"]["message"]
+        )
+    finally:
+        set_program_runner(None)
+
+    # Looping programs are unrolled; independent perspectives run together.
+    program = load_program("debate").plan(
+        {"question": "Adopt Rust?", "perspectives": ["A", "B", "C"], "rounds": 1}
+    )
+    slow = ProgramRunner(StubBackend(delay=0.05), max_concurrency=4)
+    run = asyncio.run(slow.run(program))
+    assert run.llm_calls == 8  # framing, 3 perspectives, 3 rebuttals, synthesis
+    assert run.elapsed_ms < 8 * 50  # 4 waves, not 8 serial calls
+    assert set(run.output["perspectives"]) == {"A", "B", "C"}
+    assert run.output["num_perspectives"] == 3 and len(run.output["debate_rounds"]) == 2
+
+
+def test_debate_fans_out_in_waves_and_keeps_partial_results():
+    import asyncio
+
+    from context_engineering_mcp.core.backends import StubBackend
+    from context_engineering_mcp.core.execution import ProgramRunner, load_program
+
+    source = load_program("debate")
+    program = source.plan({"question": "Adopt Rust?", "rounds": 2})
+    runner = ProgramRunner(StubBackend(delay=0.05), max_concurrency=4)
+    run = asyncio.run(runner.run(program))
+    # framing, 4 perspectives, 4 rebuttals in each of 2 rounds, synthesis
+    assert run.llm_calls == 14 and not run.partial
+    assert run.elapsed_ms < 8 * 50  # 5 waves, not 14 serial calls
+    rounds = run.output["debate_rounds"]
+    assert len(rounds) == 3 and set(rounds[2]) == set(run.output["perspectives"])
+    assert {entry["phase"] for entry in run.steps} == {
+        "framing",
+        "perspectives",
+        "round.1",
+        "round.2",
+        "synthesis",
+    }
+
+    # A perspective that misses its phase deadline is dropped; the rest of
+    # the debate still runs and the synthesis is produced.
+    def delay(prompt):
+        return 1.0 if "Perspective: Skeptical" in prompt else 0.01
+
+    runner = ProgramRunner(StubBackend(delay=delay))
+    result = asyncio.run(runner.run(program, phase_timeout=0.2)).to_dict()
+    assert result["partial"] is True
+    assert [(f["step"], f["phase"]) for f in result["failures"]] == [
+        ("perspective.Skeptical", "perspectives")
+    ]
+    assert "Skeptical" not in result["output"]["perspectives"]
+    assert len(result["output"]["perspectives"]) == 3
+    assert result["output"]["synthesis"]
+
+
+def test_research_pipeline_streams_sections_and_reports_progress():
+    import asyncio
+    import json
+
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from context_engineering_mcp.core.backends import BackendError, StubBackend
+    from context_engineering_mcp.core.execution import (
+        ProgramRunner,
+        set_program_runner,
+    )
+    from context_engineering_mcp.server import mcp
+    from context_engineering_mcp.systems.pipeline import ResearchPipeline
+
+    def delay(prompt):
+        slow = prompt.lstrip().startswith('Task: Gather information on "Ecosystem"')
+        return 0.4 if slow else 0.02
+
+    events = []
+    pipeline = ResearchPipeline(ProgramRunner(StubBackend(delay=delay)))
+    run = asyncio.run(
+        pipeline.run(
+            "Adopt Rust?",
+            subtopics=["Safety", "Ecosystem", "Hiring"],
+            progress=lambda *event: events.append(event),
+        )
+    )
+    # Fast sections are outlined and drafted while the slow scout is out.
+    assert run.first_section_ms < 200 < run.elapsed_ms
+    stages = [(step["stage"], step["section"]) for step in run.steps]
+    assert stages.index(("scribe", "Safety")) < stages.index(("scout", "Ecosystem"))
+    document = run.output()["final_document"]
+    assert document.index("## Safety") < document.index("## Ecosystem")
+    assert run.llm_calls == 9 and not run.partial
+    assert events[-1][:2] == (9, 9)
+
+    # A failed scout drops its section; the others are still written.
+    def respond(prompt):
+        if 'on "Hiring"' in prompt:
+            raise BackendError("unavailable")
+        return "ok"
+
+    events.clear()
+    pipeline = ResearchPipeline(ProgramRunner(StubBackend(respond)))
+    run = asyncio.run(
+        pipeline.run(
+            "Adopt Rust?",
+            subtopics=["Safety", "Hiring"],
+            progress=lambda *event: events.append(event),
+        )
+    )
+    assert run.failures == [
+        {"stage": "scout", "section": "Hiring", "error": "BackendError: unavailable"}
+    ]
+    assert list(run.output()["blueprint"]) == ["Safety"]
+    assert events[-1][:2] == (4, 4)
+
+    # Through MCP, each completed step is a progress notification.
+    async def call():
+        seen = []
+
+        async def on_progress(progress, total, message):
+            seen.append((progress, total, message))
+
+        async with create_connected_server_and_client_session(
+            mcp._mcp_server
+        ) as client:
+            result = await client.call_tool(
+                "run_research_synthesis",
+                {"topic": "Adopt Rust?", "depth": "low"},
+                progress_callback=on_progress,
+            )
+        return result, seen
+
+    set_program_runner(ProgramRunner(StubBackend()))
+    try:
+        result, seen = asyncio.run(call())
+    finally:
+        set_program_runner(None)
+    assert not result.isError
+    assert len(json.loads(result.content[0].text)["sections"]) == 2  # low depth
+    assert seen[0] == (1, None, "scoped topic")
+    assert [progress for progress, _, _ in seen] == list(range(1, 8))
+    assert seen[-1][1] == 7
+
+
+def test_build_molecular_context_selects_similar_examples_within_budget():
+    from context_engineering_mcp.core.molecular import build_molecular_context
+
+    topics = ["parse csv rows", "sort a list", "merge two dicts", "format a date"]
+    bank = [
+        {
+            "input": f"{topics[i % 4]} (case {i})",
+            "output": "answer " * (40 if i == 4 else 5),
+            "thinking": "step by step" if i % 2 else None,
+        }
+        for i in range(2000)
+    ]
+    bank = [{k: v for k, v in example.items() if v is not None} for example in bank]
+
+    result = build_molecular_context(
+        instruction="Write the Python snippet.",
+        examples=bank,
+        new_input="How do I merge dicts?",
+        token_budget=120,
+        max_examples=3,
+    )
+    assert result["bank_size"] == 2000 and result["tokens"] <= 120
+    chosen = [bank[e["index"]]["input"] for e in result["examples"]]
+    assert len(chosen) == 3 and all("merge two dicts" in text for text in chosen)
+    scores = [e["score"] for e in result["examples"]]
+    assert scores == sorted(scores)  # closest example last, next to the input
+    context = result["context"]
+    assert context.startswith("Write the Python snippet.\n\n")
+    closest = bank[result["examples"][-1]["index"]]
+    assert context.endswith(
+        f"Output: {closest['output']}\n\nInput: How do I merge dicts?\nOutput:"
+    )
+    assert "Thinking:" not in context
+
+    # Chain-of-thought skips examples without reasoning; a tight budget
+    # leaves out examples that do not fit rather than truncating them.
+    cot = build_molecular_context(
+        instruction="Solve.",
+        examples=bank,
+        new_input="parse csv",
+        format_type="chain-of-thought",
+        token_budget=40,
+    )
+    assert cot["ineligible_examples"] == 1000
+    assert all(bank[e["index"]].get("thinking") for e in cot["examples"])
+    assert cot["tokens"] <= 40 and "Thinking: step by step" in cot["context"]
+
+    empty = build_molecular_context(instruction="Solve.", new_input="x")
+    assert empty["examples"] == [] and empty["context"] == "Solve.\n\nInput: x\nOutput:"
+    error = build_molecular_context(
+        instruction="Solve.", new_input="x", format_type="table"
+    )["error"]
+    assert error["details"][0]["loc"] == ["format_type"]
+
+
+def test_example_store_selects_diverse_neighbours_and_persists(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    import time
+
+    from context_engineering_mcp.core import examples, molecular
+
+    engine = examples.ExampleStoreEngine(tmp_path)
+    monkeypatch.setattr(examples, "EXAMPLE_STORES", engine)
+    monkeypatch.setattr(molecular, "EXAMPLE_STORES", engine)
+
+    bank = [
+        {"input": "merge two dicts in python", "output": "a | b"},
+        {"input": "merge two dicts in python", "output": "{**a, **b}"},
+        {"input": "merge two dict objects in python", "output": "a.update(b)"},
+        {"input": "merge dictionaries with python", "output": "dict(a, **b)"},
+        {"input": "parse a csv file", "output": "csv.reader(f)", "thinking": "io"},
+    ]
+    added = examples.add_examples(store="snippets", examples=bank + bank[:1])
+    assert (added["added"], added["duplicates"], added["size"]) == (5, 1, 5)
+    assert "error" in examples.add_examples(store="../escape", examples=bank)
+
+    store = engine.store("snippets")
+    plain = [i for i, _ in store.select("merge dicts python", 3, diversity=0.0)]
+    diverse = [i for i, _ in store.select("merge dicts python", 3, diversity=0.9)]
+    assert set(plain) == {0, 1, 2} and 3 in diverse  # duplicates give way
+    assert [i for i, _ in store.select("merge dicts", 3, require_thinking=True)] == [4]
+
+    result = molecular.build_molecular_context(
+        instruction="Write the snippet.",
+        store="snippets",
+        new_input="merge dicts in python",
+        max_examples=2,
+    )
+    assert result["store"] == "snippets" and result["bank_size"] == 5
+    assert len(result["examples"]) == 2 and "Input: merge" in result["context"]
+    error = molecular.build_molecular_context(
+        instruction="x", store="snippets", examples=bank, new_input="y"
+    )["error"]
+    assert "either examples or store" in error["details"][0]["msg"]
+    missing = molecular.build_molecular_context(
+        instruction="x", store="snipets", new_input="y"
+    )["error"]
+    assert missing["type"] == "not_found" and missing["available"] == ["snippets"]
+    assert not (tmp_path / "snipets").exists()
+
+    # Stored examples and their vectors survive a restart.
+    engine.close()
+    reopened = examples.ExampleStore(tmp_path / "snippets")
+    assert len(reopened) == 5
+    assert reopened.select("parse csv", 1)[0][0] == 4
+    reopened.add({"input": f"task number {i}", "output": str(i)} for i in range(50000))
+    started = time.perf_counter()
+    reopened.select("task number 123", 8)
+    assert time.perf_counter() - started < 0.1  # one matrix-vector product
+    reopened.close()
+
+    # A corrupt complete line is skipped and counted, not fatal.
+    with open(tmp_path / "snippets" / "examples.jsonl", "ab") as handle:
+        handle.write(b'{"input": "broken\n')
+    damaged = examples.ExampleStore(tmp_path / "snippets")
+    assert damaged.skipped_lines == 1 and len(damaged) == 50005
+    assert damaged.select("parse csv", 1)[0][0] == 4
+    damaged.close()
+    assert (tmp_path / "snippets" / "examples.jsonl.corrupt").exists()
+    repaired = examples.ExampleStore(tmp_path / "snippets")
+    assert repaired.skipped_lines == 0 and len(repaired) == 50005
+    repaired.close()